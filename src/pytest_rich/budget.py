@@ -0,0 +1,100 @@
+import re
+import time
+from typing import Literal
+from typing import Optional
+
+import attr
+
+Tier = Literal["full", "plain", "line"]
+
+# Share of the budget spent on full panels; the rest goes to plain tracebacks.
+FULL_SHARE = 0.5
+
+_UNITS = {
+    "ms": ("seconds", 0.001),
+    "s": ("seconds", 1),
+    "m": ("seconds", 60),
+    "b": ("size", 1),
+    "kb": ("size", 1_000),
+    "mb": ("size", 1_000_000),
+}
+_BUDGET_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([a-z]+)", re.IGNORECASE)
+
+
+@attr.s(auto_attribs=True, eq=False)
+class RenderBudget:
+    """
+    Time or size of output the failures at the end of the session may take.
+
+    Failures get full panels until `FULL_SHARE` of the budget is spent,
+    then plain-text tracebacks until all of it is, then a single line.
+    """
+
+    seconds: Optional[float] = None
+    # Characters of output.
+    size: Optional[int] = None
+    start: float = 0.0
+    output: int = 0
+    # Number of failures shown in each tier.
+    counts: dict[str, int] = attr.Factory(lambda: {"full": 0, "plain": 0, "line": 0})
+    # The budget as the user gave it, to show it in their unit.
+    text: Optional[str] = None
+
+    @classmethod
+    def parse(cls, value: str) -> "RenderBudget":
+        """
+        Parse a budget such as "30s", "500ms", "2m", "200kB" or "5MB".
+
+        Raises:
+            ValueError: If `value` is not a budget.
+        """
+        match = _BUDGET_RE.fullmatch(value.strip())
+        unit = _UNITS.get(match.group(2).lower()) if match else None
+        if match is None or unit is None:
+            raise ValueError(
+                f"invalid budget {value!r}, expected a duration such as '30s' or "
+                "'500ms', or a size such as '200kB' or '5MB'"
+            )
+        kind, scale = unit
+        amount = float(match.group(1)) * scale
+        text = "".join(match.groups())
+        if kind == "seconds":
+            return cls(seconds=amount, text=text)
+        return cls(size=int(amount), text=text)
+
+    def begin(self) -> None:
+        self.start = time.monotonic()
+
+    def spent(self) -> float:
+        """Return the share of the budget spent so far."""
+        if self.seconds is not None:
+            if self.seconds <= 0:
+                return 1.0
+            return (time.monotonic() - self.start) / self.seconds
+        assert self.size is not None
+        if self.size <= 0:
+            return 1.0
+        return self.output / self.size
+
+    @property
+    def full_spent(self) -> bool:
+        """Whether the share of the budget for full panels is spent."""
+        return self.spent() >= FULL_SHARE
+
+    def next_tier(self) -> Tier:
+        """Return how to show the next failure, counting it."""
+        spent = self.spent()
+        tier: Tier = "full" if spent < FULL_SHARE else "plain" if spent < 1 else "line"
+        self.counts[tier] += 1
+        return tier
+
+    @property
+    def degraded(self) -> bool:
+        return self.counts["plain"] + self.counts["line"] > 0
+
+    def __str__(self) -> str:
+        if self.text is not None:
+            return self.text
+        if self.seconds is not None:
+            return f"{self.seconds:g}s"
+        return f"{self.size}b"
@@ -1,30 +1,265 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
 import re
+import time
+from collections.abc import Sequence
 from datetime import datetime
 from datetime import timezone
 from pathlib import Path
+from typing import BinaryIO
+from typing import Optional
 
+import attr
+from rich._export_format import CONSOLE_HTML_FORMAT
+from rich._null_file import NULL_FILE
 from rich.console import Console
+from rich.console import ConsoleRenderable
+from rich.console import RenderHook
+from rich.filesize import decimal
+from rich.terminal_theme import DEFAULT_TERMINAL_THEME
 
+# File types which can be written as the session goes.
+STREAMING_FILE_TYPES = ["html", "txt"]
 
-def save_terminal_output(console: Console, arg: str) -> None:
+# Suffixes which can follow the file type, compressing the output with the
+# matching module.
+COMPRESSIONS = {"gz": gzip, "bz2": bz2, "xz": lzma}
+
+# Characters encoded at a time when writing to a capture file, so a whole
+# export is never held encoded as well.
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+
+@attr.s(auto_attribs=True)
+class CaptureFile:
+    """
+    Output file of a capture, compressed according to the suffix of its file
+    type as it is written, so the compressed data never piles up in memory.
+    """
+
+    path: str
+    # Possibly compressed file, and the text file encoding to it.
+    binary: BinaryIO
+    file: io.TextIOWrapper
+    compressed: bool
+    # Size of the output before compression, once the file is closed.
+    bytes_written: int = 0
+    write_time: float = 0.0
+
+    @classmethod
+    def open(cls, filename: str, filetype: str) -> "CaptureFile":
+        path = f"{filename}.{filetype}"
+        compression = COMPRESSIONS.get(filetype.rpartition(".")[2])
+        binary: BinaryIO
+        if compression is None:
+            binary = open(path, "wb")
+        else:
+            binary = compression.open(path, "wb")
+        file = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+        return cls(path, binary, file, compressed=compression is not None)
+
+    def write(self, text: str) -> None:
+        start = time.perf_counter()
+        for offset in range(0, len(text), WRITE_CHUNK_SIZE):
+            self.file.write(text[offset : offset + WRITE_CHUNK_SIZE])
+        self.write_time += time.perf_counter() - start
+
+    def flush(self) -> None:
+        start = time.perf_counter()
+        self.file.flush()
+        self.write_time += time.perf_counter() - start
+
+    def close(self) -> None:
+        start = time.perf_counter()
+        self.file.flush()
+        # the compressed files tell their position in the uncompressed data.
+        self.bytes_written = self.binary.tell()
+        self.file.close()
+        self.write_time += time.perf_counter() - start
+
+    def summary(self) -> str:
+        """Describe what was written, once the file is closed."""
+        if not self.compressed:
+            size = f"{decimal(self.bytes_written)}"
+        else:
+            file_size = os.path.getsize(self.path)
+            ratio = self.bytes_written / file_size if file_size else 0
+            size = (
+                f"{decimal(self.bytes_written)} -> {decimal(file_size)}, "
+                f"{ratio:.1f}x smaller"
+            )
+        return (
+            f"Saved terminal output to {self.path} ({size}, in {self.write_time:.2f}s)"
+        )
+
+
+def save_terminal_output(
+    console: Console, arg: str, output: Optional[Console] = None
+) -> None:
     """
     Save terminal output to file.
 
     Args:
         console (Console): Rich console.
         arg (str): Argument to parse.
+        output (Console): Console to report on, `console` by default.
     """
+    if output is None:
+        output = console
     try:
         filename, filetype = _get_filename_from_arg(arg)
     except ValueError as e:
-        console.print(f"[red]Error saving terminal output: {e}[/red]")
+        output.print(f"[red]Error saving terminal output: {e}[/red]")
         return
 
-    func_name = "text" if filetype == "txt" else filetype
+    base_filetype = filetype.partition(".")[0]
+    func_name = "text" if base_filetype == "txt" else base_filetype
 
-    save_func = getattr(console, f"save_{func_name}")
+    export_func = getattr(console, f"export_{func_name}")
 
-    save_func(f"{filename}.{filetype}")
+    capture_file = CaptureFile.open(filename, filetype)
+    capture_file.write(export_func())
+    capture_file.close()
+    output.print(capture_file.summary(), markup=False, highlight=False)
+
+
+@attr.s(auto_attribs=True, eq=False)
+class RecordingHook(RenderHook):
+    """
+    Records what is printed on a console on another, recording console.
+
+    Pushed before the live displays of the console start, whose render hooks
+    then add their frames to each print after it was recorded.
+    """
+
+    recorder: Console
+
+    @classmethod
+    def start(cls, console: Console) -> "RecordingHook":
+        """Start recording what `console` prints, on a console of its width."""
+        hook = cls(Console(file=NULL_FILE, width=console.width, record=True))
+        console.push_render_hook(hook)
+        return hook
+
+    def process_renderables(
+        self, renderables: list[ConsoleRenderable]
+    ) -> list[ConsoleRenderable]:
+        # the renderables already end with the end of the print.
+        self.recorder.print(*renderables, end="")
+        return renderables
+
+
+@attr.s(auto_attribs=True, eq=False)
+class StreamingCapture(RenderHook):
+    """
+    Writes what a recording console prints to a file during the session,
+    instead of keeping all of it in memory until the end.
+
+    Every `flush_every` prints, the segments recorded so far are exported,
+    appended to the file and dropped from the console. HTML is exported with
+    inline styles, since a stylesheet could only be written once all the
+    styles are known.
+    """
+
+    console: Console
+    file: CaptureFile
+    filetype: str
+    # Console to report on, `console` by default.
+    output: Optional[Console] = None
+    flush_every: int = 100
+    prints: int = 0
+
+    def start(self) -> None:
+        if self.filetype == "html":
+            self.file.write(self._html_template()[0])
+        self.console.push_render_hook(self)
+
+    def process_renderables(
+        self, renderables: list[ConsoleRenderable]
+    ) -> list[ConsoleRenderable]:
+        # called at the start of each print, once the previous one has been
+        # recorded.
+        self.prints += 1
+        if self.prints % self.flush_every == 0:
+            self.flush()
+        return renderables
+
+    def flush(self) -> None:
+        if self.filetype == "html":
+            self.file.write(
+                self.console.export_html(
+                    theme=DEFAULT_TERMINAL_THEME,
+                    clear=True,
+                    code_format="{code}",
+                    inline_styles=True,
+                )
+            )
+        else:
+            self.file.write(self.console.export_text(clear=True))
+        self.file.flush()
+
+    def close(self) -> None:
+        """Write what is left to the file and close it."""
+        self.console.pop_render_hook()
+        self.flush()
+        if self.filetype == "html":
+            self.file.write(self._html_template()[1])
+        self.file.close()
+        output = self.console if self.output is None else self.output
+        output.print(self.file.summary(), markup=False, highlight=False)
+
+    def _html_template(self) -> Sequence[str]:
+        html = CONSOLE_HTML_FORMAT.format(
+            code="{code}",
+            stylesheet="",
+            foreground=DEFAULT_TERMINAL_THEME.foreground_color.hex,
+            background=DEFAULT_TERMINAL_THEME.background_color.hex,
+        )
+        return html.split("{code}")
+
+
+def start_streaming_capture(
+    console: Console, arg: str, output: Optional[Console] = None
+) -> Optional[StreamingCapture]:
+    """
+    Start writing terminal output to file as it is printed.
+
+    Args:
+        console (Console): Rich console, which must be recording.
+        arg (str): Argument to parse.
+        output (Console): Console to report on, `console` by default.
+
+    Returns:
+        StreamingCapture: The running capture, or None if the file type
+        cannot be streamed, in which case the output should be saved at the
+        end as usual.
+    """
+    try:
+        filename, filetype = _get_filename_from_arg(arg)
+    except ValueError:
+        return None
+    base_filetype = filetype.partition(".")[0]
+    if base_filetype not in STREAMING_FILE_TYPES:
+        return None
+    file = CaptureFile.open(filename, filetype)
+    capture = StreamingCapture(console, file, base_filetype, output)
+    capture.start()
+    return capture
+
+
+def get_capture_path(arg: str) -> str:
+    """
+    Get the path of the file a capture argument saves to, which may then be
+    passed as the argument itself to keep its timestamp.
+
+    Raises:
+        ValueError: If the file type is not supported.
+    """
+    filename, filetype = _get_filename_from_arg(arg)
+    return f"{filename}.{filetype}"
 
 
 def _get_filename_from_arg(arg: str) -> tuple[str, str]:
@@ -35,11 +270,19 @@ def _get_filename_from_arg(arg: str) -> tuple[str, str]:
         arg (str): Argument to parse.
 
     Returns:
-        tuple: Filename and file type.
+        tuple: Filename and file type, which ends with the compression
+        suffix if there is one (e.g. "svg.gz").
     """
 
     ACCEPTED_FILE_TYPES = ["svg", "html", "txt"]
 
+    compression = ""
+    base, dot, suffix = arg.rpartition(".")
+    if dot and suffix in COMPRESSIONS:
+        # parse the rest of the argument as if it was not compressed.
+        arg = base
+        compression = f".{suffix}"
+
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
 
     if not arg:
@@ -63,4 +306,4 @@ def _get_filename_from_arg(arg: str) -> tuple[str, str]:
     if filetype not in ACCEPTED_FILE_TYPES:
         raise ValueError(f"File type {filetype} is not supported.")
 
-    return filename, filetype
+    return filename, filetype + compression
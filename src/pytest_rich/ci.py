@@ -0,0 +1,173 @@
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import IO
+from typing import Optional
+
+import attr
+
+from pytest_rich.terminal import STATUS_CODES
+from pytest_rich.terminal import RichTerminalReporter
+from pytest_rich.terminal import _format_eta
+
+
+@attr.s(auto_attribs=True, eq=False)
+class BackgroundWriter:
+    """
+    Text stream whose writes are queued and written to `stream` by a
+    background thread, in batches, so a slow reader of `stream` does not
+    hold up the tests.
+    """
+
+    stream: IO[str]
+    # Whether `stream` is closed with the writer.
+    owns_stream: bool = False
+    queue: "queue.SimpleQueue[Optional[str]]" = attr.Factory(queue.SimpleQueue)
+    thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def for_stdout(cls) -> "BackgroundWriter":
+        """
+        Create a writer for a duplicate of the standard output descriptor,
+        so it keeps writing to the real output while pytest captures it.
+        """
+        try:
+            fd = os.dup(sys.stdout.fileno())
+        except (AttributeError, OSError, ValueError):
+            # e.g. already captured in memory.
+            return cls(sys.stdout)
+        encoding = getattr(sys.stdout, "encoding", None) or "utf-8"
+        return cls(open(fd, "w", encoding=encoding, errors="replace"), True)
+
+    @property
+    def encoding(self) -> str:
+        return getattr(self.stream, "encoding", None) or "utf-8"
+
+    def start(self) -> None:
+        self.thread = threading.Thread(
+            target=self._run, name="pytest-rich-writer", daemon=True
+        )
+        self.thread.start()
+
+    def write(self, text: str) -> int:
+        self.queue.put(text)
+        return len(text)
+
+    def flush(self) -> None:
+        # the thread flushes after every batch.
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        """Write everything queued so far and stop the thread."""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        if self.owns_stream:
+            self.stream.close()
+
+    def _run(self) -> None:
+        while True:
+            chunks = [self.queue.get()]
+            while True:
+                try:
+                    chunks.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = chunks[-1] is None
+            if stop:
+                chunks.pop()
+            self.stream.write("".join(chunks))  # type: ignore[arg-type]
+            self.stream.flush()
+            if stop:
+                return
+
+
+class CIReporter(RichTerminalReporter):
+    """
+    Reporter for non-interactive outputs such as CI build logs.
+
+    Never starts the live progress displays: progress is shown as lines
+    appended to the output, one per finished file and one every
+    `--rich-ci-interval` seconds, while the header, tracebacks and summary
+    are the same as on a terminal.
+    """
+
+    def __attrs_post_init__(self):
+        super().__attrs_post_init__()
+        self.next_progress_line: float = 0
+
+    def pytest_collection(self) -> None:
+        pass
+
+    def _start_runtest_display(self) -> None:
+        self._start_estimates()
+        self.console.print(self.collected_description)
+        self._schedule_progress_line()
+
+    def pytest_runtest_logstart(
+        self, nodeid: str, location: tuple[str, Optional[int], str]
+    ) -> None:
+        if self.run_start is None:
+            self._start_runtest_display()
+
+    def _update_task(self, nodeid: str) -> None:
+        pass
+
+    def pytest_runtest_logfinish(self, nodeid: str) -> None:
+        super().pytest_runtest_logfinish(nodeid)
+        if self.ci_interval > 0 and time.monotonic() >= self.next_progress_line:
+            self._print_progress_line()
+            self._schedule_progress_line()
+
+    def _finish_file(self, path: Path, nodeid: str) -> None:
+        file_progress = self.progress_per_file[path]
+        counts = file_progress.counts
+        outcomes = [
+            f"[{style}]{counts[STATUS_CODES[status]]} {name}[/{style}]"
+            for status, name, style in (
+                ("success", "passed", "green"),
+                ("fail", "failed", "red"),
+                ("error", "errors", "red"),
+                ("skipped", "skipped", "yellow"),
+                ("xfailed", "xfailed", "yellow"),
+            )
+            if counts[STATUS_CODES[status]]
+        ]
+        self.console.print(
+            f"[cyan][{self._percent:3d}%][/cyan] {nodeid.split('::')[0]} "
+            + ", ".join(outcomes),
+            highlight=False,
+        )
+
+    def _print_progress_line(self) -> None:
+        line = (
+            f"[cyan][{self._percent:3d}%][/cyan] {self.total_items_completed}/"
+            f"{self.total_items_collected} tests"
+        )
+        if self.run_start is not None:
+            elapsed = time.monotonic() - self.run_start
+            if elapsed > 0:
+                line += f", {self.total_items_completed / elapsed:.1f} tests/s"
+        remaining = self._estimate_remaining(self.expected_remaining)
+        if remaining is not None:
+            line += f", ETA {_format_eta(remaining)}"
+        self.console.print(line, highlight=False)
+
+    def _schedule_progress_line(self) -> None:
+        self.next_progress_line = time.monotonic() + self.ci_interval
+
+    @property
+    def _percent(self) -> int:
+        return (self.total_items_completed * 100) // max(self.total_items_collected, 1)
+
+    @property
+    def ci_interval(self) -> float:
+        return self.config.getoption("rich_ci_interval")
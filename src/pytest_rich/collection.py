@@ -0,0 +1,177 @@
+import heapq
+import itertools
+import time
+from array import array
+from collections.abc import Iterator
+from collections.abc import Sequence
+from operator import itemgetter
+from pathlib import Path
+
+import attr
+from rich.console import Console
+from rich.console import ConsoleOptions
+from rich.console import RenderResult
+from rich.table import Table
+from rich.tree import Tree
+
+from pytest_rich.durations import _format_duration
+
+# Levels of directories below the root shown by the collection tree, and
+# directories shown per level; the rest is folded into a single line.
+COLLECT_TREE_DEPTH = 2
+COLLECT_TREE_CHILDREN = 8
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class DirectoryCounts:
+    """Number of items and modules collected in a directory, recursively."""
+
+    items: int = 0
+    modules: int = 0
+    children: dict[str, "DirectoryCounts"] = attr.Factory(dict)
+
+
+@attr.s(auto_attribs=True, eq=False)
+class CollectTree:
+    """
+    Number of items and modules collected per directory, updated as the
+    collectors report, and rendered as a tree of the top directories.
+
+    Adding items only increments the counters of the directories above
+    them, and the tree is only built when the display repaints.
+    """
+
+    rootpath: Path
+    root: DirectoryCounts = attr.Factory(DirectoryCounts)
+    # Counters of a directory and of each directory above it.
+    chains: dict[Path, list[DirectoryCounts]] = attr.Factory(dict)
+    modules: set[Path] = attr.Factory(set)
+
+    def add(self, collected: Sequence[tuple[str, Path]]) -> None:
+        """
+        Count the items collected by a collector.
+
+        Args:
+            collected (Sequence[tuple[str, Path]]): Node ID and path of the items.
+        """
+        for path, group in itertools.groupby(collected, key=itemgetter(1)):
+            items = sum(1 for _ in group)
+            new_module = path not in self.modules
+            if new_module:
+                self.modules.add(path)
+            for counts in self._chain(path.parent):
+                counts.items += items
+                counts.modules += new_module
+
+    def _chain(self, directory: Path) -> list[DirectoryCounts]:
+        chain = self.chains.get(directory)
+        if chain is not None:
+            return chain
+        try:
+            parts = directory.relative_to(self.rootpath).parts
+        except ValueError:
+            # outside of the root, e.g. given explicitly on the command line.
+            parts = directory.parts
+        counts = self.root
+        chain = [counts]
+        for part in parts:
+            child = counts.children.get(part)
+            if child is None:
+                child = counts.children[part] = DirectoryCounts()
+            counts = child
+            chain.append(counts)
+        self.chains[directory] = chain
+        return chain
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+        tree = Tree(_label(self.rootpath.name or str(self.rootpath), self.root))
+        self._add_children(tree, self.root, COLLECT_TREE_DEPTH)
+        yield tree
+
+    def _add_children(self, tree: Tree, counts: DirectoryCounts, depth: int) -> None:
+        if depth == 0:
+            return
+        names = sorted(counts.children)
+        for name in names[:COLLECT_TREE_CHILDREN]:
+            child = counts.children[name]
+            self._add_children(tree.add(_label(name, child)), child, depth - 1)
+        folded = names[COLLECT_TREE_CHILDREN:]
+        if folded:
+            items = sum(counts.children[name].items for name in folded)
+            tree.add(
+                f"[dim]… {len(folded)} more directories ([green]{items}[/green] items)"
+            )
+
+
+def _label(name: str, counts: DirectoryCounts) -> str:
+    return (
+        f"[bold]{name}/[/bold] [green]{counts.items}[/green] items in "
+        f"{counts.modules} modules"
+    )
+
+
+@attr.s(auto_attribs=True, slots=True)
+class CollectDurations:
+    """
+    How long each module took to collect, including its import, from
+    `pytest_collectstart` to `pytest_collectreport`.
+    """
+
+    starts: dict[str, float] = attr.Factory(dict)
+    nodeids: list[str] = attr.Factory(list)
+    durations: array = attr.Factory(lambda: array("d"))
+
+    def start(self, nodeid: str) -> None:
+        self.starts[nodeid] = time.perf_counter()
+
+    def finish(self, nodeid: str) -> None:
+        """Record the duration of a collector, if it was started."""
+        start = self.starts.pop(nodeid, None)
+        if start is not None:
+            self.nodeids.append(nodeid)
+            self.durations.append(time.perf_counter() - start)
+
+    @property
+    def total(self) -> float:
+        return sum(self.durations)
+
+    def slowest(self, count: int) -> Iterator[tuple[str, float]]:
+        """Return the `count` slowest modules and their durations, slowest first."""
+        indexes = heapq.nlargest(
+            count, range(len(self.durations)), key=self.durations.__getitem__
+        )
+        for index in indexes:
+            yield self.nodeids[index], self.durations[index]
+
+
+def generate_collect_durations_table(durations: CollectDurations, count: int) -> Table:
+    """
+    Render the modules which took the longest to collect.
+
+    Args:
+        durations (CollectDurations): Collection durations of the session.
+        count (int): Number of modules listed.
+
+    Returns:
+        Table: The slowest modules.
+    """
+    title = f"Slowest {count} modules to collect"
+    caption = (
+        f"{len(durations.durations)} modules collected in "
+        f"{_format_duration(durations.total)}"
+    )
+    table = Table(
+        title=title,
+        title_justify="left",
+        caption=caption,
+        caption_justify="left",
+        # the table of short module names would wrap them otherwise.
+        min_width=max(len(title), len(caption)),
+    )
+    table.add_column("Duration", justify="right", style="bold")
+    table.add_column("Module", overflow="fold")
+    for nodeid, duration in durations.slowest(count):
+        table.add_row(_format_duration(duration), nodeid)
+    return table
@@ -0,0 +1,174 @@
+import heapq
+from array import array
+from collections.abc import Iterator
+from collections.abc import Sequence
+from typing import Optional
+
+import attr
+from rich.console import Group
+from rich.table import Table
+from rich.text import Text
+
+PHASES = ("setup", "call", "teardown")
+
+# Upper bounds of the histogram buckets, in seconds; the last bucket has
+# everything slower.
+HISTOGRAM_BOUNDS = (0.001, 0.01, 0.1, 1.0, 10.0)
+HISTOGRAM_WIDTH = 40
+
+
+@attr.s(auto_attribs=True, slots=True)
+class DurationStats:
+    """
+    Setup, call and teardown durations of every item, kept in one compact
+    array per phase indexed by the index of the item in the `ItemRegistry`.
+    """
+
+    # Whether each item was reported: the items which did not run have no
+    # durations.
+    reported: bytearray = attr.Factory(bytearray)
+    setup: array = attr.Factory(lambda: array("d"))
+    call: array = attr.Factory(lambda: array("d"))
+    teardown: array = attr.Factory(lambda: array("d"))
+
+    def __len__(self) -> int:
+        """Return the number of items reported."""
+        return len(self.reported) - self.reported.count(0)
+
+    def add(self, index: int, when: str, duration: float) -> None:
+        missing = index + 1 - len(self.reported)
+        if missing > 0:
+            self.reported.extend(bytes(missing))
+            for phase in PHASES:
+                getattr(self, phase).frombytes(bytes(8 * missing))
+        self.reported[index] = 1
+        getattr(self, when)[index] += duration
+
+    def indexes(self) -> list[int]:
+        """Return the indexes of the items reported, in order."""
+        return [index for index, reported in enumerate(self.reported) if reported]
+
+    def item_total(self, index: int) -> float:
+        return self.setup[index] + self.call[index] + self.teardown[index]
+
+    def totals(self) -> Iterator[tuple[int, float]]:
+        """Yield the index and total duration of the items reported."""
+        for index in self.indexes():
+            yield index, self.item_total(index)
+
+    @property
+    def total(self) -> float:
+        return sum(self.setup) + sum(self.call) + sum(self.teardown)
+
+    def slowest(self, count: int) -> list[int]:
+        """Return the indexes of the `count` slowest items, slowest first."""
+        return heapq.nlargest(count, self.indexes(), key=self.item_total)
+
+    def per_file(self, nodeids: Sequence[str]) -> dict[str, tuple[int, float]]:
+        """
+        Return the number of items and their total duration, per file.
+
+        Args:
+            nodeids (Sequence[str]): Node ID of each item, by index.
+        """
+        files: dict[str, tuple[int, float]] = {}
+        for index, total in self.totals():
+            filename = nodeids[index].split("::")[0]
+            items, duration = files.get(filename, (0, 0.0))
+            files[filename] = (items + 1, duration + total)
+        return files
+
+    def histogram(self) -> list[int]:
+        """Count the items in each of the `HISTOGRAM_BOUNDS` buckets."""
+        counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        for _, total in self.totals():
+            for bucket, bound in enumerate(HISTOGRAM_BOUNDS):
+                if total < bound:
+                    break
+            else:
+                bucket = len(HISTOGRAM_BOUNDS)
+            counts[bucket] += 1
+        return counts
+
+
+def generate_durations_group(
+    stats: DurationStats,
+    nodeids: Sequence[str],
+    count: int,
+    wall_time: Optional[float],
+) -> Group:
+    """
+    Render the slowest tests, the slowest files and a histogram of the
+    test durations.
+
+    Args:
+        stats (DurationStats): Durations of the session.
+        nodeids (Sequence[str]): Node ID of each item, by index.
+        count (int): Number of tests and files listed.
+        wall_time (float): Wall-clock time of the session, if known.
+
+    Returns:
+        Group: The tables.
+    """
+    slowest_tests = Table(title=f"Slowest {count} tests", title_justify="left")
+    slowest_tests.add_column("Total", justify="right", style="bold")
+    for phase in PHASES:
+        slowest_tests.add_column(phase.title(), justify="right")
+    slowest_tests.add_column("Test", overflow="fold")
+    for index in stats.slowest(count):
+        durations = [stats.setup[index], stats.call[index], stats.teardown[index]]
+        slowest_tests.add_row(
+            _format_duration(sum(durations)),
+            *map(_format_duration, durations),
+            nodeids[index],
+        )
+
+    slowest_files = Table(title=f"Slowest {count} files", title_justify="left")
+    slowest_files.add_column("Total", justify="right", style="bold")
+    slowest_files.add_column("Tests", justify="right")
+    slowest_files.add_column("File", overflow="fold")
+    files = stats.per_file(nodeids)
+    for filename in heapq.nlargest(count, files, key=lambda f: files[f][1]):
+        items, duration = files[filename]
+        slowest_files.add_row(_format_duration(duration), str(items), filename)
+
+    histogram = Table(title="Test durations", title_justify="left", box=None)
+    histogram.add_column(justify="right")
+    histogram.add_column()
+    histogram.add_column(justify="right")
+    counts = stats.histogram()
+    scale = HISTOGRAM_WIDTH / max(max(counts), 1)
+    labels = [f"< {_format_bound(bound)}" for bound in HISTOGRAM_BOUNDS]
+    labels.append(f">= {_format_bound(HISTOGRAM_BOUNDS[-1])}")
+    for label, bucket_count in zip(labels, counts):
+        histogram.add_row(
+            label,
+            Text("█" * round(bucket_count * scale), style="cyan"),
+            str(bucket_count),
+        )
+
+    times = Text.assemble(
+        "Time in tests: ",
+        (f"{stats.total:.2f}s", "bold"),
+        " (",
+        ", ".join(f"{phase} {sum(getattr(stats, phase)):.2f}s" for phase in PHASES),
+        ")",
+    )
+    if wall_time is not None:
+        times.append_text(
+            Text.assemble(", wall clock: ", (f"{wall_time:.2f}s", "bold"))
+        )
+
+    return Group(slowest_tests, slowest_files, histogram, times)
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def _format_bound(seconds: float) -> str:
+    if seconds < 1:
+        return f"{seconds * 1000:g}ms"
+    return f"{seconds:g}s"
@@ -0,0 +1,205 @@
+import json
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import IO
+from typing import Any
+from typing import Union
+
+import attr
+import pytest
+
+from pytest_rich.capture import COMPRESSIONS
+from pytest_rich.header import HeaderInfo
+
+# Refresh rate of the progress displays while replaying, when
+# `--rich-refresh-hz` is not given: events come in much faster than during
+# the actual session.
+REPLAY_REFRESH_HZ = 10.0
+
+
+def open_events(path: str, mode: str) -> IO[str]:
+    """
+    Open an event log, compressed if its name ends with one of the
+    `COMPRESSIONS` suffixes.
+
+    Args:
+        path (str): Path of the log.
+        mode (str): "r" or "w".
+
+    Returns:
+        IO[str]: The log, in text mode.
+    """
+    compression = COMPRESSIONS.get(path.rpartition(".")[2])
+    if compression is None:
+        return open(path, mode, encoding="utf-8")
+    return compression.open(path, f"{mode}t", encoding="utf-8")
+
+
+def serialize_report(config: pytest.Config, report: pytest.TestReport) -> Any:
+    """
+    Serialize a report to JSON compatible data.
+
+    Args:
+        config (pytest.Config): Configuration of the session.
+        report (pytest.TestReport): The report.
+
+    Returns:
+        Any: Data for `pytest_report_from_serializable`.
+    """
+    data = config.hook.pytest_report_to_serializable(config=config, report=report)
+    # pytest-xdist attaches the worker the report came from.
+    data.pop("node", None)
+    return data
+
+
+@attr.s(auto_attribs=True, eq=False)
+class EventRecorder:
+    """
+    Writes the events the reporter renders to a JSON Lines file, one JSON
+    array per line, instead of rendering them.
+
+    The events are:
+
+    - ["header", {HeaderInfo fields}]
+    - ["collect", collector nodeid, [item nodeids]]
+    - ["deselect", [item nodeids]]
+    - ["start", nodeid, location]
+    - ["pass", nodeid, when, duration] for passed reports
+    - ["report", serialized report] for any other report
+    - ["finish", nodeid]
+    - ["end", exit status, wall-clock time of the session]
+
+    Passed reports are the bulk of the events, so they only keep what is
+    shown about them.
+    """
+
+    config: pytest.Config
+    file: IO[str]
+    collected: bool = False
+    session_start: float = 0.0
+
+    def _write(self, event: Sequence[Any]) -> None:
+        self.file.write(json.dumps(event, separators=(",", ":")))
+        self.file.write("\n")
+
+    def pytest_sessionstart(self, session: pytest.Session) -> None:
+        self.session_start = time.monotonic()
+        self._write(["header", attr.asdict(HeaderInfo.from_session(session))])
+
+    def pytest_collectreport(self, report: pytest.CollectReport) -> None:
+        nodeids = [x.nodeid for x in report.result if isinstance(x, pytest.Item)]
+        if nodeids:
+            self._write(["collect", report.nodeid, nodeids])
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_node_collection_finished(self, node, ids: Sequence[str]) -> None:
+        # every worker collects the same items.
+        if not self.collected:
+            self.collected = True
+            self._write(["collect", "", list(ids)])
+
+    def pytest_deselected(self, items: Sequence[pytest.Item]) -> None:
+        self._write(["deselect", [item.nodeid for item in items]])
+
+    def pytest_runtest_logstart(
+        self, nodeid: str, location: tuple[str, Union[int, None], str]
+    ) -> None:
+        self._write(["start", nodeid, location])
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if report.passed:
+            self._write(["pass", report.nodeid, report.when, report.duration])
+        else:
+            self._write(["report", serialize_report(self.config, report)])
+
+    def pytest_runtest_logfinish(self, nodeid: str) -> None:
+        self._write(["finish", nodeid])
+
+    def pytest_sessionfinish(
+        self, session: pytest.Session, exitstatus: Union[int, pytest.ExitCode]
+    ) -> None:
+        wall_time = time.monotonic() - self.session_start
+        self._write(["end", int(exitstatus), wall_time])
+        self.file.close()
+
+
+def replay_events(config: pytest.Config, path: str) -> int:
+    """
+    Render a session recorded by EventRecorder, reading the log as a stream.
+
+    Args:
+        config (pytest.Config): Configuration of the replaying session, whose
+            options apply to the output.
+        path (str): Path of the log.
+
+    Returns:
+        int: Exit status of the recorded session.
+    """
+    try:
+        file = open_events(path, "r")
+    except OSError as e:
+        raise pytest.UsageError(f"Cannot replay {path}: {e}") from e
+    if config.getoption("rich_refresh_hz") is None:
+        config.option.rich_refresh_hz = REPLAY_REFRESH_HZ
+
+    from pytest_rich.terminal import RichTerminalReporter
+
+    reporter = RichTerminalReporter(config)
+    rootpath = config.rootpath
+    locations: dict[str, tuple[str, Union[int, None], str]] = {}
+    # a log without an end was cut short, e.g. by a killed job.
+    exitstatus: int = pytest.ExitCode.INTERRUPTED
+    with file:
+        for line in file:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # the last line of a cut short log may be incomplete.
+                break
+            kind = event[0]
+            if kind == "pass":
+                _, nodeid, when, duration = event
+                reporter.pytest_runtest_logreport(
+                    pytest.TestReport(
+                        nodeid,
+                        locations[nodeid],
+                        {},
+                        "passed",
+                        None,
+                        when,
+                        duration=duration,
+                    )
+                )
+            elif kind == "start":
+                nodeid, location = event[1], tuple(event[2])
+                locations[nodeid] = location  # type: ignore[assignment]
+                reporter.pytest_runtest_logstart(nodeid, location)  # type: ignore[arg-type]
+            elif kind == "finish":
+                locations.pop(event[1], None)
+                reporter.pytest_runtest_logfinish(event[1])
+            elif kind == "report":
+                report = config.hook.pytest_report_from_serializable(
+                    config=config, data=event[1]
+                )
+                reporter.pytest_runtest_logreport(report)
+            elif kind == "collect":
+                reporter.add_collected(
+                    event[1],
+                    [(nodeid, rootpath / nodeid.split("::")[0]) for nodeid in event[2]],
+                )
+            elif kind == "deselect":
+                reporter.deselect(event[1])
+            elif kind == "header":
+                header = HeaderInfo(**event[1])
+                rootpath = Path(header.rootpath)
+                reporter.start_session(header)
+                reporter.pytest_collection()
+            elif kind == "end":
+                exitstatus = event[1]
+                # report the duration of the recorded session, not the replay.
+                reporter.session_start = time.monotonic() - event[2]
+    reporter._stop_collect_progress()
+    reporter.pytest_sessionfinish(None, exitstatus)  # type: ignore[arg-type]
+    reporter.pytest_unconfigure()
+    return exitstatus
@@ -0,0 +1,144 @@
+import json
+import re
+import tempfile
+from collections.abc import Iterator
+from typing import IO
+from typing import Optional
+
+import attr
+import pytest
+from _pytest._code.code import ExceptionChainRepr
+
+from pytest_rich.events import serialize_report
+
+# Crash path and line, and normalized error lines of a failure.
+Signature = tuple[str, int, tuple[str, ...]]
+
+# Object addresses in reprs, which differ between otherwise identical failures.
+ADDRESS_RE = re.compile(r"\b0x[0-9a-fA-F]+\b")
+
+
+@attr.s(auto_attribs=True, eq=False)
+class FailureStore:
+    """
+    The failed reports of a session, kept until they are shown in the
+    summary.
+
+    With a `threshold`, reports are kept in memory until their serialized
+    size adds up to `threshold` bytes; later ones are written to a temporary
+    file and only read back, one at a time, when iterating.
+    """
+
+    config: pytest.Config
+    threshold: Optional[int] = None
+    reports: list[pytest.TestReport] = attr.Factory(list)
+    # Offset and size in `file` of each spilled report, after `reports`.
+    spilled: list[tuple[int, int]] = attr.Factory(list)
+    file: Optional[IO[bytes]] = None
+    # Serialized size of the reports kept in memory.
+    size: int = 0
+
+    def __len__(self) -> int:
+        return len(self.reports) + len(self.spilled)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def add(self, report: pytest.TestReport) -> None:
+        if self.threshold is None:
+            self.reports.append(report)
+            return
+        data = json.dumps(
+            serialize_report(self.config, report), separators=(",", ":")
+        ).encode("utf-8")
+        if not self.spilled and self.size + len(data) <= self.threshold:
+            self.size += len(data)
+            self.reports.append(report)
+            return
+        if self.file is None:
+            self.file = tempfile.TemporaryFile(prefix="pytest-rich-")
+        offset = self.file.seek(0, 2)
+        self.file.write(data)
+        self.spilled.append((offset, len(data)))
+
+    def __iter__(self) -> Iterator[pytest.TestReport]:
+        """Yield the reports in the order they were added."""
+        yield from self.reports
+        if self.file is None:
+            return
+        self.file.flush()
+        for offset, size in self.spilled:
+            self.file.seek(offset)
+            data = json.loads(self.file.read(size))
+            yield self.config.hook.pytest_report_from_serializable(
+                config=self.config, data=data
+            )
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def failure_signature(report: pytest.TestReport) -> Signature:
+    """
+    Signature of a failure: the location of the crash and the error lines
+    of the traceback, with the object addresses and spacing normalized, so
+    failures with the same cause have the same signature.
+
+    Args:
+        report (pytest.TestReport): A failed report.
+
+    Returns:
+        Signature: The crash path, line and error lines.
+    """
+    longrepr = report.longrepr
+    if not isinstance(longrepr, ExceptionChainRepr):
+        # e.g. the message of a strict xfail which passed.
+        return "", 0, (str(longrepr),)
+    from pytest_rich.traceback import get_error_messages
+
+    crash = longrepr.reprcrash
+    path, lineno = ("", 0) if crash is None else (crash.path, crash.lineno)
+    messages = tuple(
+        ADDRESS_RE.sub("0x?", " ".join(message.split()))
+        for message in get_error_messages(longrepr)
+    )
+    return path, lineno, messages
+
+
+@attr.s(auto_attribs=True, slots=True)
+class FailureGroup:
+    """Failures with the same signature."""
+
+    # The first one, shown in full.
+    report: pytest.TestReport
+    # Node IDs of the others.
+    nodeids: list[str] = attr.Factory(list)
+
+
+@attr.s(auto_attribs=True, eq=False)
+class FailureGroups:
+    """
+    The failures of a session grouped by signature, in the order each
+    signature was first seen; the signature of each failure is computed as
+    it is reported.
+    """
+
+    groups: dict[Signature, FailureGroup] = attr.Factory(dict)
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def __iter__(self) -> Iterator[FailureGroup]:
+        return iter(self.groups.values())
+
+    def add(self, report: pytest.TestReport) -> FailureGroup:
+        """Add a failed report, returning its group."""
+        signature = failure_signature(report)
+        group = self.groups.get(signature)
+        if group is None:
+            group = self.groups[signature] = FailureGroup(report)
+        else:
+            group.nodeids.append(report.nodeid)
+        return group
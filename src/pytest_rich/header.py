@@ -1,7 +1,9 @@
 import sys
 from collections.abc import Iterable
+from typing import Optional
 from typing import Union
 
+import attr
 import pytest
 from _pytest.main import Session
 from _pytest.terminal import _plugin_nameversions
@@ -10,58 +12,90 @@ from rich.console import Group
 from rich.panel import Panel
 
 
-def generate_header_panel(session: Session) -> Panel:
+@attr.s(auto_attribs=True)
+class HeaderInfo:
+    """
+    Everything shown in the session header, gathered upfront so the header
+    can also be rendered from a recorded session.
+    """
+
+    platform: str
+    pytest_version: str
+    python_version: str
+    pypy_version: Optional[str]
+    rootpath: str
+    plugins: Optional[list[str]]
+    report_header: list[str]
+
+    @classmethod
+    def from_session(cls, session: Session) -> "HeaderInfo":
+        pypy_version_info = getattr(sys, "pypy_version_info", None)
+        plugins = session.config.pluginmanager.list_plugin_distinfo()
+        return cls(
+            platform=sys.platform,
+            pytest_version=pytest.__version__,
+            python_version=f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
+            pypy_version=(
+                ".".join(map(str, pypy_version_info[:3]))
+                if pypy_version_info is not None
+                else None
+            ),
+            rootpath=str(session.config.rootpath),
+            plugins=(
+                list(_plugin_nameversions(plugins)) if plugins is not None else None
+            ),
+            report_header=list(_get_report_header_lines(session)),
+        )
+
+
+def generate_header_panel(header: HeaderInfo) -> Panel:
     columns = [
-        _generate_sysinfo_col(),
-        _generate_root_col(session),
-        _generate_plugins_col(session),
-        *_generate_header_hook_cols(session),
+        _generate_sysinfo_col(header),
+        _generate_root_col(header),
+        _generate_plugins_col(header),
+        *[Columns([line]) for line in header.report_header],
     ]
 
     return Panel(Group(*columns))
 
 
-def _generate_sysinfo_col() -> Columns:
+def _generate_sysinfo_col(header: HeaderInfo) -> Columns:
     column = Columns(
         [
-            f"platform [green]{sys.platform}",
-            f"pytest [cyan]{pytest.__version__}",
-            f"python [cyan]{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
+            f"platform [green]{header.platform}",
+            f"pytest [cyan]{header.pytest_version}",
+            f"python [cyan]{header.python_version}",
         ]
     )
 
-    pypy_version_info = getattr(sys, "pypy_version_info", None)
-    if pypy_version_info is not None:
-        column.add_renderable(f"pypy [cyan]{'.'.join(map(str, pypy_version_info[:3]))}")
+    if header.pypy_version is not None:
+        column.add_renderable(f"pypy [cyan]{header.pypy_version}")
 
     return column
 
 
-def _generate_root_col(session: Session) -> Columns:
-    return Columns([f"root [cyan][bold]{session.config.rootpath}"])
+def _generate_root_col(header: HeaderInfo) -> Columns:
+    return Columns([f"root [cyan][bold]{header.rootpath}"])
 
 
-def _generate_plugins_col(session: Session) -> Union[Columns, None]:
-    plugins = session.config.pluginmanager.list_plugin_distinfo()
-
-    if plugins is None:
+def _generate_plugins_col(header: HeaderInfo) -> Union[Columns, None]:
+    if header.plugins is None:
         return None
 
     return Columns(
         [
-            f"plugins [cyan]{', '.join(_plugin_nameversions(plugins))}",
+            f"plugins [cyan]{', '.join(header.plugins)}",
         ]
     )
 
 
-def _generate_header_hook_cols(session: Session) -> Iterable[Columns]:
+def _get_report_header_lines(session: Session) -> Iterable[str]:
     lines = session.config.hook.pytest_report_header(
         config=session.config, start_path=session.config.invocation_params.dir
     )
 
     for line_or_lines in reversed(lines):
         if isinstance(line_or_lines, str):
-            yield Columns([line_or_lines])
+            yield line_or_lines
         else:
-            for line in line_or_lines:
-                yield Columns([line])
+            yield from line_or_lines
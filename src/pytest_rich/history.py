@@ -0,0 +1,121 @@
+import os
+import struct
+import warnings
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Optional
+
+import attr
+import pytest
+
+from pytest_rich.durations import DurationStats
+
+MAGIC = b"pytest-rich durations 1\n"
+
+# Weight of the latest run in the moving average of the durations.
+HISTORY_WEIGHT = 0.3
+
+
+@attr.s(auto_attribs=True)
+class DurationHistory:
+    """
+    Moving average of the duration of each test over past runs, kept in
+    the pytest cache directory.
+
+    The file holds the sizes, then all the durations as one float array,
+    then all the nodeids separated by newlines, so loading and saving it is
+    a handful of bulk operations even for hundreds of thousands of tests.
+    """
+
+    path: Optional[Path] = None
+    durations: dict[str, float] = attr.Factory(dict)
+
+    @classmethod
+    def load(cls, config: pytest.Config) -> "DurationHistory":
+        """
+        Load the history from the cache of `config`, if it has one.
+
+        A missing or unreadable file gives an empty history.
+        """
+        cache = getattr(config, "cache", None)
+        if cache is None:
+            return cls()
+        path = cache.mkdir("pytest-rich") / "durations"
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return cls(path)
+        return cls(path, _decode(data))
+
+    def update(self, stats: DurationStats, nodeids: Sequence[str]) -> None:
+        """
+        Fold the durations of a run into the history, dropping the tests
+        which were not collected in it, so the history does not keep growing
+        with removed or renamed tests.
+
+        Args:
+            stats (DurationStats): Durations of the run.
+            nodeids (Sequence[str]): Node ID of each item, by index.
+        """
+        durations = self.durations
+        for index, total in stats.totals():
+            nodeid = nodeids[index]
+            previous = durations.get(nodeid)
+            if previous is None:
+                durations[nodeid] = total
+            else:
+                durations[nodeid] = (
+                    HISTORY_WEIGHT * total + (1 - HISTORY_WEIGHT) * previous
+                )
+        self.durations = {
+            nodeid: durations[nodeid] for nodeid in nodeids if nodeid in durations
+        }
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            tmp_path.write_bytes(_encode(self.durations))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # like pytest's own cache, e.g. on a read-only file system.
+            warnings.warn(
+                pytest.PytestCacheWarning(
+                    f"could not save test durations to {self.path}: {e}"
+                )
+            )
+
+
+def _encode(durations: dict[str, float]) -> bytes:
+    nodeids = "\n".join(durations).encode("utf-8")
+    return b"".join(
+        [
+            MAGIC,
+            struct.pack("<II", len(durations), len(nodeids)),
+            array("f", durations.values()).tobytes(),
+            nodeids,
+        ]
+    )
+
+
+def _decode(data: bytes) -> dict[str, float]:
+    if not data.startswith(MAGIC):
+        return {}
+    offset = len(MAGIC)
+    try:
+        count, nodeids_size = struct.unpack_from("<II", data, offset)
+    except struct.error:
+        return {}
+    offset += 8
+    durations = array("f")
+    end = offset + durations.itemsize * count
+    if len(data) != end + nodeids_size:
+        return {}
+    durations.frombytes(data[offset:end])
+    nodeids = data[end:].decode("utf-8", errors="replace")
+    keys = nodeids.split("\n") if count else []
+    if len(keys) != count:
+        return {}
+    return dict(zip(keys, durations))
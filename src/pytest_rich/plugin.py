@@ -6,7 +6,8 @@ import sys
 
 import pytest
 
-from pytest_rich.terminal import RichTerminalReporter
+# The plugin is loaded by every pytest session, including the ones without
+# --rich, so Rich and the reporter are only imported once they are used.
 
 
 def pytest_addoption(parser):
@@ -25,21 +26,233 @@ def pytest_addoption(parser):
         const="",
         help="Capture terminal output using rich. Takes an optional string to supply the file name and/or type.\n"
         "File name: defaults to 'pytest_rich' plus a UTC timestamp\n"
-        "File types: 'svg' (default), 'html', 'txt' \n"
+        "File types: 'svg' (default), 'html', 'txt', optionally compressed with a "
+        "'.gz', '.bz2' or '.xz' suffix\n"
         "Examples:\n"
         "--rich-capture         => 'pytest_rich-20200101_000000.svg'\n"
         "--rich-capture=out     => 'out.svg'\n"
         "--rich-capture=out.txt => 'out.txt'\n"
         "--rich-capture=.txt    => 'pytest_rich-20200101_000000.txt'\n"
-        "--rich-capture=txt     => 'pytest_rich-20200101_000000.txt'\n",
+        "--rich-capture=txt     => 'pytest_rich-20200101_000000.txt'\n"
+        "--rich-capture=out.svg.gz => 'out.svg.gz'\n",
     )
+    group.addoption(
+        "--rich-ci",
+        action="store_true",
+        default=False,
+        help="Use rich reporting on outputs which are not a terminal, such as CI "
+        "build logs: progress is shown as lines appended to the output instead of "
+        "live displays, written by a background thread.",
+    )
+    group.addoption(
+        "--rich-ci-interval",
+        action="store",
+        type=float,
+        default=10.0,
+        metavar="SECONDS",
+        help="With --rich-ci, show the overall progress every SECONDS seconds, "
+        "besides a line per finished file; 0 to disable (default: 10).",
+    )
+    group.addoption(
+        "--rich-capture-stream",
+        action="store_true",
+        default=False,
+        help="Write the --rich-capture file during the session instead of keeping "
+        "the whole output in memory until the end. Only for 'html' and 'txt', "
+        "'svg' is still written at the end.",
+    )
+    group.addoption(
+        "--rich-refresh-hz",
+        action="store",
+        type=float,
+        default=None,
+        metavar="HZ",
+        help="Repaint the progress displays at most HZ times per second, HZ being "
+        "greater than 0, coalescing the updates in between. By default every update "
+        "repaints the display.",
+    )
+    group.addoption(
+        "--rich-finished-window",
+        action="store",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Number of finished files kept in the progress display, older ones are "
+        "folded into a single counter (default: 10).",
+    )
+    group.addoption(
+        "--rich-stream-failures",
+        action="store_true",
+        default=False,
+        help="Show the traceback of each failure above the progress display as soon "
+        "as it is reported, instead of all of them at the end of the session.",
+    )
+    group.addoption(
+        "--rich-group-failures",
+        action="store_true",
+        default=False,
+        help="Group the failures with the same crash location and error lines, "
+        "showing the traceback of the first failure of each group followed by "
+        "the other tests of the group.",
+    )
+    group.addoption(
+        "--rich-render-budget",
+        action="store",
+        default=None,
+        metavar="BUDGET",
+        help="Limit the time or the output spent on the failures at the end of the "
+        "session, e.g. '30s' or '5MB': past half of it, failures are shown as plain "
+        "tracebacks, and past all of it, as a single line.",
+    )
+    group.addoption(
+        "--rich-render-workers",
+        action="store",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Render the failure tracebacks at the end of the session on a pool of "
+        "N workers. By default they are rendered one by one.",
+    )
+    group.addoption(
+        "--rich-render-pool",
+        action="store",
+        choices=("process", "thread"),
+        default="thread",
+        help="Kind of pool used by --rich-render-workers (default: thread).",
+    )
+    group.addoption(
+        "--rich-render-thread",
+        action="store_true",
+        default=False,
+        help="Render on a dedicated thread, the hooks only queuing what happened, so "
+        "a slow terminal does not slow down the tests. --rich-ci already writes from "
+        "a thread of its own. Repaints the progress at most "
+        "10 times per second unless --rich-refresh-hz is given.",
+    )
+    group.addoption(
+        "--rich-spill-failures",
+        action="store",
+        type=float,
+        default=None,
+        metavar="MB",
+        help="Keep up to about MB megabytes of failure reports in memory until the "
+        "summary, writing the rest to a temporary file. By default all of them are "
+        "kept in memory.",
+    )
+    group.addoption(
+        "--rich-durations",
+        action="store",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Show the N slowest tests and files, counting setup and teardown, and "
+        "a histogram of the test durations in the summary.",
+    )
+    group.addoption(
+        "--rich-collect-tree",
+        action="store_true",
+        default=False,
+        help="Show the number of items and modules collected per directory as a "
+        "tree while collecting, repainted at most --rich-refresh-hz times per "
+        "second (default: 4).",
+    )
+    group.addoption(
+        "--rich-collect-durations",
+        action="store",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Time the collection of each module, including its import, and show "
+        "the N slowest after collection.",
+    )
+    group.addoption(
+        "--rich-profile",
+        action="store",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="FILE",
+        help="Time the hooks of the reporter and the rendering of each part of the "
+        "output, and show the calls, total time, p50 and p99 of each at the end. "
+        "With FILE, also write them there as JSON.",
+    )
+    group.addoption(
+        "--rich-record-events",
+        action="store",
+        default=None,
+        metavar="FILE",
+        help="Write the events of the session to FILE, as JSON Lines, so its output "
+        "can be rendered later with --rich-replay. Add a '.gz', '.bz2' or '.xz' "
+        "suffix to compress it.",
+    )
+    group.addoption(
+        "--rich-replay",
+        action="store",
+        default=None,
+        metavar="FILE",
+        help="Render a session recorded with --rich-record-events instead of running "
+        "tests.",
+    )
+
+
+def pytest_cmdline_main(config):
+    replay = config.getoption("rich_replay")
+    if replay is not None:
+        from pytest_rich.events import replay_events
+
+        return replay_events(config, replay)
 
 
 @pytest.hookimpl(trylast=True)
 def pytest_configure(config):
-    if sys.stdout.isatty() and config.getoption("rich"):
-        standard_reporter = config.pluginmanager.getplugin("terminalreporter")
-        config.pluginmanager.unregister(standard_reporter)
+    if hasattr(config, "workerinput"):
+        # pytest-xdist worker: the controller does all the reporting.
+        return
+    refresh_hz = config.getoption("rich_refresh_hz")
+    if refresh_hz is not None and refresh_hz <= 0:
+        raise pytest.UsageError(
+            f"--rich-refresh-hz must be greater than 0, got {refresh_hz:g}"
+        )
+    render_budget = config.getoption("rich_render_budget")
+    if render_budget is not None:
+        from pytest_rich.budget import RenderBudget
+
+        try:
+            RenderBudget.parse(render_budget)
+        except ValueError as e:
+            raise pytest.UsageError(f"--rich-render-budget: {e}") from e
+    record_events = config.getoption("rich_record_events")
+    if record_events is not None:
+        from pytest_rich.events import EventRecorder
+        from pytest_rich.events import open_events
+
         config.pluginmanager.register(
-            RichTerminalReporter(config), "rich-terminal-reporter"
+            EventRecorder(config, open_events(record_events, "w")),
+            "rich-event-recorder",
         )
+    if config.getoption("rich_ci"):
+        from rich.console import Console
+
+        from pytest_rich.ci import BackgroundWriter
+        from pytest_rich.ci import CIReporter
+
+        writer = BackgroundWriter.for_stdout()
+        writer.start()
+        # after pytest_unconfigure, which may still print.
+        config.add_cleanup(writer.close)
+        reporter = CIReporter(config, console=Console(file=writer))
+    elif sys.stdout.isatty() and config.getoption("rich"):
+        if config.getoption("rich_render_thread"):
+            from pytest_rich.threaded import ThreadedReporter
+
+            reporter = ThreadedReporter.for_terminal(config)
+            reporter.start()
+        else:
+            from pytest_rich.terminal import RichTerminalReporter
+
+            reporter = RichTerminalReporter(config)
+    else:
+        return
+    standard_reporter = config.pluginmanager.getplugin("terminalreporter")
+    config.pluginmanager.unregister(standard_reporter)
+    config.pluginmanager.register(reporter, "rich-terminal-reporter")
@@ -0,0 +1,131 @@
+import contextlib
+import functools
+import json
+import time
+from array import array
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Any
+
+import attr
+from rich.table import Table
+
+# Methods of the reporter timed by `--rich-profile`.
+PROFILED_METHODS = (
+    "pytest_collectstart",
+    "pytest_collectreport",
+    "pytest_runtest_logstart",
+    "pytest_runtest_logreport",
+    "pytest_runtest_logfinish",
+    "_update_task",
+    "pytest_sessionfinish",
+)
+
+
+@attr.s(auto_attribs=True, eq=False)
+class Profiler:
+    """
+    Durations of the calls of each stage of the reporter: its hooks and the
+    rendering of the parts of the output.
+
+    Each call only appends its duration to a compact array, the statistics
+    are computed once, at the end.
+    """
+
+    samples: dict[str, array] = attr.Factory(dict)
+
+    def add(self, stage: str, duration: float) -> None:
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples[stage] = array("d")
+        samples.append(duration)
+
+    @contextlib.contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def instrument(self, obj: object, methods: Iterable[str]) -> None:
+        """Replace `methods` of `obj` by timed versions, named after them."""
+        for name in methods:
+            method = getattr(obj, name)
+            setattr(obj, name, self._timed(name, method))
+
+    def _timed(self, stage: str, method):
+        samples = self.samples.setdefault(stage, array("d"))
+        perf_counter = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                samples.append(perf_counter() - start)
+
+        return timed
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return the calls, total, p50 and p99 in seconds of each stage."""
+        result = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            result[stage] = {
+                "calls": len(ordered),
+                "total": sum(ordered),
+                "p50": _percentile(ordered, 50),
+                "p99": _percentile(ordered, 99),
+            }
+        return result
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.stats(), file, indent=2)
+
+
+def generate_profile_table(profiler: Profiler) -> Table:
+    """
+    Render the statistics of a profiler, the most expensive stages first.
+
+    Args:
+        profiler (Profiler): The profiler.
+
+    Returns:
+        Table: The statistics.
+    """
+    table = Table(title="pytest-rich profile", title_justify="left")
+    table.add_column("Stage")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total", justify="right", style="bold")
+    table.add_column("p50", justify="right")
+    table.add_column("p99", justify="right")
+    stats = profiler.stats()
+    for stage in sorted(stats, key=lambda s: stats[s]["total"], reverse=True):
+        stage_stats = stats[stage]
+        table.add_row(
+            stage,
+            str(stage_stats["calls"]),
+            _format_seconds(stage_stats["total"]),
+            _format_seconds(stage_stats["p50"]),
+            _format_seconds(stage_stats["p99"]),
+        )
+    return table
+
+
+def _percentile(ordered: list[float], percent: int) -> float:
+    """Nearest-rank percentile of sorted values."""
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 0.001:
+        return f"{seconds * 1_000_000:.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
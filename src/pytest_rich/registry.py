@@ -0,0 +1,76 @@
+from array import array
+from collections.abc import Iterator
+from pathlib import Path
+
+import attr
+
+
+@attr.s(auto_attribs=True, slots=True)
+class ItemRegistry:
+    """
+    What the reporter knows about each collected item: its node ID, its file
+    and its position in the file, where `FileProgress` keeps its status.
+
+    Items are numbered in collection order and everything else is kept in
+    flat arrays indexed by that number, so the registry holds a few bytes per
+    item besides the node ID itself, instead of the items or a container per
+    item.
+    """
+
+    nodeids: list[str] = attr.Factory(list)
+    indexes: dict[str, int] = attr.Factory(dict)
+    paths: list[Path] = attr.Factory(list)
+    path_indexes: dict[Path, int] = attr.Factory(dict)
+    # Index in `paths` of the file of each item.
+    files: array = attr.Factory(lambda: array("I"))
+    # Position of each item among the items of its file.
+    positions: array = attr.Factory(lambda: array("I"))
+
+    def __len__(self) -> int:
+        return len(self.nodeids)
+
+    def __contains__(self, nodeid: str) -> bool:
+        return nodeid in self.indexes
+
+    def add(self, nodeid: str, path: Path, position: int) -> int:
+        """
+        Register an item.
+
+        Args:
+            nodeid (str): Node ID of the item.
+            path (Path): File of the item.
+            position (int): Position of the item among the items of its file.
+
+        Returns:
+            int: Index of the item.
+        """
+        file_index = self.path_indexes.get(path)
+        if file_index is None:
+            file_index = self.path_indexes[path] = len(self.paths)
+            self.paths.append(path)
+        index = self.indexes[nodeid] = len(self.nodeids)
+        self.nodeids.append(nodeid)
+        self.files.append(file_index)
+        self.positions.append(position)
+        return index
+
+    def slot(self, nodeid: str) -> tuple[Path, int]:
+        """Return the file of an item and its position in that file."""
+        index = self.indexes[nodeid]
+        return self.paths[self.files[index]], self.positions[index]
+
+    def path(self, nodeid: str) -> Path:
+        return self.paths[self.files[self.indexes[nodeid]]]
+
+    def index(self, nodeid: str) -> int:
+        return self.indexes[nodeid]
+
+    def iter_slots(self) -> Iterator[tuple[str, Path, int]]:
+        """Yield the node ID, file and position in the file of every item."""
+        paths = self.paths
+        return zip(self.nodeids, (paths[index] for index in self.files), self.positions)
+
+    def iter_paths(self) -> Iterator[tuple[str, Path]]:
+        """Yield the node ID and file of every item, in order."""
+        paths = self.paths
+        return zip(self.nodeids, (paths[index] for index in self.files))
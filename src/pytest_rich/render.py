@@ -0,0 +1,128 @@
+import functools
+import multiprocessing
+from collections import deque
+from collections.abc import Generator
+from collections.abc import Sequence
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
+
+import pytest
+from _pytest._code.code import ExceptionChainRepr
+from rich.console import Console
+from rich.console import ConsoleOptions
+from rich.segment import Segment
+from rich.segment import Segments
+
+from pytest_rich.traceback import DEFAULT_THEME
+from pytest_rich.traceback import RenderContext
+from pytest_rich.traceback import RichExceptionChainRepr
+
+PoolKind = Literal["process", "thread"]
+
+# Largest number of tracebacks sent to a worker at once. Larger chunks keep
+# the pickling overhead down, smaller ones waste less work when the caller
+# stops early.
+MAX_CHUNKSIZE = 16
+
+
+def render_traceback(
+    nodeid: str, longrepr: ExceptionChainRepr, options: ConsoleOptions
+) -> list[Segment]:
+    """
+    Render the traceback of a failure to segments.
+
+    Styles are resolved against the default theme, the same one used by the
+    reporter's console, so printing the segments there gives the same output
+    as printing the traceback itself.
+
+    Args:
+        nodeid (str): Node ID of the failed test.
+        longrepr (ExceptionChainRepr): Failure representation from the report.
+        options (ConsoleOptions): Options of the console the segments are for.
+
+    Returns:
+        list[Segment]: The rendered traceback.
+    """
+    console = Console(width=options.max_width, legacy_windows=options.legacy_windows)
+    traceback = RichExceptionChainRepr(nodeid, longrepr, context=_render_context())
+    return list(console.render(traceback, options))
+
+
+def render_tracebacks(
+    nodeids: list[str], longreprs: list[ExceptionChainRepr], options: ConsoleOptions
+) -> list[list[Segment]]:
+    """Render a chunk of tracebacks, see `render_traceback`."""
+    return [
+        render_traceback(nodeid, longrepr, options)
+        for nodeid, longrepr in zip(nodeids, longreprs)
+    ]
+
+
+@functools.lru_cache(maxsize=1)
+def _render_context() -> RenderContext:
+    # built once per worker process.
+    return RenderContext.from_theme(DEFAULT_THEME)
+
+
+def prerender_tracebacks(
+    reports: Sequence[pytest.TestReport],
+    options: ConsoleOptions,
+    workers: int,
+    pool: PoolKind,
+) -> Generator[Segments, None, None]:
+    """
+    Render the tracebacks of failed reports on a pool of workers.
+
+    Args:
+        reports (Sequence[TestReport]): Failed reports.
+        options (ConsoleOptions): Options of the console the output is for.
+        workers (int): Number of workers of the pool.
+        pool (str): "process" or "thread".
+
+    Returns:
+        Generator[Segments]: Rendered tracebacks, in the order of `reports`,
+        yielded as soon as they are ready. Closing it cancels the renders
+        not started yet.
+    """
+    executor: Executor
+    if pool == "process":
+        # threads only help if rendering releases the GIL, which it does not.
+        # The workers are spawned rather than forked: the reporter may run
+        # threads of its own, whose locks a fork would copy while held.
+        executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    else:
+        executor = ThreadPoolExecutor(workers)
+    longreprs = []
+    for report in reports:
+        assert isinstance(report.longrepr, ExceptionChainRepr)
+        longreprs.append(report.longrepr)
+    chunksize = max(1, min(MAX_CHUNKSIZE, len(reports) // (workers * 4)))
+    # only a few chunks are submitted ahead of the one being printed, so
+    # little is rendered in vain when the caller stops early, e.g. when out
+    # of --rich-render-budget.
+    ahead = workers * 2
+    pending: deque[Future[list[list[Segment]]]] = deque()
+    try:
+        for start in range(0, len(reports), chunksize):
+            end = start + chunksize
+            pending.append(
+                executor.submit(
+                    render_tracebacks,
+                    [report.nodeid for report in reports[start:end]],
+                    longreprs[start:end],
+                    options,
+                )
+            )
+            if len(pending) >= ahead:
+                for segments in pending.popleft().result():
+                    yield Segments(segments)
+        while pending:
+            for segments in pending.popleft().result():
+                yield Segments(segments)
+    finally:
+        executor.shutdown(cancel_futures=True)
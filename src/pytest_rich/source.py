@@ -0,0 +1,261 @@
+import ast
+import bisect
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Optional
+
+import attr
+
+
+@attr.s(auto_attribs=True, slots=True)
+class FunctionIndex:
+    """
+    Maps the lines of a source file to the qualified name of the innermost
+    function containing them.
+
+    The nested (start, end, name) intervals of the functions are flattened
+    in one pass over the AST into sorted, non-overlapping segments, so a
+    lookup is a single bisection. The same pass records the lines where
+    statements start, which are the points where lexing part of the file
+    can safely begin or end.
+    """
+
+    starts: list[int] = attr.Factory(list)
+    names: list[Optional[str]] = attr.Factory(list)
+    statements: list[int] = attr.Factory(list)
+
+    @classmethod
+    def from_source(cls, source: str) -> "FunctionIndex":
+        index = cls()
+        try:
+            tree = ast.parse(source)
+        except (SyntaxError, ValueError):
+            return index
+        index._visit(tree, prefix="", enclosing=None)
+        return index
+
+    def get_funcname(self, lineno: int) -> Optional[str]:
+        """
+        Return the qualified name of the function containing `lineno`, or
+        None if the line is not inside a function.
+        """
+        position = bisect.bisect_right(self.starts, lineno) - 1
+        return self.names[position] if position >= 0 else None
+
+    def _add_segment(self, start: int, name: Optional[str]) -> None:
+        if self.starts and self.starts[-1] == start:
+            self.names[-1] = name
+        else:
+            self.starts.append(start)
+            self.names.append(name)
+
+    def _visit(self, node: ast.AST, prefix: str, enclosing: Optional[str]) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.stmt) and (
+                not self.statements or child.lineno > self.statements[-1]
+            ):
+                self.statements.append(child.lineno)
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                qualname = prefix + child.name
+                self._add_segment(child.lineno, qualname)
+                self._visit(child, qualname + ".<locals>.", qualname)
+                assert child.end_lineno is not None
+                self._add_segment(child.end_lineno + 1, enclosing)
+            elif isinstance(child, ast.ClassDef):
+                self._visit(child, prefix + child.name + ".", enclosing)
+            else:
+                self._visit(child, prefix, enclosing)
+
+
+@attr.s(auto_attribs=True, slots=True)
+class CachedSource:
+    mtime_ns: int
+    size: int
+    text: str
+    function_index: Optional[FunctionIndex] = None
+    # Offset of the start of each line in `text`.
+    line_offsets: Optional[list[int]] = None
+    snippets: dict[tuple[int, int], "Snippet"] = attr.Factory(dict)
+    # Guards the fields above which are filled on first use, so each is only
+    # computed once when tracebacks are rendered on a pool of threads.
+    lock: threading.Lock = attr.ib(factory=threading.Lock, eq=False, repr=False)
+
+
+@attr.s(auto_attribs=True)
+class SourceCache:
+    """
+    Cache of the source files shown in tracebacks, shared by all renderers
+    for the whole session.
+
+    Entries are validated against the modification time and size of the
+    file on each access, and the least recently used ones are evicted once
+    the cached files add up to more than `max_bytes`.
+    """
+
+    max_bytes: int = 64 * 1024 * 1024
+    total_bytes: int = 0
+    entries: OrderedDict[str, CachedSource] = attr.Factory(OrderedDict)
+    # tracebacks may be rendered on a pool of threads.
+    lock: threading.Lock = attr.Factory(threading.Lock)
+
+    def get(self, filename: str) -> CachedSource:
+        """
+        Get the cache entry of a file, reading it if it is not cached yet or
+        changed on disk.
+
+        Raises:
+            OSError: If the file cannot be read.
+        """
+        with self.lock:
+            return self._get(filename)
+
+    def _get(self, filename: str) -> CachedSource:
+        stat = os.stat(filename)
+        entry = self.entries.get(filename)
+        if entry is not None:
+            if entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self.entries.move_to_end(filename)
+                return entry
+            self._remove(filename)
+        with open(filename, encoding="utf-8", errors="replace") as source_file:
+            text = source_file.read()
+        entry = CachedSource(stat.st_mtime_ns, stat.st_size, text)
+        self.entries[filename] = entry
+        self.total_bytes += entry.size
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            self._remove(next(iter(self.entries)))
+        return entry
+
+    def read(self, filename: str) -> str:
+        """
+        Read a file through the cache.
+
+        Args:
+            filename (str): Filename to read
+
+        Returns:
+            str: Contents of file
+        """
+        return self.get(filename).text
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def _remove(self, filename: str) -> None:
+        entry = self.entries.pop(filename)
+        self.total_bytes -= entry.size
+
+
+source_cache = SourceCache()
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Snippet:
+    """
+    A window of a source file which can be lexed on its own: it starts and
+    ends on statement boundaries, so no string or bracket spans its edges.
+
+    `tokens` caches the token stream of the window, shared by every
+    traceback entry showing it.
+    """
+
+    code: str
+    start_line: int
+    total_lines: int
+    tokens: Optional[list[tuple[Any, str]]] = None
+    # Guards `tokens`, see `CachedSource.lock`.
+    lock: threading.Lock = attr.ib(factory=threading.Lock, eq=False, repr=False)
+
+
+def _get_index(entry: CachedSource) -> FunctionIndex:
+    with entry.lock:
+        if entry.function_index is None:
+            entry.function_index = FunctionIndex.from_source(entry.text)
+        return entry.function_index
+
+
+def get_snippet(filename: str, first_line: int, last_line: int) -> Optional[Snippet]:
+    """
+    Get the smallest window of a file which contains the given lines and can
+    be lexed independently of the rest of the file.
+
+    Args:
+        filename (str): Filename to read
+        first_line (int): First line which will be shown
+        last_line (int): Last line which will be shown
+
+    Returns:
+        Snippet: The window, with the whole file if it cannot be parsed, or
+        None if it cannot be read.
+    """
+    try:
+        entry = source_cache.get(filename)
+    except OSError:
+        return None
+    statements = _get_index(entry).statements
+    with entry.lock:
+        return _get_snippet(entry, statements, first_line, last_line)
+
+
+def _get_snippet(
+    entry: CachedSource, statements: list[int], first_line: int, last_line: int
+) -> Snippet:
+    line_offsets = entry.line_offsets
+    if line_offsets is None:
+        line_offsets = [0]
+        line_offsets.extend(match.end() for match in re.finditer("\n", entry.text))
+        entry.line_offsets = line_offsets
+    total_lines = len(line_offsets)
+
+    position = bisect.bisect_right(statements, first_line) - 1
+    start = statements[position] if position >= 0 else 1
+    position = bisect.bisect_right(statements, last_line)
+    end = statements[position] - 1 if position < len(statements) else total_lines
+
+    snippet = entry.snippets.get((start, end))
+    if snippet is None:
+        end_offset = line_offsets[end] if end < total_lines else len(entry.text)
+        snippet = Snippet(
+            entry.text[line_offsets[start - 1] : end_offset],
+            start_line=start,
+            total_lines=total_lines,
+        )
+        entry.snippets[start, end] = snippet
+    return snippet
+
+
+def get_function_index(filename: str) -> FunctionIndex:
+    """
+    Get the FunctionIndex of a file, built on first use and kept with the
+    file in `source_cache`.
+
+    Args:
+        filename (str): Path of the source file.
+
+    Returns:
+        FunctionIndex: Index of the file, empty if it cannot be read.
+    """
+    try:
+        entry = source_cache.get(filename)
+    except OSError:
+        return FunctionIndex()
+    return _get_index(entry)
+
+
+def get_funcname(lineno: int, filename: str) -> str:
+    """
+    Get the qualified name of the function containing a line of a file.
+
+    Args:
+        lineno (int): Line number to look up
+        filename (str): Filename to read
+
+    Returns:
+        str: Function name, or "???" if the line is not inside a function
+    """
+    funcname = get_function_index(filename).get_funcname(lineno)
+    return "???" if funcname is None else funcname
@@ -1,7 +1,16 @@
+import contextlib
+import datetime
+import io
+import re
+import time
 import warnings
-from collections import defaultdict
+from collections import deque
+from collections.abc import Iterator
 from collections.abc import Sequence
 from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import ContextManager
 from typing import Literal
 from typing import Optional
 from typing import Union
@@ -11,87 +20,483 @@ import pytest
 from _pytest._code.code import ExceptionChainRepr
 from _pytest._code.code import ExceptionRepr
 from rich.console import Console
+from rich.console import ConsoleRenderable
+from rich.console import Group
 from rich.live import Live
 from rich.padding import Padding
 from rich.panel import Panel
 from rich.progress import Progress
+from rich.progress import ProgressColumn
 from rich.progress import SpinnerColumn
+from rich.progress import Task
 from rich.progress import TaskID
 from rich.rule import Rule
+from rich.segment import Segments
 from rich.table import Table
 from rich.text import Text
 
+from pytest_rich.budget import RenderBudget
+from pytest_rich.capture import RecordingHook
+from pytest_rich.capture import StreamingCapture
+from pytest_rich.capture import get_capture_path
 from pytest_rich.capture import save_terminal_output
+from pytest_rich.capture import start_streaming_capture
+from pytest_rich.collection import CollectDurations
+from pytest_rich.collection import CollectTree
+from pytest_rich.collection import generate_collect_durations_table
+from pytest_rich.durations import DurationStats
+from pytest_rich.durations import generate_durations_group
+from pytest_rich.failures import FailureGroup
+from pytest_rich.failures import FailureGroups
+from pytest_rich.failures import FailureStore
+from pytest_rich.header import HeaderInfo
 from pytest_rich.header import generate_header_panel
-from pytest_rich.traceback import RichExceptionChainRepr
+from pytest_rich.history import DurationHistory
+from pytest_rich.profile import PROFILED_METHODS
+from pytest_rich.profile import Profiler
+from pytest_rich.profile import generate_profile_table
+from pytest_rich.registry import ItemRegistry
+from pytest_rich.workers import WorkerLanes
+
+if TYPE_CHECKING:
+    # traceback rendering pulls in Pygments and its lexers, so it is only
+    # imported once the first failure is shown.
+    from pytest_rich.render import PoolKind
+    from pytest_rich.traceback import RenderContext
 
 HORIZONTAL_PAD = (0, 1, 0, 1)
 
+# Refresh rate used under pytest-xdist when `--rich-refresh-hz` is not given:
+# repainting on every event from dozens of workers would make the controller
+# the bottleneck of the run.
+XDIST_REFRESH_HZ = 10.0
+
+# Refresh rate of the collection tree when `--rich-refresh-hz` is not given:
+# it is rebuilt on every repaint.
+COLLECT_TREE_REFRESH_HZ = 4.0
+
+# Compact status codes, in the order of `RichTerminalReporter.Status`.
+STATUS_CODES = {
+    "collected": 0,
+    "running": 1,
+    "success": 2,
+    "fail": 3,
+    "error": 4,
+    "skipped": 5,
+    "xfailed": 6,
+}
+
+# Style and character shown for each status code, `None` meaning no glyph.
+STATUS_GLYPHS: tuple[Optional[tuple[str, str]], ...] = (
+    None,
+    None,
+    ("green", "✔"),
+    ("red", "❌"),
+    ("red", "E"),
+    ("yellow", "s"),
+    ("yellow", "x"),
+)
+
+# Codes of the items whose glyph is not known yet.
+UNFINISHED_CODES = bytes([STATUS_CODES["collected"], STATUS_CODES["running"]])
+
+# Runs of the same status code.
+_CODE_RUN_RE = re.compile(rb"(.)\1*", re.DOTALL)
+
+
+@attr.s(auto_attribs=True, slots=True)
+class FileProgress:
+    """
+    Incremental status bookkeeping for the items of a single file.
+
+    Statuses are stored as compact codes indexed by item position, next to
+    per-status counters and the glyph runs of the leading finished items,
+    which are extended as items finish, so recording a status change does
+    not revisit the whole file.
+    """
+
+    statuses: bytearray = attr.Factory(bytearray)
+    counts: list[int] = attr.Factory(lambda: [0] * len(STATUS_CODES))
+    # Markup of the glyph runs of the leading finished items, but the last.
+    runs: list[str] = attr.Factory(list)
+    # Status code and length of the last run, extended while the code is the
+    # same.
+    last_code: Optional[int] = None
+    last_count: int = 0
+    # Number of leading items whose glyphs are in the runs.
+    rendered: int = 0
+    # Number of items whose test protocol is over.
+    done: int = 0
+    # Expected duration of the items not done yet, from past runs.
+    expected: float = 0.0
+
+    def add_item(self) -> int:
+        self.statuses.append(STATUS_CODES["collected"])
+        self.counts[STATUS_CODES["collected"]] += 1
+        return len(self.statuses) - 1
+
+    def set_status(self, index: int, code: int) -> None:
+        old_code = self.statuses[index]
+        self.counts[old_code] -= 1
+        self.counts[code] += 1
+        self.statuses[index] = code
+        if index < self.rendered:
+            # status of an already rendered item changed: start over.
+            self.runs.clear()
+            self.last_code = None
+            self.last_count = 0
+            self.rendered = 0
+        self._advance()
+
+    @property
+    def completed(self) -> int:
+        """Number of items with a final status."""
+        return (
+            len(self.statuses)
+            - self.counts[STATUS_CODES["collected"]]
+            - self.counts[STATUS_CODES["running"]]
+        )
+
+    def render_glyphs(self) -> str:
+        """
+        Return the glyphs of all items, in item order.
+
+        Items usually finish in order, in which case this is just the runs;
+        items finished out of order are appended after them.
+        """
+        glyphs = "".join(self.runs)
+        if self.last_code is not None:
+            glyphs += _glyph_run(self.last_code, self.last_count)
+        if self.completed == self.rendered:
+            return glyphs
+        # the finished items past the first unfinished one.
+        pending = self.statuses[self.rendered :].translate(None, UNFINISHED_CODES)
+        for match in _CODE_RUN_RE.finditer(pending):
+            glyphs += _glyph_run(match.group()[0], len(match.group()))
+        return glyphs
+
+    def _advance(self) -> None:
+        statuses = self.statuses
+        while self.rendered < len(statuses):
+            code = statuses[self.rendered]
+            if STATUS_GLYPHS[code] is None:
+                # collected or running, its glyph is not known yet.
+                break
+            if code != self.last_code:
+                if self.last_code is not None:
+                    self.runs.append(_glyph_run(self.last_code, self.last_count))
+                self.last_code = code
+                self.last_count = 0
+            self.last_count += 1
+            self.rendered += 1
+
+
+def _glyph_run(code: int, count: int) -> str:
+    style, char = STATUS_GLYPHS[code]  # type: ignore[misc]
+    return f"[{style}]{char * count}[/{style}]"
+
+
+class FieldColumn(ProgressColumn):
+    """Shows a field of the tasks, for the tasks which have it."""
+
+    def __init__(self, name: str, style: str) -> None:
+        super().__init__()
+        self.name = name
+        self.style = style
+
+    def render(self, task: Task) -> Text:
+        return Text(task.fields.get(self.name, ""), style=self.style)
+
 
 @attr.s(auto_attribs=True, hash=True)
 class RichTerminalReporter:
     config: pytest.Config
     console: Console = attr.Factory(Console)
+    # Console of the live displays, Rich's global console by default. A
+    # console of its own writes past pytest's capture, so the displays then
+    # leave `sys.stdout` and `sys.stderr` alone.
+    live_console: Optional[Console] = None
 
-    Status = Literal["collected", "running", "success", "fail", "error"]
+    Status = Literal[
+        "collected", "running", "success", "fail", "error", "skipped", "xfailed"
+    ]
 
     def __attrs_post_init__(self):
         self.collect_progress: Optional[Progress] = None
+        # Only with `--rich-collect-tree`, showing the tree under the progress.
+        self.collect_live: Optional[Live] = None
+        self.collect_tree: Optional[CollectTree] = None
+        if self.config.getoption("rich_collect_tree"):
+            self.collect_tree = CollectTree(self.config.rootpath)
+        self.collect_durations: Optional[CollectDurations] = None
+        if self.collect_durations_count > 0:
+            self.collect_durations = CollectDurations()
         self.runtest_progress: Optional[Progress] = None
+        self.overall_progress: Optional[Progress] = None
+        self.runtest_live: Optional[Live] = None
+        # Set in `pytest_sessionstart`, as pytest-xdist registers its
+        # session after this reporter is created.
+        self.xdist = False
+        self.worker_lanes: Optional[WorkerLanes] = None
+        # Number of items selected to run, and deselected after collection.
         self.total_items_collected = 0
+        self.total_items_deselected = 0
         self.total_items_completed = 0
-        self.items_per_file: dict[Path, list[pytest.Item]] = {}
-        self.status_per_item: dict[str, RichTerminalReporter.Status] = {}
-        self.items: dict[str, pytest.Item] = {}
+        self.items = ItemRegistry()
+        self.progress_per_file: dict[Path, FileProgress] = {}
+        # Tasks of the files currently running; finished files move to
+        # `finished_file_tasks` and are folded into `hidden_finished_files`
+        # once they fall out of the `--rich-finished-window`.
         self.runtest_tasks_per_file: dict[Path, TaskID] = {}
-        self.categorized_reports: dict[str, list[pytest.TestReport]] = defaultdict(list)
+        self.finished_file_tasks: deque[TaskID] = deque()
+        self.hidden_finished_files = 0
+        # Files whose progress changed since the last repaint, with the
+        # nodeid of their most recent test; only used with `refresh_hz`.
+        self.dirty_files: dict[Path, str] = {}
+        self.collect_dirty_nodeid: Optional[str] = None
+        self.next_refresh: float = 0
+        # Number of reports per outcome, in the order the outcomes are first
+        # seen; only the failed call reports themselves are kept.
+        self.outcome_counts: dict[str, int] = {}
+        self.failures = FailureStore(self.config, self.spill_failures)
+        self.failure_groups: Optional[FailureGroups] = None
+        # Shared by the tracebacks of the session, built with the first one.
+        self.render_context: Optional[RenderContext] = None
+        if self.config.getoption("rich_group_failures"):
+            self.failure_groups = FailureGroups()
+        self.render_budget: Optional[RenderBudget] = None
+        budget = self.config.getoption("rich_render_budget")
+        if budget is not None:
+            # validated in pytest_configure.
+            self.render_budget = RenderBudget.parse(budget)
         self.summary: Optional[Live] = None
-        self.total_duration: float = 0
-        self.console.record = self.config.getoption("rich_capture") is not None
+        self.durations = DurationStats()
+        self.history = DurationHistory()
+        # Expected duration of the whole run and of the items not done yet,
+        # from `history`; set when the run starts.
+        self.expected_total: float = 0
+        self.expected_remaining: float = 0
+        self.default_duration: float = 1
+        self.run_start: Optional[float] = None
+        # Set when the session starts, to report its wall-clock time.
+        self.session_start: Optional[float] = None
+        capture = self.config.getoption("rich_capture")
+        # File of --rich-capture, resolved once so the notes pointing to it
+        # name the file it is saved to.
+        self.capture_path: Optional[str] = None
+        if capture is not None:
+            with contextlib.suppress(ValueError):
+                self.capture_path = get_capture_path(capture)
+                capture = self.capture_path
+        self.capture_arg: Optional[str] = capture
+        # Console recording the output for --rich-capture.
+        self.record_console = self.console
+        if capture is not None and self.live_console is self.console:
+            # the live displays draw on the reporter's console too: its prints
+            # are recorded before they add their frames.
+            self.record_console = RecordingHook.start(self.console).recorder
+        self.record_console.record = capture is not None
+        self.streaming_capture: Optional[StreamingCapture] = None
+        if capture is not None and self.config.getoption("rich_capture_stream"):
+            self.streaming_capture = start_streaming_capture(
+                self.record_console, capture, output=self.console
+            )
+        self.profiler: Optional[Profiler] = None
+        if self.config.getoption("rich_profile") is not None:
+            self.profiler = Profiler()
+            self.profiler.instrument(self, PROFILED_METHODS)
+
+    def _profile(self, stage: str) -> ContextManager[None]:
+        """Time a rendering stage with `--rich-profile`."""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.measure(stage)
+
+    def _count_report(self, report: pytest.TestReport) -> None:
+        """
+        Count a report by outcome, like pytest's terminal reporter: setup and
+        teardown reports only count when skipped, or failed as an error.
+        """
+        outcome: str = report.outcome
+        if report.when != "call":
+            if report.passed:
+                return
+            if report.failed:
+                outcome = "error"
+        self.outcome_counts[outcome] = self.outcome_counts.get(outcome, 0) + 1
+
+    def _preserve_report(self, report: pytest.TestReport) -> Optional[FailureGroup]:
+        """Keep a call report if failed, returning its group."""
+        if not report.failed:
+            return None
+        self.failures.add(report)
+        if self.failure_groups is None:
+            return None
+        return self.failure_groups.add(report)
+
+    def _refresh_due(self) -> bool:
+        """
+        Return True if enough time passed since the last repaint, according
+        to `--rich-refresh-hz`.
+        """
+        return time.monotonic() >= self.next_refresh
 
-    def _preserve_report(self, report) -> None:
-        self.categorized_reports[report.outcome].append(report)
-        self.total_duration += report.duration
+    def _schedule_refresh(self, refresh_hz: Optional[float]) -> None:
+        # counting from the end of the repaint keeps the cap meaningful even
+        # when a single repaint takes longer than the refresh interval.
+        assert refresh_hz is not None
+        self.next_refresh = time.monotonic() + 1 / refresh_hz
 
     def pytest_collection(self) -> None:
         self.collect_progress = Progress(
             "[progress.description]{task.description}",
+            auto_refresh=self.collect_refresh_hz is None,
+            **self.live_options,
         )
         self.collect_task = self.collect_progress.add_task("[cyan][bold]Collecting")
-        self.collect_progress.start()
+        if self.collect_tree is None:
+            self.collect_progress.start()
+        else:
+            self.collect_live = Live(
+                Group(self.collect_progress, self.collect_tree),
+                auto_refresh=False,
+                **self.live_options,
+            )
+            self.collect_live.start()
+
+    def pytest_collectstart(self, collector: pytest.Collector) -> None:
+        if self.collect_durations is not None and isinstance(collector, pytest.Module):
+            self.collect_durations.start(collector.nodeid)
+
+    def _register_item(self, nodeid: str, path: Path) -> None:
+        file_progress = self.progress_per_file.get(path)
+        if file_progress is None:
+            file_progress = self.progress_per_file[path] = FileProgress()
+        self.items.add(nodeid, path, file_progress.add_item())
 
     def pytest_collectreport(self, report: pytest.CollectReport) -> None:
+        if self.collect_durations is not None:
+            self.collect_durations.finish(report.nodeid)
         items = [x for x in report.result if isinstance(x, pytest.Item)]
         if items:
-            for item in items:
-                self.items_per_file.setdefault(item.path, []).append(item)
-                self.status_per_item[item.nodeid] = "collected"
-                self.items[item.nodeid] = item
-            self.total_items_collected += len(items)
-            if self.collect_progress is not None:
-                self.collect_progress.update(
-                    self.collect_task,
-                    description=f"[cyan][bold]Collecting[/cyan] [magenta]{report.nodeid}[/magenta] ([green]{self.total_items_collected}[/green] total items)",
-                    refresh=True,
-                )
+            self.add_collected(
+                report.nodeid, [(item.nodeid, item.path) for item in items]
+            )
+
+    def add_collected(
+        self, report_nodeid: str, collected: Sequence[tuple[str, Path]]
+    ) -> None:
+        """
+        Register the items collected by a collector.
+
+        Args:
+            report_nodeid (str): Node ID of the collector.
+            collected (Sequence[tuple[str, Path]]): Node ID and path of the items.
+        """
+        for nodeid, path in collected:
+            self._register_item(nodeid, path)
+        self.total_items_collected += len(collected)
+        if self.collect_tree is not None:
+            self.collect_tree.add(collected)
+        if self.collect_refresh_hz is None:
+            self._update_collect_task(report_nodeid)
+        else:
+            self.collect_dirty_nodeid = report_nodeid
+            if self._refresh_due():
+                self._flush_collect_task()
+
+    def _update_collect_task(self, nodeid: str) -> None:
+        if self.collect_progress is not None:
+            self.collect_progress.update(
+                self.collect_task,
+                description=f"[cyan][bold]Collecting[/cyan] [magenta]{nodeid}[/magenta] ([green]{self.total_items_collected}[/green] total items)",
+                refresh=True,
+            )
+        if self.collect_live is not None:
+            self.collect_live.refresh()
+
+    def _flush_collect_task(self) -> None:
+        if self.collect_dirty_nodeid is not None:
+            self._update_collect_task(self.collect_dirty_nodeid)
+            self.collect_dirty_nodeid = None
+            self._schedule_refresh(self.collect_refresh_hz)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_node_collection_finished(self, node, ids: Sequence[str]) -> None:
+        """
+        Under pytest-xdist the controller does not collect: each worker sends
+        the nodeids it collected, which are the same for all workers.
+        """
+        if not self.items:
+            rootpath = self.config.rootpath
+            for nodeid in ids:
+                self._register_item(nodeid, rootpath / nodeid.split("::")[0])
+            self.total_items_collected = len(ids)
+        if self.collect_progress is not None:
+            self.collect_progress.update(
+                self.collect_task,
+                description=f"[cyan][bold]Collected [green]{self.total_items_collected} [cyan]items on [green]{node.gateway.id}",
+                refresh=True,
+            )
+        if self.collect_live is not None:
+            self.collect_live.refresh()
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodeready(self, node) -> None:
+        if self.worker_lanes is not None:
+            self.worker_lanes.get_lane(node.gateway.id)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error) -> None:
+        if self.worker_lanes is not None and error is not None:
+            self.worker_lanes.worker_down(node.gateway.id)
 
     def pytest_collection_finish(self, session: pytest.Session) -> None:
+        self._stop_collect_progress()
+        if self.collect_durations is not None and self.collect_durations.durations:
+            self.console.print(
+                generate_collect_durations_table(
+                    self.collect_durations, self.collect_durations_count
+                )
+            )
+
+    def _stop_collect_progress(self) -> None:
         if self.collect_progress is not None:
+            self._flush_collect_task()
             self.collect_progress.update(
                 self.collect_task,
-                description=f"[cyan][bold]Collected [green]{self.total_items_collected} [cyan]items",
+                description=self.collected_description,
                 completed=True,
             )
             self.collect_progress.stop()
             self.collect_progress = None
+        if self.collect_live is not None:
+            self.collect_live.stop()
+            self.collect_live = None
 
     def pytest_sessionstart(self, session: pytest.Session) -> None:
-        self.console.print(Rule("pytest session starts", style="default"))
+        self.setup_xdist()
+        self.start_session(None if self.no_header else HeaderInfo.from_session(session))
 
-        if self.no_header is False:
-            header = generate_header_panel(session)
+    def setup_xdist(self) -> None:
+        self.xdist = self.config.pluginmanager.hasplugin("dsession")
+        if self.xdist:
+            # pytest-xdist writes its status lines through the standard
+            # terminal reporter, which would garble the live display.
+            dsession = self.config.pluginmanager.getplugin("dsession")
+            dsession.terminal = None
+            dist_reporter = self.config.pluginmanager.getplugin("terminaldistreporter")
+            if dist_reporter is not None:
+                self.config.pluginmanager.unregister(dist_reporter)
+            self.worker_lanes = WorkerLanes()
 
-            self.console.print(header)
+    def start_session(self, header: Optional[HeaderInfo]) -> None:
+        self.session_start = time.monotonic()
+        self.console.print(Rule("pytest session starts", style="default"))
+
+        if header is not None and self.no_header is False:
+            with self._profile("render header"):
+                self.console.print(generate_header_panel(header))
 
     def pytest_internalerror(self, excrepr: ExceptionRepr) -> None: ...
 
@@ -101,7 +506,27 @@ class RichTerminalReporter:
         nodeid: str,
     ) -> None: ...
 
-    def pytest_deselected(self, items: Sequence[pytest.Item]) -> None: ...
+    def pytest_deselected(self, items: Sequence[pytest.Item]) -> None:
+        self.deselect([item.nodeid for item in items])
+
+    def deselect(self, nodeids: Sequence[str]) -> None:
+        """
+        Forget items deselected after collection, e.g. by `-k`, `-m` or
+        `--lf`, so they do not count towards the progress of the run.
+
+        Args:
+            nodeids (Sequence[str]): Node IDs of the deselected items.
+        """
+        deselected = set(nodeids)
+        registry = self.items
+        # the registry and the files only grow, so they are built again.
+        self.items = ItemRegistry()
+        self.progress_per_file = {}
+        for nodeid, path in registry.iter_paths():
+            if nodeid not in deselected:
+                self._register_item(nodeid, path)
+        self.total_items_deselected += self.total_items_collected - len(self.items)
+        self.total_items_collected = len(self.items)
 
     def pytest_plugin_registered(self, plugin) -> None: ...
 
@@ -109,116 +534,497 @@ class RichTerminalReporter:
         self, nodeid: str, location: tuple[str, Optional[int], str]
     ) -> None:
         if self.runtest_progress is None:
-            self.runtest_progress = Progress(SpinnerColumn(), "{task.description}")
-            self.runtest_progress.start()
-
-            for fn in self.items_per_file:
-                total_items = self.items_per_file[fn]
-                task = self.runtest_progress.add_task(
-                    str(fn.relative_to(self.config.rootpath)),
-                    total=len(total_items),
-                    visible=False,
-                )
-                self.runtest_tasks_per_file[fn] = task
-            self.overall_progress_task = self.runtest_progress.add_task(
-                "Progress", total=self.total_items_collected
+            # under pytest-xdist collection is never reported as finished.
+            self._stop_collect_progress()
+            self._start_runtest_display()
+        assert self.runtest_progress is not None
+
+        path = self.items.path(nodeid)
+        if path not in self.runtest_tasks_per_file:
+            # tasks are only created for files that start running, so the
+            # display does not track every collected file upfront.
+            self.runtest_tasks_per_file[path] = self.runtest_progress.add_task(
+                "", total=len(self.progress_per_file[path].statuses)
             )
 
         self._update_task(nodeid)
 
-    def _get_status_char(self, status: Status) -> str:
-        # ["collected", "running", "success", "fail", "error"]
-        if status == "collected":
-            return ""
-        elif status == "running":
-            return ""
-        elif status == "success":
-            return "[green]✔[/green]"
-        elif status == "fail":
-            return "[red]❌[/red]"
-        elif status == "error":
-            return "[red]E[/red]"
+    def _start_runtest_display(self) -> None:
+        self._start_estimates()
+        self.runtest_progress = Progress(
+            SpinnerColumn(),
+            "{task.description}",
+            FieldColumn("eta", "progress.remaining"),
+        )
+        self.overall_progress = Progress(
+            SpinnerColumn(),
+            "{task.description}",
+            FieldColumn("speed", "progress.data.speed"),
+            FieldColumn("eta", "progress.remaining"),
+        )
+        self.finished_files_task = self.overall_progress.add_task("", visible=False)
+        self.overall_progress_task = self.overall_progress.add_task(
+            "Progress", total=self.total_items_collected
+        )
+        renderables: list[Union[Progress, WorkerLanes]] = [self.runtest_progress]
+        if self.worker_lanes is not None:
+            renderables.append(self.worker_lanes)
+        renderables.append(self.overall_progress)
+        self.runtest_live = Live(
+            Group(*renderables),
+            auto_refresh=self.refresh_hz is None,
+            refresh_per_second=10,
+            **self.live_options,
+        )
+        self.runtest_live.start()
+
+    def _start_estimates(self) -> None:
+        """
+        Estimate the duration of the run from the history of past runs.
+
+        Items without history are assumed to take the average duration of
+        those with one, or one "unit" if there is no history at all: the
+        estimates are scaled by how long the finished items actually took,
+        which also accounts for running in parallel. Only the items selected
+        to run count, as the deselected ones are already out of the registry.
+        """
+        self.run_start = time.monotonic()
+        self.history = DurationHistory.load(self.config)
+        durations = self.history.durations
+        nodeids = self.items.nodeids
+        known = [durations[nodeid] for nodeid in nodeids if nodeid in durations]
+        if known:
+            self.default_duration = sum(known) / len(known)
+        self.expected_total = 0
+        default = self.default_duration
+        for nodeid, path in self.items.iter_paths():
+            expected = durations.get(nodeid, default)
+            self.progress_per_file[path].expected += expected
+            self.expected_total += expected
+        self.expected_remaining = self.expected_total
+
+    def _estimate_remaining(self, expected: float) -> Optional[float]:
+        """
+        Return how long the items expected to take `expected` seconds will
+        actually take, judging from the items already done.
+        """
+        expected_done = self.expected_total - self.expected_remaining
+        if self.run_start is None or expected_done <= 0:
+            return None
+        elapsed = time.monotonic() - self.run_start
+        return expected * elapsed / expected_done
+
+    def _update_task(self, nodeid: str) -> None:
+        if self.refresh_hz is None:
+            self._update_file_task(nodeid, refresh=True)
         else:
-            assert 0
+            self.dirty_files[self.items.path(nodeid)] = nodeid
+            if self._refresh_due():
+                self._flush_runtest_tasks()
+
+    def _flush_runtest_tasks(self) -> None:
+        """Apply the pending progress updates and repaint the display once."""
+        for nodeid in self.dirty_files.values():
+            self._update_file_task(nodeid, refresh=False)
+        self.dirty_files.clear()
+        self._update_overall_task()
+        if self.runtest_live is not None:
+            self.runtest_live.refresh()
+        self._schedule_refresh(self.refresh_hz)
 
-    def _update_task(self, nodeid: str):
+    def _update_file_task(self, nodeid: str, refresh: bool) -> None:
+        path = self.items.path(nodeid)
+        task = self.runtest_tasks_per_file.get(path)
+        if task is None:
+            return
+        file_progress = self.progress_per_file[path]
+        total = len(file_progress.statuses)
+        completed_count = file_progress.completed
+        completed = completed_count == total
+        percent = completed_count * 100 // total
         base_fn = nodeid.split("::")[0]
-        fn = self.config.rootpath / base_fn
-        task = self.runtest_tasks_per_file[fn]
-        current_item = self.items[nodeid]
-        items = self.items_per_file[current_item.path]
-        chars = []
-        statuses = []
-        for item in items:
-            status = self.status_per_item[item.nodeid]
-            statuses.append(status)
-            chars.append(self._get_status_char(status))
-        completed_count = [x for x in statuses if x in ("success", "fail")]
-        completed = len(completed_count) == len(items)
-        percent = len(completed_count) * 100 // len(items)
-        description = f"[cyan][{percent:3d}%] [/cyan]{base_fn} " + "".join(chars)
+        description = (
+            f"[cyan][{percent:3d}%] [/cyan]{base_fn} " + file_progress.render_glyphs()
+        )
+        remaining = self._estimate_remaining(file_progress.expected)
         if self.runtest_progress is not None:
             self.runtest_progress.update(
                 task,
                 description=description,
-                refresh=True,
                 completed=completed,
-                visible=True,
+                eta=(
+                    f"~{_format_eta(remaining)} left"
+                    if remaining is not None and not completed
+                    else ""
+                ),
             )
+        if refresh and self.runtest_live is not None:
+            self.runtest_live.refresh()
+
+    def _set_status(self, nodeid: str, status: Status) -> None:
+        path, index = self.items.slot(nodeid)
+        self.progress_per_file[path].set_status(index, STATUS_CODES[status])
+
+    def _with_status(self, code: int) -> Iterator[str]:
+        """Yield the node IDs of the items with a status code, in order."""
+        progress_per_file = self.progress_per_file
+        for nodeid, path, position in self.items.iter_slots():
+            if progress_per_file[path].statuses[position] == code:
+                yield nodeid
 
     def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
         status: Optional[RichTerminalReporter.Status] = None
+        self.durations.add(
+            self.items.index(report.nodeid), report.when, report.duration
+        )
+        self._count_report(report)
         if report.when == "setup":
-            status = "running"
+            # items skipped or erroring in setup have no call report.
+            if report.passed:
+                status = "running"
+            elif report.skipped:
+                status = _skipped_status(report)
+            else:
+                status = "error"
         elif report.when == "call":
-            status = "success" if report.outcome == "passed" else "fail"
-            self._preserve_report(report)
+            if report.passed:
+                status = "success"
+            elif report.skipped:
+                status = _skipped_status(report)
+            else:
+                status = "fail"
+            group = self._preserve_report(report)
+            if report.failed and self.stream_failures:
+                self._print_failure(report, group)
+        if self.worker_lanes is not None:
+            self._update_worker_lane(report)
         if status is not None:
-            self.status_per_item[report.nodeid] = status
+            self._set_status(report.nodeid, status)
             self._update_task(report.nodeid)
 
-    def pytest_runtest_logfinish(self) -> None:
+    def _print_failure(
+        self, report: pytest.TestReport, group: Optional[FailureGroup]
+    ) -> None:
+        if self.no_summary:
+            return
+        if self.outcome_counts["failed"] == 1:
+            self._print_above_live(Rule("FAILURES\n", style="bold red"))
+        if group is not None and group.report is not report:
+            self._print_above_live(
+                Text.assemble(
+                    ("FAILED ", "red"),
+                    report.nodeid,
+                    (f" same failure as {group.report.nodeid}", "dim"),
+                )
+            )
+            return
+        with self._profile("render traceback"):
+            self._print_above_live(self._rich_traceback(report))
+
+    def _print_above_live(self, renderable: ConsoleRenderable) -> None:
+        """
+        Print while the progress is live, through the console of the live
+        display, which moves the progress below what is printed.
+
+        The redirection of `sys.stdout` by the live display does not help:
+        pytest's capture puts back the original `sys.stdout` whenever it is
+        suspended, so the reporter's console writes straight to the terminal,
+        over the progress.
+        """
+        live = self.runtest_live
+        if live is None or live.console is self.console:
+            self.console.print(renderable)
+            return
+        if self.console.record:
+            # recorded for --rich-capture, but only shown once.
+            file = self.console.file
+            self.console.file = io.StringIO()
+            try:
+                self.console.print(renderable)
+            finally:
+                self.console.file = file
+        live.console.print(renderable)
+
+    def _update_worker_lane(self, report: pytest.TestReport) -> None:
+        assert self.worker_lanes is not None
+        node = getattr(report, "node", None)
+        if node is None:
+            return
+        worker_id = node.gateway.id
+        if report.when == "setup":
+            self.worker_lanes.start_test(worker_id, report.nodeid)
+        elif report.when == "call":
+            if report.failed:
+                self.worker_lanes.record_failure(worker_id)
+        else:
+            # teardown, or the report of an item which crashed its worker.
+            self.worker_lanes.finish_test(worker_id)
+
+    def pytest_runtest_logfinish(self, nodeid: str) -> None:
         self.total_items_completed += 1
-        percent = (self.total_items_completed * 100) // self.total_items_collected
-        if self.runtest_progress is not None:
-            self.runtest_progress.update(
+        path, index = self.items.slot(nodeid)
+        file_progress = self.progress_per_file[path]
+        if file_progress.statuses[index] < STATUS_CODES["success"]:
+            # no call report, e.g. with --setup-only: the setup passed.
+            self._set_status(nodeid, "success")
+            self._update_task(nodeid)
+        file_progress.done += 1
+        expected = self.history.durations.get(nodeid, self.default_duration)
+        file_progress.expected -= expected
+        self.expected_remaining -= expected
+        if file_progress.done == len(file_progress.statuses):
+            self._finish_file(path, nodeid)
+        if self.refresh_hz is None:
+            self._update_overall_task()
+
+    def _finish_file(self, path: Path, nodeid: str) -> None:
+        """
+        Move the task of a file that finished running to the window of
+        recently finished files, folding the oldest one into a counter.
+        """
+        if self.dirty_files.pop(path, None) is not None:
+            self._update_file_task(nodeid, refresh=False)
+        task = self.runtest_tasks_per_file.pop(path, None)
+        if task is None or self.runtest_progress is None:
+            return
+        self.finished_file_tasks.append(task)
+        if len(self.finished_file_tasks) > self.finished_window:
+            self.runtest_progress.remove_task(self.finished_file_tasks.popleft())
+            self.hidden_finished_files += 1
+            if self.overall_progress is not None:
+                self.overall_progress.update(
+                    self.finished_files_task,
+                    description=f"[green]{self.hidden_finished_files}[/green] more files finished",
+                    visible=True,
+                )
+
+    def _update_overall_task(self) -> None:
+        percent = (self.total_items_completed * 100) // max(
+            self.total_items_collected, 1
+        )
+        if self.overall_progress is not None:
+            speed = ""
+            if self.run_start is not None:
+                elapsed = time.monotonic() - self.run_start
+                if elapsed > 0:
+                    speed = f"{self.total_items_completed / elapsed:.1f} tests/s"
+            remaining = self._estimate_remaining(self.expected_remaining)
+            self.overall_progress.update(
                 self.overall_progress_task,
                 description=f"Percent: [green]{percent}%[/green]",
+                speed=speed,
+                eta=f"ETA {_format_eta(remaining)}" if remaining is not None else "",
             )
 
     def pytest_sessionfinish(
         self, session: pytest.Session, exitstatus: Union[int, pytest.ExitCode]
     ):
-        if self.runtest_progress is not None:
-            self.runtest_progress.stop()
+        if self.runtest_live is not None:
+            if self.refresh_hz is not None:
+                self._flush_runtest_tasks()
+            self.runtest_live.stop()
+            self.runtest_live = None
             self.runtest_progress = None
+            self.overall_progress = None
             self.runtest_tasks_per_file.clear()
+            self.finished_file_tasks.clear()
 
         if self.no_summary is False:
+            failed = self.failures
+            # streamed failures were shown as they were reported.
+            if failed and not self.stream_failures:
+                self._print_failures()
             error_messages = {}
-            for index, report in enumerate(self.categorized_reports["failed"]):
-                if index == 0:
-                    self.console.print(Rule("FAILURES\n", style="bold red"))
-                nodeid = report.nodeid
-                assert isinstance(report.longrepr, ExceptionChainRepr)
-                tb = RichExceptionChainRepr(nodeid, report.longrepr)
-                error_messages[nodeid] = tb.error_messages
-                self.console.print(tb)
+            if self.failure_groups is not None:
+                # the same for the whole group, without reading every report.
+                for group in self.failure_groups:
+                    messages = _error_messages(group.report)
+                    error_messages[group.report.nodeid] = messages
+                    for nodeid in group.nodeids:
+                        error_messages[nodeid] = messages
+            else:
+                for report in failed:
+                    error_messages[report.nodeid] = _error_messages(report)
+
+            if self.durations_count > 0:
+                with self._profile("render durations"):
+                    self.console.print(
+                        generate_durations_group(
+                            self.durations,
+                            self.items.nodeids,
+                            self.durations_count,
+                            self.wall_time,
+                        )
+                    )
 
             if self.verbosity_level >= 0:
-                self.print_summary(error_messages)
+                with self._profile("render summary"):
+                    self.print_summary(error_messages)
 
         status = "SUCCEEDED" if exitstatus == 0 else "FAILED"
+        wall_time = self.wall_time
+        if wall_time is None:
+            wall_time = self.durations.total
 
         self.console.print(
             Rule(
-                title=f"{status} in {self.total_duration:.2f} seconds",
+                title=f"{status} in {wall_time:.2f} seconds",
                 style="green" if status == "SUCCEEDED" else "red",
             )
         )
 
-        if self.console.record is True:
-            save_terminal_output(self.console, self.config.getoption("rich_capture"))
+        with self._profile("save capture"):
+            if self.streaming_capture is not None:
+                self.streaming_capture.close()
+            elif self.record_console.record is True:
+                assert self.capture_arg is not None
+                save_terminal_output(
+                    self.record_console, self.capture_arg, output=self.console
+                )
+
+        if self.durations:
+            self.history.update(self.durations, self.items.nodeids)
+            self.history.save()
+        self.failures.close()
+
+    def _print_failures(self) -> None:
+        """
+        Print the FAILURES section, stepping down to cheaper forms of the
+        tracebacks as the `--rich-render-budget` runs out.
+        """
+        self.console.print(Rule("FAILURES\n", style="bold red"))
+        budget = self.render_budget
+        if budget is not None:
+            budget.begin()
+        renderables: Iterator[tuple[Optional[pytest.TestReport], ConsoleRenderable]]
+        if self.failure_groups is not None:
+            renderables = self._render_failure_groups(self.failure_groups)
+        else:
+            renderables = self._render_failures(self.failures)
+        for report, renderable in renderables:
+            with self._profile("render traceback"):
+                if budget is None or report is None:
+                    self.console.print(renderable)
+                else:
+                    self._print_failure_in_budget(report, renderable, budget)
+        if budget is not None and budget.degraded:
+            self._print_budget_note(budget)
+
+    def _print_failure_in_budget(
+        self,
+        report: pytest.TestReport,
+        renderable: ConsoleRenderable,
+        budget: RenderBudget,
+    ) -> None:
+        tier = budget.next_tier()
+        if tier == "full":
+            # rendered first, to count its size.
+            segments = list(self.console.render(renderable, self.console.options))
+            budget.output += sum(len(segment.text) for segment in segments)
+            self.console.print(Segments(segments))
+        elif tier == "plain":
+            budget.output += len(report.longreprtext)
+            self.console.print(_plain_traceback(report))
+        else:
+            line = Text.assemble(
+                ("FAILED ", "red"), report.nodeid, ": ", _crash_message(report)
+            )
+            budget.output += len(line)
+            self.console.print(line)
+
+    def _print_budget_note(self, budget: RenderBudget) -> None:
+        counts = budget.counts
+        shown = [f"{counts['full']} shown in full"]
+        if counts["plain"]:
+            shown.append(f"{counts['plain']} as plain tracebacks")
+        if counts["line"]:
+            shown.append(f"{counts['line']} as a single line")
+        where = []
+        if self.capture_path is not None:
+            where.append(f"see {self.capture_path}")
+        record_events = self.config.getoption("rich_record_events")
+        if record_events is not None:
+            where.append(f"replay {record_events} with --rich-replay")
+        xmlpath = getattr(self.config.option, "xmlpath", None)
+        if xmlpath:
+            where.append(f"see {xmlpath}")
+        where.append("rerun the failed tests with --lf")
+        self.console.print(
+            Text(
+                f"Out of --rich-render-budget={budget}: of the failures, "
+                f"{', '.join(shown[:-1])} and {shown[-1]}. "
+                f"For their full tracebacks, {', or '.join(where)}.",
+                style="yellow",
+            )
+        )
+
+    def _render_failure_groups(
+        self, groups: FailureGroups
+    ) -> Iterator[tuple[Optional[pytest.TestReport], ConsoleRenderable]]:
+        """
+        Render the full traceback of the first failure of each group, followed
+        by the node IDs of the other failures of the group.
+        """
+        heads = [group.report for group in groups]
+        for group, (report, renderable) in zip(groups, self._render_failures(heads)):
+            yield report, renderable
+            if group.nodeids:
+                yield None, Text.assemble(
+                    (f"Same failure in {len(group.nodeids)} more tests:", "bold red"),
+                    *(f"\n  {nodeid}" for nodeid in group.nodeids),
+                    "\n",
+                )
+
+    def _rich_traceback(self, report: pytest.TestReport) -> ConsoleRenderable:
+        from pytest_rich.traceback import DEFAULT_THEME
+        from pytest_rich.traceback import RenderContext
+        from pytest_rich.traceback import RichExceptionChainRepr
+
+        if not isinstance(report.longrepr, ExceptionChainRepr):
+            # e.g. the message of a strict xfail which passed.
+            return _plain_traceback(report)
+        if self.render_context is None:
+            self.render_context = RenderContext.from_theme(DEFAULT_THEME)
+        return RichExceptionChainRepr(
+            report.nodeid, report.longrepr, context=self.render_context
+        )
+
+    def _render_failures(
+        self, reports: Union[FailureStore, list[pytest.TestReport]]
+    ) -> Iterator[tuple[pytest.TestReport, ConsoleRenderable]]:
+        """Yield each report with the rendering of its traceback."""
+        if self.render_workers > 0 and len(reports) > 1:
+            from pytest_rich.render import prerender_tracebacks
+
+            # the pool needs all the reports at once, spilled ones included.
+            reports = list(reports)
+            rendered = prerender_tracebacks(
+                [
+                    report
+                    for report in reports
+                    if isinstance(report.longrepr, ExceptionChainRepr)
+                ],
+                self.console.options,
+                self.render_workers,
+                self.render_pool,
+            )
+            budget = self.render_budget
+            pooled = True
+            try:
+                for report in reports:
+                    if pooled and budget is not None and budget.full_spent:
+                        # the rest are not shown in full, stop rendering them.
+                        pooled = False
+                        rendered.close()
+                    if pooled and isinstance(report.longrepr, ExceptionChainRepr):
+                        yield report, next(rendered)
+                    else:
+                        yield report, self._rich_traceback(report)
+            finally:
+                rendered.close()
+            return
+        for report in reports:
+            yield report, self._rich_traceback(report)
 
     def print_summary(self, error_messages):
         summary_table = Table.grid()
@@ -243,9 +1049,9 @@ class RichTerminalReporter:
             "passed": "bold green",
             "failed": "bold red",
             "skipped": "bold yellow",
+            "error": "bold red",
         }
-        for state, reports in self.categorized_reports.items():
-            no_of_items = len(reports)
+        for state, no_of_items in self.outcome_counts.items():
             if no_of_items > 0:
                 summary_table.add_row(
                     Padding(
@@ -265,11 +1071,8 @@ class RichTerminalReporter:
                 )
 
         if self.verbose is True:
-            for nodeid, status in self.status_per_item.items():
-                if status == "success":
-                    self.console.print(
-                        Text("SUCCESS ", style="green"), Text(f"{nodeid}")
-                    )
+            for nodeid in self._with_status(STATUS_CODES["success"]):
+                self.console.print(Text("SUCCESS ", style="green"), Text(f"{nodeid}"))
 
         for nodeid, errors in error_messages.items():
             self.console.print(
@@ -291,7 +1094,83 @@ class RichTerminalReporter:
         self, excinfo: pytest.ExceptionInfo[BaseException]
     ) -> None: ...
 
-    def pytest_unconfigure(self) -> None: ...
+    def pytest_unconfigure(self) -> None:
+        if self.profiler is None:
+            return
+        # after pytest_sessionfinish, so its own time is included.
+        self.console.print(generate_profile_table(self.profiler))
+        path = self.config.getoption("rich_profile")
+        if path:
+            self.profiler.dump(path)
+
+    @property
+    def refresh_hz(self) -> Optional[float]:
+        refresh_hz = self.config.getoption("rich_refresh_hz")
+        if refresh_hz is None and self.xdist:
+            return XDIST_REFRESH_HZ
+        return refresh_hz
+
+    @property
+    def live_options(self) -> dict[str, Any]:
+        if self.live_console is None:
+            return {}
+        return {
+            "console": self.live_console,
+            "redirect_stdout": False,
+            "redirect_stderr": False,
+        }
+
+    @property
+    def collect_refresh_hz(self) -> Optional[float]:
+        refresh_hz = self.refresh_hz
+        if refresh_hz is None and self.collect_tree is not None:
+            return COLLECT_TREE_REFRESH_HZ
+        return refresh_hz
+
+    @property
+    def collected_description(self) -> str:
+        collected = self.total_items_collected + self.total_items_deselected
+        description = f"[cyan][bold]Collected [green]{collected} [cyan]items"
+        if self.total_items_deselected:
+            description += f", [yellow]{self.total_items_deselected} [cyan]deselected"
+        return description
+
+    @property
+    def collect_durations_count(self) -> int:
+        return self.config.getoption("rich_collect_durations")
+
+    @property
+    def finished_window(self) -> int:
+        return self.config.getoption("rich_finished_window")
+
+    @property
+    def stream_failures(self) -> bool:
+        return self.config.getoption("rich_stream_failures")
+
+    @property
+    def render_workers(self) -> int:
+        return self.config.getoption("rich_render_workers")
+
+    @property
+    def render_pool(self) -> "PoolKind":
+        return self.config.getoption("rich_render_pool")
+
+    @property
+    def wall_time(self) -> Optional[float]:
+        if self.session_start is None:
+            return None
+        return time.monotonic() - self.session_start
+
+    @property
+    def spill_failures(self) -> Optional[int]:
+        megabytes = self.config.getoption("rich_spill_failures")
+        if megabytes is None:
+            return None
+        return int(megabytes * 1_000_000)
+
+    @property
+    def durations_count(self) -> int:
+        return self.config.getoption("rich_durations")
 
     @property
     def verbose(self) -> bool:
@@ -308,3 +1187,34 @@ class RichTerminalReporter:
     @property
     def no_summary(self) -> bool:
         return self.config.getoption("no_summary")
+
+
+def _format_eta(seconds: float) -> str:
+    return str(datetime.timedelta(seconds=round(seconds)))
+
+
+def _skipped_status(report: pytest.TestReport) -> RichTerminalReporter.Status:
+    # pytest reports expected failures as skipped, with the reason attached.
+    return "xfailed" if hasattr(report, "wasxfail") else "skipped"
+
+
+def _error_messages(report: pytest.TestReport) -> list[str]:
+    longrepr = report.longrepr
+    if not isinstance(longrepr, ExceptionChainRepr):
+        return [_crash_message(report)]
+    from pytest_rich.traceback import get_error_messages
+
+    return get_error_messages(longrepr)
+
+
+def _plain_traceback(report: pytest.TestReport) -> Group:
+    return Group(Rule(Text(report.nodeid), style="red"), Text(report.longreprtext))
+
+
+def _crash_message(report: pytest.TestReport) -> str:
+    longrepr = report.longrepr
+    if isinstance(longrepr, ExceptionChainRepr) and longrepr.reprcrash is not None:
+        message = longrepr.reprcrash.message
+    else:
+        message = str(longrepr)
+    return message.strip().partition("\n")[0]
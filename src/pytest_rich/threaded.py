@@ -0,0 +1,204 @@
+import os
+import queue
+import sys
+import threading
+from collections.abc import Callable
+from collections.abc import Sequence
+from typing import IO
+from typing import Any
+from typing import Optional
+from typing import Union
+
+import attr
+import pytest
+from rich.console import Console
+
+from pytest_rich.header import HeaderInfo
+from pytest_rich.terminal import RichTerminalReporter
+
+# Refresh rate of the progress displays on the renderer thread, when
+# `--rich-refresh-hz` is not given: repainting on every event would only make
+# the renderer fall behind the tests.
+RENDER_THREAD_REFRESH_HZ = 10.0
+
+Event = tuple[Callable[..., Any], tuple[Any, ...]]
+
+
+@attr.s(auto_attribs=True, eq=False)
+class ThreadedReporter:
+    """
+    Runs a reporter on a dedicated renderer thread.
+
+    The hooks only put an event on a queue: the reporter method to call and
+    its arguments, extracted from the hook arguments on the calling thread
+    where they could change. The renderer thread owns the reporter, with its
+    console and live displays, and applies the events in batches, so a slow
+    terminal does not hold up the tests.
+
+    The queue is drained before `pytest_sessionfinish`,
+    `pytest_keyboard_interrupt` and `pytest_unconfigure` return, so the
+    output is complete and nothing else is written in between.
+    """
+
+    reporter: RichTerminalReporter
+    # Closed with the renderer thread.
+    terminal: Optional[IO[str]] = None
+    queue: "queue.SimpleQueue[Optional[Event]]" = attr.Factory(queue.SimpleQueue)
+    thread: Optional[threading.Thread] = None
+    # Raised by the reporter on the renderer thread, re-raised by the next hook.
+    error: Optional[BaseException] = None
+
+    def __attrs_post_init__(self) -> None:
+        config = self.reporter.config
+        if config.getoption("rich_refresh_hz") is None:
+            config.option.rich_refresh_hz = RENDER_THREAD_REFRESH_HZ
+
+    @classmethod
+    def for_terminal(cls, config: pytest.Config) -> "ThreadedReporter":
+        """
+        Create a reporter writing to a duplicate of the standard output
+        descriptor: pytest captures the output of the tests by redirecting
+        it, which happens at any point of the renderer thread's work.
+
+        Args:
+            config (pytest.Config): Configuration of the session.
+
+        Returns:
+            ThreadedReporter: The reporter, not started.
+        """
+        encoding = sys.stdout.encoding or "utf-8"
+        terminal = open(
+            os.dup(sys.stdout.fileno()), "w", encoding=encoding, errors="replace"
+        )
+        # one console, so what the reporter prints goes through the render
+        # hooks of the live displays, which keep the progress below it.
+        console = Console(file=terminal)
+        reporter = RichTerminalReporter(config, console=console, live_console=console)
+        return cls(reporter, terminal)
+
+    def start(self) -> None:
+        self.thread = threading.Thread(
+            target=self._run, name="pytest-rich-renderer", daemon=True
+        )
+        self.thread.start()
+
+    def flush(self) -> None:
+        """Wait until the renderer thread applied every event posted so far."""
+        done = threading.Event()
+        self._post(done.set)
+        while self.thread is not None and self.thread.is_alive():
+            if done.wait(0.1):
+                break
+        self._raise_error()
+
+    def close(self) -> None:
+        """Apply the pending events and stop the renderer thread."""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        if self.terminal is not None:
+            self.terminal.close()
+        self._raise_error()
+
+    def _post(self, method: Callable[..., Any], *args: Any) -> None:
+        self._raise_error()
+        if self.thread is not None:
+            self.queue.put((method, args))
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            # the renderer thread stopped, later events are dropped.
+            self.thread = None
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            events = [self.queue.get()]
+            while True:
+                try:
+                    events.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for event in events:
+                if event is None:
+                    return
+                method, args = event
+                try:
+                    method(*args)
+                except BaseException as e:
+                    # the events after it would find the reporter in an
+                    # inconsistent state.
+                    self.error = e
+                    return
+
+    def pytest_sessionstart(self, session: pytest.Session) -> None:
+        # registers and unregisters plugins, which only the main thread may do.
+        self.reporter.setup_xdist()
+        header = None if self.reporter.no_header else HeaderInfo.from_session(session)
+        self._post(self.reporter.start_session, header)
+
+    def pytest_collection(self) -> None:
+        self._post(self.reporter.pytest_collection)
+
+    def pytest_collectstart(self, collector: pytest.Collector) -> None:
+        # only takes the time, which must be taken now.
+        self.reporter.pytest_collectstart(collector)
+
+    def pytest_collectreport(self, report: pytest.CollectReport) -> None:
+        if self.reporter.collect_durations is not None:
+            self.reporter.collect_durations.finish(report.nodeid)
+        collected = [
+            (item.nodeid, item.path)
+            for item in report.result
+            if isinstance(item, pytest.Item)
+        ]
+        if collected:
+            self._post(self.reporter.add_collected, report.nodeid, collected)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_node_collection_finished(self, node, ids: Sequence[str]) -> None:
+        self._post(self.reporter.pytest_xdist_node_collection_finished, node, list(ids))
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodeready(self, node) -> None:
+        self._post(self.reporter.pytest_testnodeready, node)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error) -> None:
+        self._post(self.reporter.pytest_testnodedown, node, error)
+
+    def pytest_deselected(self, items: Sequence[pytest.Item]) -> None:
+        self._post(self.reporter.deselect, [item.nodeid for item in items])
+
+    def pytest_collection_finish(self, session: pytest.Session) -> None:
+        self._post(self.reporter.pytest_collection_finish, session)
+
+    def pytest_runtest_logstart(
+        self, nodeid: str, location: tuple[str, Optional[int], str]
+    ) -> None:
+        self._post(self.reporter.pytest_runtest_logstart, nodeid, location)
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        self._post(self.reporter.pytest_runtest_logreport, report)
+
+    def pytest_runtest_logfinish(self, nodeid: str) -> None:
+        self._post(self.reporter.pytest_runtest_logfinish, nodeid)
+
+    def pytest_sessionfinish(
+        self, session: pytest.Session, exitstatus: Union[int, pytest.ExitCode]
+    ) -> None:
+        self._post(self.reporter.pytest_sessionfinish, session, exitstatus)
+        self.flush()
+
+    def pytest_keyboard_interrupt(
+        self, excinfo: pytest.ExceptionInfo[BaseException]
+    ) -> None:
+        # pytest prints the interruption right after.
+        self.flush()
+
+    def pytest_unconfigure(self) -> None:
+        self._post(self.reporter.pytest_unconfigure)
+        self.close()
@@ -1,12 +1,13 @@
-import ast
 from collections.abc import Sequence
 from typing import Optional
+from typing import Union
 
 import attr
 from _pytest._code.code import ExceptionChainRepr
 from _pytest._code.code import ReprEntry
 from _pytest._code.code import ReprFileLocation
 from _pytest._code.code import ReprFuncArgs
+from pygments.lexer import Lexer
 from pygments.token import Comment
 from pygments.token import Keyword
 from pygments.token import Name
@@ -25,37 +26,117 @@ from rich.highlighter import ReprHighlighter
 from rich.panel import Panel
 from rich.rule import Rule
 from rich.style import Style
+from rich.syntax import NUMBERS_COLUMN_DEFAULT_PADDING
 from rich.syntax import Syntax
 from rich.syntax import SyntaxTheme
 from rich.text import Text
 from rich.theme import Theme
 from rich.traceback import PathHighlighter
 
+from pytest_rich.source import Snippet
+from pytest_rich.source import get_funcname
+from pytest_rich.source import get_snippet
 
-@attr.s(auto_attribs=True)
-class RichExceptionChainRepr:
+# Syntax theme of the tracebacks.
+DEFAULT_THEME = "ansi_dark"
+
+
+class SnippetSyntax(Syntax):
     """
-    A rich representation of an ExceptionChainRepr produced by pytest.
+    Syntax highlighting for a Snippet of a file.
 
-    This is needed because pytest does not provide the actual traceback
-    object, which Rich's `Traceback` class requires.
+    Only the snippet is lexed, and its tokens are cached, but lines are
+    numbered and the line number column is sized as if the whole file had
+    been given, so the output is the same.
     """
 
-    nodeid: str
-    chain: ExceptionChainRepr
-    extra_lines: int = 3
-    theme: Optional[str] = "ansi_dark"
-    word_wrap: bool = True
-    indent_guides: bool = True
-    error_messages: list = []
+    def __init__(self, snippet: Snippet, **kwargs) -> None:
+        super().__init__(
+            snippet.code, "python", start_line=snippet.start_line, **kwargs
+        )
+        self.snippet = snippet
 
-    def __rich_console__(
-        self, console: Console, options: ConsoleOptions
-    ) -> RenderResult:
-        theme = self.get_theme()
-        background_style = theme.get_background_style()
-        token_style = theme.get_style_for_token
+    @property
+    def lexer(self) -> Optional[Lexer]:
+        lexer = super().lexer
+        if lexer is None:
+            return None
+        return _SnippetLexer(self.snippet, lexer)
+
+    @property
+    def _numbers_column_width(self) -> int:
+        if not self.line_numbers:
+            return 0
+        return len(str(self.snippet.total_lines)) + NUMBERS_COLUMN_DEFAULT_PADDING
+
+
+class _SnippetLexer(Lexer):
+    """Lexer returning the cached tokens of a snippet, lexing it only once."""
+
+    def __init__(self, snippet: Snippet, lexer: Lexer) -> None:
+        super().__init__()
+        self.snippet = snippet
+        self.lexer = lexer
+
+    def get_tokens(self, text, unfiltered=False):
+        with self.snippet.lock:
+            if self.snippet.tokens is None:
+                self.snippet.tokens = list(self.lexer.get_tokens(text))
+            return iter(self.snippet.tokens)
+
+
+def get_err_msgs(lines: Sequence[str]) -> list[str]:
+    err_lines = []
+    for line in lines:
+        if line.startswith("E"):
+            err_lines.append(line[1:].strip())
+    return err_lines
+
+
+def get_error_messages(chain: ExceptionChainRepr) -> list[str]:
+    """Error lines of the entries with a message, as shown in the traceback."""
+    error_messages = []
+    for entry in chain.reprtraceback.reprentries:
+        assert isinstance(entry, ReprEntry)
+        assert entry.reprfileloc is not None
+        if entry.reprfileloc.message:
+            error_messages.extend(get_err_msgs(entry.lines))
+    return error_messages
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class RenderContext:
+    """
+    What rendering a traceback needs besides the failure itself: the syntax
+    theme, the styles resolved from it and the highlighters.
+
+    Building it resolves every style of the theme, so it is built once and
+    shared by all the tracebacks rendered with the same theme.
+    """
+
+    theme: SyntaxTheme
+    background_style: Style
+    # Styles of the traceback elements, pushed on the console while rendering.
+    traceback_theme: Theme
+    error_style: Style
+    separator_style: Style
+    path_highlighter: PathHighlighter
+    repr_highlighter: ReprHighlighter
+
+    @classmethod
+    def from_theme(cls, theme: Union[str, SyntaxTheme]) -> "RenderContext":
+        """
+        Resolve the styles of the traceback from a syntax theme.
+
+        Args:
+            theme (str | SyntaxTheme): Theme of the source code, or the
+                name of a Pygments style.
 
+        Returns:
+            RenderContext: The context to render tracebacks with.
+        """
+        theme = Syntax.get_theme(theme)
+        token_style = theme.get_style_for_token
         traceback_theme = Theme(
             {
                 "pretty": token_style(TextToken),
@@ -77,19 +158,58 @@ class RichExceptionChainRepr:
             },
             inherit=False,
         )
+        return cls(
+            theme=theme,
+            background_style=theme.get_background_style(),
+            traceback_theme=traceback_theme,
+            error_style=Style(color="red"),
+            separator_style=Style(color="red", dim=True),
+            path_highlighter=PathHighlighter(),
+            repr_highlighter=ReprHighlighter(),
+        )
 
+
+@attr.s(auto_attribs=True)
+class RichExceptionChainRepr:
+    """
+    A rich representation of an ExceptionChainRepr produced by pytest.
+
+    This is needed because pytest does not provide the actual traceback
+    object, which Rich's `Traceback` class requires.
+    """
+
+    nodeid: str
+    chain: ExceptionChainRepr
+    extra_lines: int = 3
+    theme: Optional[str] = DEFAULT_THEME
+    word_wrap: bool = True
+    indent_guides: bool = True
+    # Shared by the tracebacks of a session; built from `theme` when not given.
+    context: Optional[RenderContext] = None
+
+    @property
+    def error_messages(self) -> list[str]:
+        """Error lines of the entries with a message, as shown in the traceback."""
+        return get_error_messages(self.chain)
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+        context = self.context
+        if context is None:
+            context = RenderContext.from_theme(self.get_theme())
         stack_renderable: ConsoleRenderable = Panel(
-            self._render_chain(self.chain, options),
+            self._render_chain(self.chain, options, context),
             title=f"[magenta]{self.nodeid}[/magenta]",
-            style=background_style,
+            style=context.background_style,
             border_style="traceback.border",
             expand=True,
             padding=(0, 1),
         )
-        with console.use_theme(traceback_theme):
+        with console.use_theme(context.traceback_theme):
             yield stack_renderable
 
-        path_highlighter = PathHighlighter()
+        path_highlighter = context.path_highlighter
         for entry in self.chain.reprtraceback.reprentries:
             assert isinstance(entry, ReprEntry)
             assert isinstance(entry.reprfileloc, ReprFileLocation)
@@ -108,50 +228,13 @@ class RichExceptionChainRepr:
 
     @group()
     def _render_chain(
-        self, chain: ExceptionChainRepr, options: ConsoleOptions
+        self,
+        chain: ExceptionChainRepr,
+        options: ConsoleOptions,
+        context: "RenderContext",
     ) -> RenderResult:
-        path_highlighter = PathHighlighter()
-        repr_highlighter = ReprHighlighter()
-        theme = self.get_theme()
-        code_cache: dict[str, str] = {}
-
-        def read_code(filename: str) -> str:
-            """
-            Read files and cache results on filename.
-
-            Args:
-                filename (str): Filename to read
-
-            Returns:
-                str: Contents of file
-            """
-            code = code_cache.get(filename)
-            if not code:
-                with open(filename, encoding="utf-8", errors="replace") as code_file:
-                    code = code_file.read()
-                code_cache[filename] = code
-            return code
-
-        def get_funcname(lineno: int, filename: str) -> str:
-            """
-            Given a line number in a file, using `ast.parse` walk backwards
-            until we find the function name.
-
-            Args:
-                lineno (int): Line number to start searching from
-                filename (str): Filename to read
-
-            Returns:
-                str: Function name
-            """
-            code = read_code(filename)
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    if node.end_lineno is not None:
-                        if node.lineno <= lineno <= node.end_lineno:
-                            return node.name
-            return "???"
+        path_highlighter = context.path_highlighter
+        repr_highlighter = context.repr_highlighter
 
         def get_args(reprfuncargs: ReprFuncArgs) -> Text:
             args = Text("")
@@ -174,13 +257,6 @@ class RichExceptionChainRepr:
                     return line.split(">")[1].strip()
             return ""
 
-        def get_err_msgs(lines: Sequence[str]) -> list[str]:
-            err_lines = []
-            for line in lines:
-                if line.startswith("E"):
-                    err_lines.append(line[1:].strip())
-            return err_lines
-
         for last, entry in loop_last(chain.reprtraceback.reprentries):
             assert isinstance(entry, ReprEntry)
             assert entry.reprfileloc is not None
@@ -199,29 +275,39 @@ class RichExceptionChainRepr:
             )
             yield text
 
-            assert entry.reprfuncargs is not None
-            args = get_args(entry.reprfuncargs)
-            if args:
-                yield args
-
-            code = read_code(filename)
-            syntax = Syntax(
-                code,
-                "python",
-                theme=theme,
-                line_numbers=True,
-                line_range=(
-                    lineno - self.extra_lines,
-                    lineno + self.extra_lines,
-                ),
-                highlight_lines={lineno},
-                word_wrap=self.word_wrap,
-                code_width=88,
-                indent_guides=self.indent_guides,
-                dedent=False,
-            )
+            # entries between the first and the last have no arguments with
+            # the default "auto" traceback style.
+            if entry.reprfuncargs is not None:
+                args = get_args(entry.reprfuncargs)
+                if args:
+                    yield args
+
+            first_line = lineno - self.extra_lines
+            last_line = lineno + self.extra_lines
+            snippet = get_snippet(filename, first_line, last_line)
             yield ""
-            yield syntax
+            if snippet is None:
+                # e.g. replaying events recorded on another machine: show the
+                # source lines pytest kept instead.
+                yield Text(
+                    "\n".join(
+                        line for line in entry.lines if not line.startswith("E ")
+                    ),
+                    style="pygments.text",
+                )
+            else:
+                offset = snippet.start_line - 1
+                yield SnippetSyntax(
+                    snippet,
+                    theme=context.theme,
+                    line_numbers=True,
+                    line_range=(first_line - offset, last_line - offset),
+                    highlight_lines={lineno},
+                    word_wrap=self.word_wrap,
+                    code_width=88,
+                    indent_guides=self.indent_guides,
+                    dedent=False,
+                )
 
             if message:
                 line_pointer = "> " if options.legacy_windows else "❱ "
@@ -232,19 +318,18 @@ class RichExceptionChainRepr:
                     (message, "traceback.exc_type"),
                 )
                 yield Text.assemble(
-                    (line_pointer, Style(color="red")),
+                    (line_pointer, context.error_style),
                     repr_highlighter(get_error_source(entry.lines)),
                 )
                 for err_msg in get_err_msgs(entry.lines):
-                    self.error_messages.append(err_msg)
                     yield Text.assemble(
-                        ("E ", Style(color="red")),
+                        ("E ", context.error_style),
                         repr_highlighter(err_msg),
                     )
 
             if not last:
                 yield ""
-                yield Rule(style=Style(color="red", dim=True))
+                yield Rule(style=context.separator_style)
 
     def get_theme(self) -> SyntaxTheme:
         """
@@ -0,0 +1,108 @@
+import time
+from typing import Optional
+from typing import Union
+
+import attr
+from rich.columns import Columns
+from rich.console import Console
+from rich.console import ConsoleOptions
+from rich.console import RenderResult
+from rich.text import Text
+
+LANE_WIDTH = 36
+
+
+@attr.s(auto_attribs=True, slots=True)
+class WorkerLane:
+    """State of a single pytest-xdist worker, as seen by the controller."""
+
+    worker_id: str
+    nodeid: Optional[str] = None
+    completed: int = 0
+    failed: int = 0
+    down: bool = False
+
+
+@attr.s(auto_attribs=True)
+class WorkerLanes:
+    """
+    Compact view of the pytest-xdist workers: one lane per worker showing
+    the test it is running, plus the overall throughput.
+
+    Lanes are only turned into text when the display is repainted, so
+    tracking them from the report hooks is just a couple of attribute
+    updates per event.
+    """
+
+    lanes: dict[str, WorkerLane] = attr.Factory(dict)
+    started: Optional[float] = None
+    completed: int = 0
+
+    def get_lane(self, worker_id: str) -> WorkerLane:
+        lane = self.lanes.get(worker_id)
+        if lane is None:
+            lane = self.lanes[worker_id] = WorkerLane(worker_id)
+        return lane
+
+    def start_test(self, worker_id: str, nodeid: str) -> None:
+        if self.started is None:
+            self.started = time.monotonic()
+        self.get_lane(worker_id).nodeid = nodeid
+
+    def record_failure(self, worker_id: str) -> None:
+        self.get_lane(worker_id).failed += 1
+
+    def finish_test(self, worker_id: str) -> None:
+        lane = self.get_lane(worker_id)
+        lane.nodeid = None
+        lane.completed += 1
+        self.completed += 1
+
+    def worker_down(self, worker_id: str) -> None:
+        lane = self.get_lane(worker_id)
+        lane.nodeid = None
+        lane.down = True
+
+    @property
+    def throughput(self) -> float:
+        if self.started is None:
+            return 0.0
+        elapsed = time.monotonic() - self.started
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+        yield Text.assemble(
+            (f"{sum(not lane.down for lane in self.lanes.values())}", "cyan"),
+            " workers, ",
+            (f"{self.throughput:.1f}", "green"),
+            " tests/s",
+        )
+        texts = []
+        for worker_id in sorted(self.lanes, key=_worker_sort_key):
+            lane = self.lanes[worker_id]
+            text = Text.assemble(
+                (f"{worker_id:>5} ", "bold"),
+                (f"{lane.completed:>6} ", "green"),
+                (f"{lane.failed:>4} " if lane.failed else "     ", "red"),
+                _lane_status(lane),
+                no_wrap=True,
+            )
+            text.truncate(LANE_WIDTH, overflow="ellipsis")
+            texts.append(text)
+        yield Columns(texts, width=LANE_WIDTH)
+
+
+def _lane_status(lane: WorkerLane) -> Union[str, tuple[str, str]]:
+    if lane.nodeid is not None:
+        return lane.nodeid.rsplit("/", 1)[-1]
+    if lane.down:
+        return ("down", "red")
+    return ("idle", "dim")
+
+
+def _worker_sort_key(worker_id: str) -> tuple[int, str]:
+    # "gw10" sorts after "gw9".
+    digits = worker_id.lstrip("gw")
+    return (int(digits) if digits.isdigit() else -1, worker_id)
@@ -0,0 +1,175 @@
+"""
+pytest plugin timing the hooks of the terminal reporter, loaded by run.py
+in the benchmarked sessions with `-p bench_plugin`.
+"""
+
+import functools
+import inspect
+import json
+import os
+import resource
+import sys
+import time
+from collections import defaultdict
+from typing import Any
+
+import pytest
+from rich.console import Console
+
+# The hook in which the reporters render the end of the session, including
+# the `pytest_terminal_summary` the stock one calls from there.
+SESSION_END_HOOK = "pytest_sessionfinish"
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("bench", "pytest-rich benchmarks")
+    group.addoption(
+        "--bench-reporter",
+        choices=("stock", "rich"),
+        default="stock",
+        help="Terminal reporter to benchmark.",
+    )
+    group.addoption(
+        "--bench-output",
+        default=None,
+        metavar="FILE",
+        help="Write the measurements to FILE, as JSON.",
+    )
+
+
+class HookTimer:
+    """
+    Accumulates the time spent in each hook of a plugin.
+
+    `seconds` is the time spent in the hook itself, without the other timed
+    hooks it calls, so it adds up to the overhead of the plugin; `cumulative`
+    includes them.
+    """
+
+    def __init__(self) -> None:
+        self.calls: dict[str, int] = defaultdict(int)
+        self.seconds: dict[str, float] = defaultdict(float)
+        self.cumulative: dict[str, float] = defaultdict(float)
+        # Time spent in nested timed hooks, for each timed hook running.
+        self.nested: list[float] = []
+
+    def instrument(self, plugin: object) -> None:
+        """Replace the hook implementations of `plugin` by timed ones."""
+        for name in dir(plugin):
+            if not name.startswith("pytest_"):
+                continue
+            method = getattr(plugin, name)
+            if not callable(method):
+                continue
+            if inspect.isgeneratorfunction(method):
+                timed = self._time_wrapper(name, method)
+            else:
+                timed = self._time_call(name, method)
+            setattr(plugin, name, timed)
+
+    def _measure(self, name: str, func, *args, **kwargs):
+        self.nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] += elapsed - self.nested.pop()
+            self.cumulative[name] += elapsed
+            if self.nested:
+                self.nested[-1] += elapsed
+
+    def _time_call(self, name: str, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            self.calls[name] += 1
+            return self._measure(name, method, *args, **kwargs)
+
+        return timed
+
+    def _time_wrapper(self, name: str, method):
+        # only the code around the `yield` of a wrapper is its own, the rest
+        # is the other implementations of the hook.
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            self.calls[name] += 1
+            gen = method(*args, **kwargs)
+            value = self._measure(name, next, gen)
+            try:
+                result = yield value
+            except BaseException as e:
+                try:
+                    self._measure(name, gen.throw, e)
+                except StopIteration as stop:
+                    return stop.value
+            else:
+                try:
+                    self._measure(name, gen.send, result)
+                except StopIteration as stop:
+                    return stop.value
+            raise RuntimeError(f"{name} did not stop")
+
+        return timed
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            name: {
+                "calls": self.calls[name],
+                "seconds": self.seconds[name],
+                "cumulative_seconds": self.cumulative[name],
+            }
+            for name in sorted(self.calls)
+        }
+
+
+timer_key = pytest.StashKey[HookTimer]()
+start_key = pytest.StashKey[float]()
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config: pytest.Config) -> None:
+    stock = config.pluginmanager.getplugin("terminalreporter")
+    if stock is None:
+        return
+    config.pluginmanager.unregister(stock)
+    if config.getoption("bench_reporter") == "rich":
+        from pytest_rich.terminal import RichTerminalReporter
+
+        # a terminal which discards the output, so the reporter renders
+        # everything as it would on a TTY without the cost of a real one.
+        console = Console(
+            file=open(os.devnull, "w"), force_terminal=True, width=120, height=40
+        )
+        reporter = RichTerminalReporter(config, console=console)
+        name = "rich-terminal-reporter"
+    else:
+        reporter = stock
+        name = "terminalreporter"
+    timer = HookTimer()
+    timer.instrument(reporter)
+    config.pluginmanager.register(reporter, name)
+    config.stash[timer_key] = timer
+    config.stash[start_key] = time.perf_counter()
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    output = config.getoption("bench_output")
+    timer = config.stash.get(timer_key, None)
+    if output is None or timer is None:
+        return
+    hooks = timer.as_dict()
+    total = sum(hook["seconds"] for hook in hooks.values())
+    measurements = {
+        "reporter": config.getoption("bench_reporter"),
+        "wall_seconds": time.perf_counter() - config.stash[start_key],
+        "reporter_seconds": total,
+        "session_end_seconds": hooks.get(SESSION_END_HOOK, {}).get(
+            "cumulative_seconds", 0.0
+        ),
+        # kilobytes on Linux, bytes on macOS.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        "hooks": hooks,
+    }
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(measurements, file, indent=2)
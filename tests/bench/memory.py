@@ -0,0 +1,80 @@
+"""
+Benchmark the memory the reporter keeps per collected item.
+
+Registers synthetic items the way the reporter does, in an ItemRegistry and
+the FileProgress of their file, then reports each of them as a passed test
+with its durations, and prints the memory retained, measured with
+tracemalloc:
+
+    python tests/bench/memory.py --items 1000000 --files 10000
+
+The node IDs and paths are built before measuring, as they are owned by the
+session.
+"""
+
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+from pytest_rich.durations import PHASES
+from pytest_rich.durations import DurationStats
+from pytest_rich.registry import ItemRegistry
+from pytest_rich.terminal import STATUS_CODES
+from pytest_rich.terminal import FileProgress
+
+
+def measure(nodeids: list[str], paths: list[Path]) -> int:
+    """
+    Return the bytes retained by the bookkeeping of the items.
+
+    Args:
+        nodeids (list[str]): Node ID of each item.
+        paths (list[Path]): File of each item.
+    """
+    tracemalloc.start()
+    registry = ItemRegistry()
+    progress_per_file: dict[Path, FileProgress] = {}
+    durations = DurationStats()
+    for nodeid, path in zip(nodeids, paths):
+        file_progress = progress_per_file.get(path)
+        if file_progress is None:
+            file_progress = progress_per_file[path] = FileProgress()
+        registry.add(nodeid, path, file_progress.add_item())
+    for index, nodeid in enumerate(nodeids):
+        path, position = registry.slot(nodeid)
+        progress_per_file[path].set_status(position, STATUS_CODES["success"])
+        for phase in PHASES:
+            durations.add(index, phase, 0.001)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--files", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    per_file = max(1, args.items // args.files)
+    paths = []
+    nodeids = []
+    for file_index in range(args.files):
+        path = Path(f"tests/test_bench_{file_index}.py")
+        for item_index in range(per_file):
+            paths.append(path)
+            nodeids.append(f"{path}::test_{item_index}")
+    retained = measure(nodeids, paths)
+    print(f"items     {len(nodeids)}")
+    print(f"files     {args.files}")
+    print(f"retained  {retained / 1_000_000:.1f}MB")
+    print(f"per item  {retained / len(nodeids):.1f}B")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Synthetic test projects for the reporter benchmarks.
+"""
+
+import textwrap
+from pathlib import Path
+
+import attr
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class ProjectSpec:
+    """
+    Shape of a synthetic project.
+
+    Every file has `tests_per_file` test functions, each parametrized
+    `params` times. Failures are spread evenly over the tests, each one
+    raised `depth` calls below the test function, and every test prints
+    `output_lines` lines of 80 characters.
+    """
+
+    files: int = 10
+    tests_per_file: int = 10
+    params: int = 1
+    failure_ratio: float = 0.0
+    depth: int = 1
+    output_lines: int = 0
+
+    @property
+    def total_tests(self) -> int:
+        return self.files * self.tests_per_file * self.params
+
+
+def generate_project(spec: ProjectSpec, path: Path) -> None:
+    """
+    Write the files of a synthetic project.
+
+    Args:
+        spec (ProjectSpec): Shape of the project.
+        path (Path): Directory of the project, created if needed.
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    # failing tests are picked by their number across the whole project, so
+    # any ratio gives the same failures for the same spec.
+    every = round(1 / spec.failure_ratio) if spec.failure_ratio > 0 else 0
+    for file_index in range(spec.files):
+        lines = [
+            "import pytest",
+            "",
+            "",
+            f"LINE = {'x' * 78!r}",
+            "",
+            "",
+        ]
+        lines += _helpers(spec.depth)
+        for test_index in range(spec.tests_per_file):
+            first = (file_index * spec.tests_per_file + test_index) * spec.params
+            lines += [
+                f"@pytest.mark.parametrize('i', range({first}, {first + spec.params}))",
+                f"def test_{test_index}(i):",
+                f"    for _ in range({spec.output_lines}):",
+                "        print(LINE)",
+                f"    call_0(i, {every})",
+                "",
+                "",
+            ]
+        (path / f"test_bench_{file_index}.py").write_text("\n".join(lines))
+
+
+def _helpers(depth: int) -> list[str]:
+    """Chain of `depth` functions, the last one failing on every n-th test."""
+    lines = []
+    for level in range(depth - 1):
+        lines += [
+            f"def call_{level}(i, every):",
+            f"    call_{level + 1}(i, every)",
+            "",
+            "",
+        ]
+    lines += textwrap.dedent(f"""\
+        def call_{depth - 1}(i, every):
+            assert not every or i % every != every - 1, f"test {{i}} failed"
+        """).splitlines()
+    return lines + ["", ""]
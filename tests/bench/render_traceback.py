@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the per-failure cost of rendering a traceback.
+
+Collects the failures of a synthetic project, then renders each of them to
+a discarded console, building a RenderContext per failure as when none is
+given, and sharing one as the reporter does:
+
+    python tests/bench/render_traceback.py --failures 200 --depth 3
+"""
+
+import argparse
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from _pytest._code.code import ExceptionChainRepr
+from project import ProjectSpec
+from project import generate_project
+from rich.console import Console
+
+from pytest_rich.traceback import DEFAULT_THEME
+from pytest_rich.traceback import RenderContext
+from pytest_rich.traceback import RichExceptionChainRepr
+
+
+class _CollectFailures:
+    def __init__(self) -> None:
+        self.reports: list[pytest.TestReport] = []
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if report.failed:
+            self.reports.append(report)
+
+
+def collect_failures(project: Path) -> list[pytest.TestReport]:
+    """Run a project in-process and return its failed reports."""
+    collector = _CollectFailures()
+    pytest.main(
+        [str(project), "-p", "no:cacheprovider", "-p", "no:terminal"],
+        plugins=[collector],
+    )
+    return collector.reports
+
+
+def time_renders(
+    reports: list[pytest.TestReport], context: Optional[RenderContext]
+) -> float:
+    """Return the time, in seconds, to render one of the failures."""
+    console = Console(file=io.StringIO(), width=120)
+    start = time.perf_counter()
+    for report in reports:
+        assert isinstance(report.longrepr, ExceptionChainRepr)
+        console.print(
+            RichExceptionChainRepr(report.nodeid, report.longrepr, context=context)
+        )
+    return (time.perf_counter() - start) / len(reports)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--failures", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=3, help="traceback depth")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    spec = ProjectSpec(
+        files=1, tests_per_file=args.failures, failure_ratio=1.0, depth=args.depth
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        # the tracebacks show the sources, which must exist while rendering.
+        project = Path(tmp, "project")
+        generate_project(spec, project)
+        reports = collect_failures(project)
+        # warm-up: the first render reads and lexes the sources, later ones
+        # reuse them.
+        time_renders(reports, None)
+        context = RenderContext.from_theme(DEFAULT_THEME)
+        per_failure, shared = [], []
+        for _ in range(args.repeat):
+            # interleaved, so a slowdown of the machine affects both.
+            per_failure.append(time_renders(reports, None))
+            shared.append(time_renders(reports, context))
+    start = time.perf_counter()
+    for _ in range(100):
+        RenderContext.from_theme(DEFAULT_THEME)
+    build = (time.perf_counter() - start) / 100
+    print(f"failures rendered        {len(reports)}")
+    print(f"context build            {build * 1e6:8.1f} us")
+    # the fastest run is the least disturbed by the rest of the machine.
+    print(f"render, context per call {min(per_failure) * 1e6:8.1f} us")
+    print(f"render, shared context   {min(shared) * 1e6:8.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Benchmark the overhead of the terminal reporters on a synthetic project.
+
+Generates a project, runs it with the stock terminal reporter and with
+RichTerminalReporter (rendering to a discarded fake terminal), each in its
+own process, and writes the measurements as JSON:
+
+    python tests/bench/run.py --files 100 --tests-per-file 100 \\
+        --failure-ratio 0.01 --output before.json
+
+Arguments after `--` are passed to pytest, e.g. `-- --rich-refresh-hz=10`.
+Two results can be compared with:
+
+    python tests/bench/run.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+from typing import Optional
+
+import attr
+from project import ProjectSpec
+from project import generate_project
+
+HERE = Path(__file__).parent
+REPORTERS = ("stock", "rich")
+# Measurements compared by `--compare`.
+METRICS = ("wall_seconds", "reporter_seconds", "session_end_seconds", "peak_rss_mb")
+
+
+def run_session(project: Path, reporter: str, pytest_args: list[str]) -> dict[str, Any]:
+    """
+    Run pytest on `project` in a new process.
+
+    Args:
+        project (Path): Directory of the project.
+        reporter (str): "stock" or "rich".
+        pytest_args (list[str]): Extra arguments for pytest.
+
+    Returns:
+        dict: Measurements of bench_plugin.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp, "result.json")
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [str(HERE), env.get("PYTHONPATH")])
+        )
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pytest",
+                "-p",
+                "bench_plugin",
+                "-p",
+                "no:cacheprovider",
+                f"--bench-reporter={reporter}",
+                f"--bench-output={output}",
+                *pytest_args,
+            ],
+            cwd=project,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            check=False,
+        )
+        return json.loads(output.read_text())
+
+
+def run_benchmark(
+    spec: ProjectSpec, repeat: int, pytest_args: list[str]
+) -> dict[str, Any]:
+    """
+    Run every reporter `repeat` times on the project of `spec`.
+
+    Args:
+        spec (ProjectSpec): Shape of the project.
+        repeat (int): Number of runs of each reporter.
+        pytest_args (list[str]): Extra arguments for pytest.
+
+    Returns:
+        dict: The spec, the environment, every run and the median of each
+        measurement per reporter.
+    """
+    results: dict[str, Any] = {
+        "spec": attr.asdict(spec),
+        "pytest_args": pytest_args,
+        "environment": _environment(),
+        "runs": {reporter: [] for reporter in REPORTERS},
+        "median": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp, "project")
+        generate_project(spec, project)
+        for _ in range(repeat):
+            # interleaved, so a slowdown of the machine affects both.
+            for reporter in REPORTERS:
+                results["runs"][reporter].append(
+                    run_session(project, reporter, pytest_args)
+                )
+    for reporter, runs in results["runs"].items():
+        results["median"][reporter] = {
+            metric: statistics.median(run[metric] for run in runs) for metric in METRICS
+        }
+    return results
+
+
+def compare(before: dict[str, Any], after: dict[str, Any]) -> str:
+    """Return a table of the median measurements of two results."""
+    lines = [f"{'':8} {'metric':20} {'before':>10} {'after':>10} {'change':>8}"]
+    for reporter in REPORTERS:
+        for metric in METRICS:
+            old = before["median"][reporter][metric]
+            new = after["median"][reporter][metric]
+            change = f"{(new - old) / old:+.1%}" if old else ""
+            lines.append(
+                f"{reporter:8} {metric:20} {old:10.3f} {new:10.3f} {change:>8}"
+            )
+    return "\n".join(lines)
+
+
+def _environment() -> dict[str, Optional[str]]:
+    import pytest
+    import rich
+
+    try:
+        commit: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pytest": pytest.__version__,
+        "rich": getattr(rich, "__version__", None),
+        "cpus": str(os.cpu_count()),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--tests-per-file", type=int, default=10)
+    parser.add_argument("--params", type=int, default=1, help="parametrization fan-out")
+    parser.add_argument("--failure-ratio", type=float, default=0.0)
+    parser.add_argument("--depth", type=int, default=1, help="traceback depth")
+    parser.add_argument(
+        "--output-lines", type=int, default=0, help="lines printed by each test"
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", default=None, help="JSON file, stdout if omitted")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two results"
+    )
+    parser.add_argument("pytest_args", nargs="*", help="arguments for pytest")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        before, after = (json.loads(Path(p).read_text()) for p in args.compare)
+        print(compare(before, after))
+        return 0
+
+    if args.depth < 1:
+        parser.error("--depth must be at least 1")
+    spec = ProjectSpec(
+        files=args.files,
+        tests_per_file=args.tests_per_file,
+        params=args.params,
+        failure_ratio=args.failure_ratio,
+        depth=args.depth,
+        output_lines=args.output_lines,
+    )
+    results = run_benchmark(spec, args.repeat, args.pytest_args)
+    text = json.dumps(results, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        Path(args.output).write_text(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+RUN = Path(__file__).parent / "bench" / "run.py"
+
+
+def test_benchmark_runner(tmp_path) -> None:
+    """The benchmark suite runs and measures both reporters."""
+    output = tmp_path / "result.json"
+    subprocess.run(
+        [
+            sys.executable,
+            str(RUN),
+            "--files=2",
+            "--tests-per-file=3",
+            "--params=2",
+            "--failure-ratio=0.25",
+            "--depth=3",
+            "--output-lines=2",
+            f"--output={output}",
+        ],
+        check=True,
+    )
+    results = json.loads(output.read_text())
+    assert results["spec"]["files"] == 2
+    for reporter in ("stock", "rich"):
+        (run,) = results["runs"][reporter]
+        assert run["reporter"] == reporter
+        assert run["hooks"]["pytest_runtest_logreport"]["calls"] == 3 * 12
+        assert run["session_end_seconds"] > 0
+        assert run["peak_rss_mb"] > 0
+        assert set(results["median"][reporter]) == {
+            "wall_seconds",
+            "reporter_seconds",
+            "session_end_seconds",
+            "peak_rss_mb",
+        }
+
+    compared = subprocess.run(
+        [sys.executable, str(RUN), "--compare", str(output), str(output)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert "rich     session_end_seconds" in compared
+    assert "+0.0%" in compared
+
+
+def test_render_traceback_benchmark() -> None:
+    """The traceback micro-benchmark renders with and without a shared context."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            str(RUN.parent / "render_traceback.py"),
+            "--failures=3",
+            "--repeat=1",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert "failures rendered        3" in output
+    assert "render, shared context" in output
+
+
+def test_memory_benchmark() -> None:
+    """The memory benchmark measures the bookkeeping of the items."""
+    output = subprocess.run(
+        [sys.executable, str(RUN.parent / "memory.py"), "--items=100", "--files=10"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert "items     100" in output
+    assert "retained  " in output
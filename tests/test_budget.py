@@ -0,0 +1,68 @@
+import pytest
+
+from pytest_rich.budget import RenderBudget
+
+
+@pytest.mark.parametrize(
+    "value, seconds, size",
+    [
+        ("30s", 30, None),
+        ("500ms", 0.5, None),
+        ("2m", 120, None),
+        ("1.5s", 1.5, None),
+        ("200kB", None, 200_000),
+        ("5MB", None, 5_000_000),
+        ("10 b", None, 10),
+    ],
+)
+def test_parse(value: str, seconds, size) -> None:
+    budget = RenderBudget.parse(value)
+    assert budget.seconds == seconds
+    assert budget.size == size
+
+
+@pytest.mark.parametrize("value", ["", "30", "s", "30h", "-1s"])
+def test_parse_invalid(value: str) -> None:
+    with pytest.raises(ValueError, match="invalid budget"):
+        RenderBudget.parse(value)
+
+
+def test_size_tiers() -> None:
+    budget = RenderBudget(size=100)
+    budget.begin()
+    tiers = []
+    for _ in range(4):
+        tiers.append(budget.next_tier())
+        budget.output += 30
+    assert tiers == ["full", "full", "plain", "plain"]
+    assert budget.next_tier() == "line"
+    assert budget.counts == {"full": 2, "plain": 2, "line": 1}
+    assert budget.degraded
+
+
+def test_time_tiers(monkeypatch) -> None:
+    now = 100.0
+    monkeypatch.setattr("time.monotonic", lambda: now)
+    budget = RenderBudget(seconds=10)
+    budget.begin()
+    assert budget.next_tier() == "full"
+    assert not budget.degraded
+    now = 106.0
+    assert budget.next_tier() == "plain"
+    now = 110.0
+    assert budget.next_tier() == "line"
+    assert budget.degraded
+
+
+def test_empty_budget() -> None:
+    budget = RenderBudget.parse("0s")
+    budget.begin()
+    assert budget.next_tier() == "line"
+    assert str(budget) == "0s"
+
+
+@pytest.mark.parametrize("value", ["5MB", "200kB", "500ms", "1.5s"])
+def test_str_keeps_unit(value: str) -> None:
+    assert str(RenderBudget.parse(value)) == value
+    assert str(RenderBudget.parse(" 2 kB ")) == "2kB"
+    assert str(RenderBudget(size=2000)) == "2000b"
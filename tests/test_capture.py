@@ -1,10 +1,16 @@
+import gzip
+import io
 from datetime import datetime
 from datetime import timezone
 
 import pytest
 from freezegun import freeze_time
+from rich.console import Console
 
+from pytest_rich.capture import CaptureFile
 from pytest_rich.capture import _get_filename_from_arg
+from pytest_rich.capture import save_terminal_output
+from pytest_rich.capture import start_streaming_capture
 
 NOW = datetime.now(timezone.utc)
 TIMESTAMP = NOW.strftime("%Y%m%d_%H%M%S")
@@ -18,6 +24,10 @@ TIMESTAMP = NOW.strftime("%Y%m%d_%H%M%S")
         ("html", (f"pytest_rich-{TIMESTAMP}", "html")),
         ("out", ("out", "svg")),
         ("out.txt", ("out", "txt")),
+        ("out.html.gz", ("out", "html.gz")),
+        (".svg.xz", (f"pytest_rich-{TIMESTAMP}", "svg.xz")),
+        ("txt.bz2", (f"pytest_rich-{TIMESTAMP}", "txt.bz2")),
+        ("out.gz", ("out", "svg.gz")),
     ],
 )
 @freeze_time(NOW)
@@ -31,9 +41,77 @@ def test_get_filename_from_arg(arg: str, expected: str) -> None:
     [
         "out.pdf",
         ".pdf",
+        "out.pdf.gz",
     ],
 )
 def test_get_filename_from_arg_invalid_filetype(arg: str) -> None:
     """Test _get_filename_from_arg with invalid file type."""
     with pytest.raises(ValueError):
         _get_filename_from_arg(arg)
+
+
+@pytest.mark.parametrize("filetype", ["txt", "html"])
+def test_streaming_capture(tmp_path, monkeypatch, filetype: str) -> None:
+    """Output is written as it is printed, with the recording kept small."""
+    monkeypatch.chdir(tmp_path)
+    console = Console(file=io.StringIO(), record=True, highlight=False)
+    capture = start_streaming_capture(console, f"out.{filetype}")
+    assert capture is not None
+    capture.flush_every = 2
+    path = tmp_path / f"out.{filetype}"
+
+    for i in range(5):
+        console.print(f"[red]line {i}[/red]")
+    # the first 3 prints were written, the others are still recorded.
+    assert "line 2" in path.read_text()
+    assert "line 3" not in path.read_text()
+    assert "line 3" in console.export_text(clear=False)
+
+    capture.close()
+    text = path.read_text()
+    if filetype == "txt":
+        assert text == "".join(f"line {i}\n" for i in range(5))
+    else:
+        assert text.startswith("<!DOCTYPE html>")
+        assert text.endswith("</html>\n")
+        assert text.count('<span style="color: #800000') == 5
+
+
+def test_streaming_capture_svg(tmp_path, monkeypatch) -> None:
+    """SVG needs the whole output upfront, it is saved at the end instead."""
+    monkeypatch.chdir(tmp_path)
+    console = Console(file=io.StringIO(), record=True)
+    assert start_streaming_capture(console, "out.svg") is None
+    assert start_streaming_capture(console, "out.pdf") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_compressed_capture(tmp_path, monkeypatch, stream: bool) -> None:
+    monkeypatch.chdir(tmp_path)
+    output = io.StringIO()
+    console = Console(file=output, record=True, highlight=False, width=200)
+    capture = start_streaming_capture(console, "out.txt.gz") if stream else None
+
+    for i in range(500):
+        console.print(f"line {i}")
+    if capture is not None:
+        capture.close()
+    else:
+        save_terminal_output(console, "out.txt.gz")
+
+    with gzip.open(tmp_path / "out.txt.gz", "rt", encoding="utf-8") as f:
+        assert f.read() == "".join(f"line {i}\n" for i in range(500))
+    summary = output.getvalue().splitlines()[-1]
+    assert summary.startswith("Saved terminal output to out.txt.gz (4.4 kB -> ")
+    assert "x smaller, in " in summary
+
+
+def test_capture_file_chunks(tmp_path, monkeypatch) -> None:
+    """Text written in chunks is saved whole, and its encoded size counted."""
+    monkeypatch.setattr("pytest_rich.capture.WRITE_CHUNK_SIZE", 3)
+    capture_file = CaptureFile.open(str(tmp_path / "out"), "txt")
+    capture_file.write("héllo\nwörld\n")
+    capture_file.close()
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == "héllo\nwörld\n"
+    assert capture_file.bytes_written == 14
@@ -0,0 +1,155 @@
+import io
+import os
+import sys
+
+from pytest_rich.ci import BackgroundWriter
+
+
+def test_background_writer() -> None:
+    stream = io.StringIO()
+    writer = BackgroundWriter(stream)
+    writer.start()
+    for i in range(100):
+        writer.write(f"line {i}\n")
+    writer.flush()
+    writer.close()
+    assert stream.getvalue() == "".join(f"line {i}\n" for i in range(100))
+    assert writer.thread is None
+    # closing twice is harmless.
+    writer.close()
+
+
+def test_background_writer_for_stdout(tmp_path, monkeypatch) -> None:
+    """The writer keeps writing to the output while pytest captures it."""
+    with open(tmp_path / "out", "w") as out, open(tmp_path / "other", "w") as other:
+        monkeypatch.setattr(sys, "stdout", out)
+        writer = BackgroundWriter.for_stdout()
+        assert writer.owns_stream
+        # what pytest does to capture the output of the tests.
+        os.dup2(other.fileno(), out.fileno())
+        writer.start()
+        writer.write("progress\n")
+        writer.close()
+    assert (tmp_path / "out").read_text() == "progress\n"
+    assert (tmp_path / "other").read_text() == ""
+
+
+def test_ci_output(pytester) -> None:
+    pytester.makepyfile(
+        test_a="""
+        def test_1():
+            pass
+
+        def test_2():
+            assert 1 == 2
+        """,
+        test_b="""
+        def test_3():
+            pass
+        """,
+    )
+    result = pytester.runpytest_subprocess("--rich-ci", "--rich-ci-interval=0")
+    # "[" starts a character class in fnmatch patterns.
+    result.stdout.fnmatch_lines(
+        [
+            "*pytest session starts*",
+            "Collected 3 items",
+            "[[] 66%] test_a.py 1 passed, 1 failed",
+            "[[]100%] test_b.py 1 passed",
+            "*FAILURES*",
+            "*test_a.py:5 in test_2*",
+            "FAILED  test_a.py::test_2 assert 1 == 2",
+            "*3  Total Tests*",
+            "*FAILED in * seconds*",
+        ]
+    )
+    # no live display: nothing is redrawn.
+    result.stdout.no_fnmatch_line("*Percent:*")
+    assert "\x1b[" not in result.stdout.str()
+    assert result.ret == 1
+
+
+def test_ci_deselected(pytester) -> None:
+    """Items deselected by -k do not count towards the progress."""
+    pytester.makepyfile(
+        test_a="""
+        def test_keep_1():
+            pass
+
+        def test_drop():
+            pass
+
+        def test_keep_2():
+            pass
+        """,
+        test_b="""
+        def test_drop_too():
+            pass
+        """,
+    )
+    result = pytester.runpytest_subprocess(
+        "--rich-ci", "--rich-ci-interval=0", "-k", "not drop"
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "Collected 4 items, 2 deselected",
+            "[[]100%] test_a.py 2 passed",
+            "*2  Total Tests*",
+        ]
+    )
+    result.stdout.no_fnmatch_line("*test_b.py*")
+    assert result.ret == 0
+
+
+def test_ci_file_outcomes(pytester) -> None:
+    """The line of a finished file counts each outcome apart."""
+    pytester.makepyfile(test_x="""
+        import pytest
+
+        def test_pass():
+            pass
+
+        def test_fail():
+            assert 0
+
+        def test_skip_in_call():
+            pytest.skip("in call")
+
+        @pytest.mark.skip
+        def test_skip_marker():
+            pass
+
+        @pytest.mark.xfail
+        def test_xfail():
+            assert 0
+
+        @pytest.fixture
+        def broken():
+            raise RuntimeError
+
+        def test_error(broken):
+            pass
+        """)
+    result = pytester.runpytest_subprocess("--rich-ci", "--rich-ci-interval=0")
+    result.stdout.fnmatch_lines(
+        ["[[]100%] test_x.py 1 passed, 1 failed, 1 errors, 2 skipped, 1 xfailed"]
+    )
+
+
+def test_ci_progress_lines(pytester) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(4))
+        def test_progress(i):
+            pass
+        """)
+    result = pytester.runpytest_subprocess("--rich-ci", "--rich-ci-interval=1e-9")
+    result.stdout.fnmatch_lines(
+        [
+            "[[] 25%] 1/4 tests, * tests/s, ETA *",
+            "[[] 50%] 2/4 tests, * tests/s, ETA *",
+            "[[]100%] test_ci_progress_lines.py 4 passed",
+            "[[]100%] 4/4 tests, * tests/s, ETA 0:00:00",
+        ]
+    )
@@ -0,0 +1,75 @@
+import io
+from pathlib import Path
+
+from rich.console import Console
+
+from pytest_rich.collection import COLLECT_TREE_CHILDREN
+from pytest_rich.collection import CollectDurations
+from pytest_rich.collection import CollectTree
+from pytest_rich.collection import generate_collect_durations_table
+
+
+def test_collect_tree(tmp_path) -> None:
+    tree = CollectTree(tmp_path)
+    a = tmp_path / "tests" / "unit" / "test_a.py"
+    b = tmp_path / "tests" / "unit" / "test_b.py"
+    c = tmp_path / "tests" / "test_c.py"
+    tree.add([("a1", a), ("a2", a), ("b1", b)])
+    # a class of an already counted module.
+    tree.add([("a3", a)])
+    tree.add([("c1", c)])
+    # outside of the root.
+    tree.add([("d1", Path("/elsewhere/test_d.py"))])
+
+    assert (tree.root.items, tree.root.modules) == (6, 4)
+    tests = tree.root.children["tests"]
+    assert (tests.items, tests.modules) == (5, 3)
+    unit = tests.children["unit"]
+    assert (unit.items, unit.modules) == (4, 2)
+    assert unit.children == {}
+    assert tree.root.children["/"].children["elsewhere"].items == 1
+
+    console = Console(file=io.StringIO(), width=100)
+    console.print(tree)
+    output = console.file.getvalue()  # type: ignore[attr-defined]
+    assert f"{tmp_path.name}/ 6 items in 4 modules" in output
+    assert "└── tests/ 5 items in 3 modules" in output
+    assert "unit/ 4 items in 2 modules" in output
+
+
+def test_collect_tree_folds_directories(tmp_path) -> None:
+    tree = CollectTree(tmp_path)
+    for i in range(COLLECT_TREE_CHILDREN + 5):
+        path = tmp_path / f"dir{i:02}" / "test_a.py"
+        tree.add([("a1", path), ("a2", path)])
+    console = Console(file=io.StringIO(), width=100)
+    console.print(tree)
+    output = console.file.getvalue()  # type: ignore[attr-defined]
+    assert f"dir{COLLECT_TREE_CHILDREN - 1:02}/" in output
+    assert f"dir{COLLECT_TREE_CHILDREN:02}/" not in output
+    assert "… 5 more directories (10 items)" in output
+
+
+def test_collect_durations(monkeypatch) -> None:
+    now = iter([0.0, 1.0, 1.5, 2.0, 10.0, 10.25])
+    monkeypatch.setattr("time.perf_counter", lambda: next(now))
+    durations = CollectDurations()
+    durations.start("test_a.py")
+    durations.start("test_b.py")
+    durations.finish("test_a.py")
+    durations.finish("test_b.py")
+    # not a module.
+    durations.finish("test_b.py::TestC")
+    durations.start("test_c.py")
+    durations.finish("test_c.py")
+    assert durations.starts == {}
+    assert list(durations.slowest(2)) == [("test_a.py", 1.5), ("test_b.py", 1.0)]
+    assert durations.total == 2.75
+
+    console = Console(file=io.StringIO(), width=100)
+    console.print(generate_collect_durations_table(durations, 2))
+    output = console.file.getvalue()  # type: ignore[attr-defined]
+    assert "Slowest 2 modules to collect" in output
+    assert "1.50s │ test_a.py" in output
+    assert "test_c.py" not in output
+    assert "3 modules collected in 2.75s" in output
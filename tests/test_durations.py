@@ -0,0 +1,59 @@
+import io
+
+from rich.console import Console
+
+from pytest_rich.durations import DurationStats
+from pytest_rich.durations import generate_durations_group
+
+NODEIDS = [
+    "test_a.py::test_1",
+    "test_a.py::test_2",
+    "test_a.py::test_not_run",
+    "test_b.py::test_3",
+    "test_b.py::test_4",
+]
+
+
+def make_stats() -> DurationStats:
+    stats = DurationStats()
+    for index, setup, call, teardown in [
+        (0, 0.0001, 0.0002, 0.0001),
+        (1, 2.0, 0.5, 0.0),
+        (3, 0.0, 0.05, 0.0),
+        (4, 0.0, 12.0, 1.0),
+    ]:
+        stats.add(index, "setup", setup)
+        stats.add(index, "call", call)
+        stats.add(index, "teardown", teardown)
+    return stats
+
+
+def test_duration_stats() -> None:
+    stats = make_stats()
+    # the item which did not run is not counted.
+    assert len(stats) == 4
+    assert stats.indexes() == [0, 1, 3, 4]
+    assert [NODEIDS[i] for i in stats.slowest(2)] == [
+        "test_b.py::test_4",
+        "test_a.py::test_2",
+    ]
+    assert stats.per_file(NODEIDS) == {
+        "test_a.py": (2, 0.0004 + 2.5),
+        "test_b.py": (2, 0.05 + 13.0),
+    }
+    assert stats.histogram() == [1, 0, 1, 0, 1, 1]
+    assert stats.total == 0.0004 + 2.5 + 0.05 + 13.0
+
+
+def test_generate_durations_group() -> None:
+    console = Console(file=io.StringIO(), width=100)
+    console.print(generate_durations_group(make_stats(), NODEIDS, 1, wall_time=20.0))
+    output = console.file.getvalue()  # type: ignore[attr-defined]
+    assert "Slowest 1 tests" in output
+    assert "13.00s │ 0.0ms │ 12.00s │    1.00s │ test_b.py::test_4" in output
+    assert "test_a.py::test_2" not in output
+    assert "13.05s │     2 │ test_b.py" in output
+    assert "< 1ms  █" in output
+    assert ">= 10s  █" in output
+    assert "Time in tests: 15.55s (setup 2.00s, call 12.55s, teardown 1.00s)" in output
+    assert "wall clock: 20.00s" in output
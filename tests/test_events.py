@@ -0,0 +1,107 @@
+import pytest
+
+
+@pytest.mark.parametrize("filename", ["events.jsonl", "events.jsonl.gz"])
+def test_record_and_replay(pytester, filename: str) -> None:
+    pytester.copy_example("test_basic.py")
+
+    result = pytester.runpytest(f"--rich-record-events={filename}")
+    result.assert_outcomes(
+        passed=3, skipped=4, failed=2, errors=2, xpassed=1, xfailed=3
+    )
+    log = pytester.path / filename
+    assert log.exists()
+
+    replay = pytester.runpytest(f"--rich-replay={filename}")
+    assert replay.ret == pytest.ExitCode.TESTS_FAILED
+    replay.stdout.fnmatch_lines(
+        [
+            "*pytest session starts*",
+            "*platform*pytest*python*",
+            "*test_basic.py::test_fail*",
+            "*❱ 11 │   assert False*",
+            "*test_basic.py::test_nested_failure*",
+            "*in test_nested_failure.<locals>.inner*",
+            "FAILED *test_basic.py::test_fail assert False",
+            "*14*Total Tests*",
+            "*4*Passed*(28.6%)*",
+            "*FAILED in *",
+        ]
+    )
+    # nothing was run again.
+    assert "collected" not in replay.stdout.str()
+
+
+def test_replay_cut_short(pytester) -> None:
+    """A log cut short, e.g. by a killed job, replays up to where it ends."""
+    pytester.makepyfile("""
+        def test_a():
+            pass
+
+        def test_b():
+            assert 0
+        """)
+    pytester.runpytest("--rich-record-events=events.jsonl")
+    log = pytester.path / "events.jsonl"
+    lines = log.read_text().splitlines(keepends=True)
+    # drop the end of the session, and half of the last event before it.
+    log.write_text("".join(lines[:-2]) + lines[-2][:10])
+
+    # in-process runs take INTERRUPTED for a KeyboardInterrupt of the session.
+    replay = pytester.runpytest_subprocess("--rich-replay=events.jsonl")
+    assert replay.ret == pytest.ExitCode.INTERRUPTED
+    replay.stdout.fnmatch_lines(["*test_b*", "*assert 0*", "*1*Total Tests*"])
+
+
+def test_replay_elsewhere(pytester, monkeypatch) -> None:
+    """
+    A log replays where the sources it refers to do not exist, e.g. one
+    recorded in CI, showing the source lines kept by pytest.
+    """
+    pytester.makepyfile(test_a="""
+        def test_a():
+            value = 1
+            assert value == 2
+        """)
+    pytester.runpytest("--rich-record-events=events.jsonl")
+    elsewhere = pytester.mkdir("elsewhere")
+    monkeypatch.chdir(elsewhere)
+
+    replay = pytester.runpytest_subprocess("--rich-replay=../events.jsonl")
+    assert replay.ret == pytest.ExitCode.TESTS_FAILED
+    replay.stdout.fnmatch_lines(
+        [
+            "*test_a.py:3 in ???*",
+            "*def test_a():*",
+            "*value = 1*",
+            "*>       assert value == 2*",
+            "*❱ assert value == 2*",
+            "*E assert 1 == 2*",
+            "FAILED  test_a.py::test_a assert 1 == 2",
+        ]
+    )
+    replay.stdout.no_fnmatch_line("*FileNotFoundError*")
+
+
+def test_replay_missing_file(pytester) -> None:
+    replay = pytester.runpytest("--rich-replay=missing.jsonl")
+    assert replay.ret == pytest.ExitCode.USAGE_ERROR
+    replay.stderr.fnmatch_lines(["*Cannot replay missing.jsonl*"])
+
+
+def test_replay_deselected(pytester) -> None:
+    pytester.makepyfile("""
+        def test_a():
+            pass
+
+        def test_b():
+            pass
+        """)
+    pytester.runpytest("--rich-record-events=events.jsonl", "-k", "test_a")
+    assert (
+        '["deselect",["test_replay_deselected.py::test_b"]]'
+        in (pytester.path / "events.jsonl").read_text()
+    )
+
+    replay = pytester.runpytest_subprocess("--rich-replay=events.jsonl")
+    replay.stdout.fnmatch_lines(["*Collected 2 items, 1 deselected*"])
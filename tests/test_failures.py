@@ -0,0 +1,106 @@
+import pytest
+
+from pytest_rich.failures import FailureGroups
+from pytest_rich.failures import FailureStore
+from pytest_rich.failures import failure_signature
+
+
+def failed_reports(pytester) -> list[pytest.TestReport]:
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(3))
+        def test_fail(i):
+            print("output", i)
+            assert i == -1
+    """)
+    reprec = pytester.inline_run()
+    return [
+        report
+        for report in reprec.getreports("pytest_runtest_logreport")
+        if report.failed
+    ]
+
+
+@pytest.mark.parametrize("threshold, in_memory", [(None, 3), (0, 0), (1, 0)])
+def test_failure_store(pytester, threshold, in_memory) -> None:
+    reports = failed_reports(pytester)
+    # pytest-xdist attaches the worker, which cannot be serialized.
+    reports[0].node = object()  # type: ignore[attr-defined]
+    store = FailureStore(pytester.parseconfig(), threshold)
+    for report in reports:
+        store.add(report)
+
+    assert len(store) == 3
+    assert len(store.reports) == in_memory
+    loaded = list(store)
+    assert [r.nodeid for r in loaded] == [r.nodeid for r in reports]
+    assert [str(r.longrepr) for r in loaded] == [str(r.longrepr) for r in reports]
+    # sections come back as lists, as they do from pytest-xdist workers.
+    assert [[tuple(s) for s in r.sections] for r in loaded] == [
+        r.sections for r in reports
+    ]
+    # the file is read again on every iteration.
+    assert [r.nodeid for r in store] == [r.nodeid for r in reports]
+    store.close()
+
+
+def test_failure_store_spills_after_threshold(pytester) -> None:
+    reports = failed_reports(pytester)
+    config = pytester.parseconfig()
+    measure = FailureStore(config, 10**9)
+    measure.add(reports[0])
+
+    # room for the first report only: the others go to disk, in order.
+    store = FailureStore(config, measure.size + 1)
+    for report in reports:
+        store.add(report)
+    assert store.reports == reports[:1]
+    assert len(store.spilled) == 2
+    assert [r.nodeid for r in store] == [r.nodeid for r in reports]
+    store.close()
+    assert store.file is None
+
+
+def test_failure_groups(pytester) -> None:
+    pytester.makepyfile("""
+        import pytest
+
+        class Service:
+            pass
+
+        def call_service():
+            raise RuntimeError(f"cannot reach {Service()!r}")
+
+        @pytest.mark.parametrize("i", range(3))
+        def test_service(i):
+            call_service()
+
+        def test_other():
+            assert 1 == 2
+    """)
+    reports = [
+        report
+        for report in pytester.inline_run().getreports("pytest_runtest_logreport")
+        if report.failed
+    ]
+    path, lineno, messages = failure_signature(reports[0])
+    assert path.endswith("test_failure_groups.py")
+    assert lineno == 7
+    # the address of the object is not part of the signature.
+    assert messages == (
+        "RuntimeError: cannot reach <test_failure_groups.Service object at 0x?>",
+    )
+
+    groups = FailureGroups()
+    for report in reports:
+        groups.add(report)
+    assert len(groups) == 2
+    service, other = groups
+    assert service.report is reports[0]
+    assert service.nodeids == [
+        "test_failure_groups.py::test_service[1]",
+        "test_failure_groups.py::test_service[2]",
+    ]
+    assert other.report is reports[3]
+    assert other.nodeids == []
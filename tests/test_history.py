@@ -0,0 +1,61 @@
+import pytest
+
+from pytest_rich.durations import DurationStats
+from pytest_rich.history import DurationHistory
+from pytest_rich.history import _decode
+from pytest_rich.history import _encode
+
+
+def test_encode_decode() -> None:
+    durations = {"test_a.py::test_1": 0.5, "test_a.py::test_2[a\\nb]": 2.0}
+    assert _decode(_encode(durations)) == durations
+    assert _decode(_encode({})) == {}
+    data = _encode(durations)
+    # truncated or foreign files are ignored.
+    assert _decode(data[:-3]) == {}
+    assert _decode(data[:30]) == {}
+    assert _decode(b"garbage") == {}
+
+
+def test_history_update(pytester) -> None:
+    config = pytester.parseconfigure()
+    history = DurationHistory.load(config)
+    assert history.path is not None
+    assert history.durations == {}
+
+    nodeids = ["test_a.py::test_1", "test_a.py::test_2"]
+    stats = DurationStats()
+    stats.add(0, "setup", 1.0)
+    stats.add(0, "call", 1.0)
+    stats.add(1, "call", 0.5)
+    history.update(stats, nodeids)
+    history.save()
+
+    history = DurationHistory.load(config)
+    assert history.durations == {"test_a.py::test_1": 2.0, "test_a.py::test_2": 0.5}
+    stats = DurationStats()
+    stats.add(0, "call", 1.0)
+    history.update(stats, nodeids)
+    # moving average of the runs, keeping the tests which did not run.
+    assert history.durations == {
+        "test_a.py::test_1": pytest.approx(0.3 * 1.0 + 0.7 * 2.0),
+        "test_a.py::test_2": 0.5,
+    }
+
+    # tests which were not collected are dropped.
+    history.update(DurationStats(), nodeids[1:])
+    assert history.durations == {"test_a.py::test_2": 0.5}
+
+
+def test_history_without_cache(pytester) -> None:
+    config = pytester.parseconfigure("-p", "no:cacheprovider")
+    history = DurationHistory.load(config)
+    assert history.path is None
+    history.update(DurationStats(), [])
+    history.save()
+
+
+def test_history_save_error(tmp_path) -> None:
+    history = DurationHistory(tmp_path / "missing" / "durations", {"test_1": 1.0})
+    with pytest.warns(pytest.PytestCacheWarning, match="could not save"):
+        history.save()
@@ -0,0 +1,81 @@
+import subprocess
+import sys
+
+import pytest
+
+
+def _imported_modules(code: str) -> list[str]:
+    """
+    Run `code` with `-X importtime` and return the modules it imported after
+    pytest itself, in import order.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import pytest; {code}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    after_pytest = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        name = line.rpartition("|")[2]
+        if after_pytest:
+            modules.append(name.strip())
+        elif name == " pytest":
+            # top-level modules are not indented.
+            after_pytest = True
+    return modules
+
+
+def test_plugin_import_cost():
+    """
+    Loading the plugin, as every pytest session does, must not import Rich
+    or the reporter: any module added here is paid for without --rich too.
+    """
+    modules = _imported_modules("import pytest_rich.plugin")
+    assert modules == ["pytest_rich", "pytest_rich.plugin"]
+
+
+def test_reporter_defers_traceback_import():
+    modules = _imported_modules("import pytest_rich.terminal")
+    assert "pytest_rich.terminal" in modules
+    assert "pytest_rich.traceback" not in modules
+    assert "pytest_rich.render" not in modules
+    assert "rich.syntax" not in modules
+
+
+def test_no_rich_import_without_reporter(pytester):
+    pytester.makeconftest("""
+    import sys
+
+    def pytest_sessionfinish():
+        print("rich imported:", "rich" in sys.modules)
+    """)
+    pytester.makepyfile("""
+    def test_ok():
+        pass
+    """)
+
+    # not a TTY, so --rich does not install the reporter either.
+    for args in [(), ("--rich",)]:
+        result = pytester.runpytest_subprocess("-s", *args)
+        result.assert_outcomes(passed=1)
+        result.stdout.fnmatch_lines(["*rich imported: False*"])
+
+
+@pytest.mark.parametrize("refresh_hz", ["0", "-1"])
+def test_invalid_refresh_hz(pytester, refresh_hz: str) -> None:
+    result = pytester.runpytest_subprocess(f"--rich-refresh-hz={refresh_hz}")
+    result.stderr.fnmatch_lines(
+        ["ERROR: --rich-refresh-hz must be greater than 0, got *"]
+    )
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+
+
+def test_invalid_render_budget(pytester) -> None:
+    # checked even when the rich reporter is not installed.
+    result = pytester.runpytest_subprocess("--rich-render-budget=30h")
+    result.stderr.fnmatch_lines(["ERROR: --rich-render-budget: invalid budget '30h'*"])
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
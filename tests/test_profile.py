@@ -0,0 +1,49 @@
+import json
+
+from pytest_rich.profile import Profiler
+from pytest_rich.profile import generate_profile_table
+
+
+class Target:
+    def __init__(self) -> None:
+        self.calls: list[int] = []
+
+    def hook(self, value: int) -> int:
+        self.calls.append(value)
+        return value * 2
+
+
+def test_profiler_instrument() -> None:
+    profiler = Profiler()
+    target = Target()
+    profiler.instrument(target, ["hook"])
+
+    assert [target.hook(i) for i in range(3)] == [0, 2, 4]
+    assert target.calls == [0, 1, 2]
+    assert len(profiler.samples["hook"]) == 3
+
+    with profiler.measure("render"):
+        pass
+    assert set(profiler.stats()) == {"hook", "render"}
+    assert profiler.stats()["render"]["calls"] == 1
+
+
+def test_profiler_stats(tmp_path) -> None:
+    profiler = Profiler()
+    for i in range(1, 101):
+        profiler.add("stage", i / 1000)
+    profiler.samples["unused"] = profiler.samples["stage"][:0]
+
+    stats = profiler.stats()
+    assert list(stats) == ["stage"]
+    assert stats["stage"]["calls"] == 100
+    assert round(stats["stage"]["total"], 6) == 5.05
+    assert stats["stage"]["p50"] == 0.05
+    assert stats["stage"]["p99"] == 0.099
+
+    path = tmp_path / "profile.json"
+    profiler.dump(str(path))
+    assert json.loads(path.read_text()) == stats
+
+    table = generate_profile_table(profiler)
+    assert table.row_count == 1
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from pytest_rich.registry import ItemRegistry
+
+
+def test_item_registry() -> None:
+    registry = ItemRegistry()
+    a, b = Path("test_a.py"), Path("test_b.py")
+    assert registry.add("test_a.py::test_1", a, 0) == 0
+    assert registry.add("test_b.py::test_1", b, 0) == 1
+    assert registry.add("test_a.py::test_2", a, 1) == 2
+
+    assert len(registry) == 3
+    assert "test_a.py::test_2" in registry
+    assert "test_c.py::test_1" not in registry
+    assert registry.paths == [a, b]
+    assert registry.slot("test_a.py::test_2") == (a, 1)
+    assert registry.path("test_b.py::test_1") == b
+    assert list(registry.iter_paths()) == [
+        ("test_a.py::test_1", a),
+        ("test_b.py::test_1", b),
+        ("test_a.py::test_2", a),
+    ]
+
+    assert list(registry.iter_slots()) == [
+        ("test_a.py::test_1", a, 0),
+        ("test_b.py::test_1", b, 0),
+        ("test_a.py::test_2", a, 1),
+    ]
+    assert registry.index("test_a.py::test_2") == 2
@@ -0,0 +1,101 @@
+import io
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+
+import pytest
+from rich.console import Console
+from rich.segment import Segment
+
+from pytest_rich import render
+from pytest_rich.render import PoolKind
+from pytest_rich.render import prerender_tracebacks
+from pytest_rich.traceback import RichExceptionChainRepr
+
+
+@pytest.mark.parametrize("pool", ["process", "thread"])
+def test_prerender_tracebacks(pytester, pool: PoolKind) -> None:
+    """Pre-rendered tracebacks print the same as rendering them in order."""
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(5))
+        def test_fail(i):
+            assert i == -1
+        """)
+    reports = [
+        report
+        for report in pytester.inline_run().getreports("pytest_runtest_logreport")
+        if report.failed
+    ]
+    assert len(reports) == 5
+
+    def make_console() -> Console:
+        return Console(
+            file=io.StringIO(), force_terminal=True, color_system="truecolor", width=90
+        )
+
+    expected = make_console()
+    for report in reports:
+        expected.print(RichExceptionChainRepr(report.nodeid, report.longrepr))
+    console = make_console()
+    for segments in prerender_tracebacks(reports, console.options, 2, pool):
+        console.print(segments)
+    assert console.file.getvalue() == expected.file.getvalue()  # type: ignore[attr-defined]
+
+
+def test_prerender_tracebacks_close(pytester, monkeypatch) -> None:
+    """Closing the pre-rendered tracebacks early stops rendering the rest."""
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(100))
+        def test_fail(i):
+            assert i == -1
+        """)
+    reports = [
+        report
+        for report in pytester.inline_run().getreports("pytest_runtest_logreport")
+        if report.failed
+    ]
+    assert len(reports) == 100
+
+    rendered = []
+
+    def counting_render_traceback(nodeid, longrepr, options) -> list[Segment]:
+        rendered.append(nodeid)
+        return []
+
+    monkeypatch.setattr(render, "render_traceback", counting_render_traceback)
+    console = Console(file=io.StringIO())
+    tracebacks = prerender_tracebacks(reports, console.options, 2, "thread")
+    next(tracebacks)
+    tracebacks.close()
+    # the chunk printed and the ones submitted ahead of it.
+    assert 0 < len(rendered) <= 4 * render.MAX_CHUNKSIZE
+
+
+def test_process_pool_spawns(pytester, monkeypatch) -> None:
+    """The process pool does not fork the reporter with its threads."""
+    pytester.makepyfile("""
+        def test_fail():
+            assert 0
+
+        def test_fail_too():
+            assert 0
+        """)
+    reports = [
+        report
+        for report in pytester.inline_run().getreports("pytest_runtest_logreport")
+        if report.failed
+    ]
+    start_methods = []
+
+    class SpyExecutor(ProcessPoolExecutor):
+        def __init__(self, workers: int, mp_context: BaseContext) -> None:
+            start_methods.append(mp_context.get_start_method())
+            super().__init__(workers, mp_context=mp_context)
+
+    monkeypatch.setattr(render, "ProcessPoolExecutor", SpyExecutor)
+    console = Console(file=io.StringIO())
+    assert len(list(prerender_tracebacks(reports, console.options, 2, "process"))) == 2
+    assert start_methods == ["spawn"]
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+
+import pytest
+
+from pytest_rich.source import FunctionIndex
+from pytest_rich.source import SourceCache
+from pytest_rich.source import get_funcname
+from pytest_rich.source import get_function_index
+from pytest_rich.source import get_snippet
+from pytest_rich.source import source_cache
+
+SOURCE = """\
+import pytest
+
+
+def test_plain():
+    assert 0
+
+
+async def test_async():
+    assert 0
+
+
+class TestClass:
+    x = 1
+
+    def test_method(self):
+        def inner():
+            assert 0
+
+        inner()
+
+    @pytest.mark.skip
+    def test_decorated(self):
+        class Local:
+            def method(self):
+                pass
+        assert 0
+"""
+
+
+@pytest.mark.parametrize(
+    "lineno, expected",
+    [
+        (1, None),
+        (4, "test_plain"),
+        (5, "test_plain"),
+        (6, None),
+        (9, "test_async"),
+        (13, None),
+        (15, "TestClass.test_method"),
+        (17, "TestClass.test_method.<locals>.inner"),
+        (19, "TestClass.test_method"),
+        (21, None),
+        (25, "TestClass.test_decorated.<locals>.Local.method"),
+        (26, "TestClass.test_decorated"),
+        (100, None),
+    ],
+)
+def test_function_index(lineno: int, expected: str) -> None:
+    index = FunctionIndex.from_source(SOURCE)
+    assert index.get_funcname(lineno) == expected
+
+
+def test_function_index_syntax_error() -> None:
+    assert FunctionIndex.from_source("def (").get_funcname(1) is None
+
+
+def test_get_funcname_cache(tmp_path) -> None:
+    path = tmp_path / "test_foo.py"
+    path.write_text(SOURCE)
+    filename = str(path)
+    assert get_funcname(5, filename) == "test_plain"
+    assert get_function_index(filename) is get_function_index(filename)
+
+    path.write_text("\n\n\n\ndef test_renamed():\n    pass\n")
+    os.utime(path, ns=(0, 0))
+    assert get_funcname(5, filename) == "test_renamed"
+    assert get_funcname(5, str(tmp_path / "missing.py")) == "???"
+
+
+def test_source_cache(tmp_path) -> None:
+    cache = SourceCache(max_bytes=10)
+    empty = tmp_path / "empty.py"
+    empty.write_text("")
+    first = tmp_path / "first.py"
+    first.write_text("x = 1\n")
+    second = tmp_path / "second.py"
+    second.write_text("y = 2\n")
+
+    # empty files are cached too.
+    assert cache.read(str(empty)) == ""
+    entry = cache.entries[str(empty)]
+    assert cache.read(str(empty)) == ""
+    assert cache.entries[str(empty)] is entry
+    assert cache.read(str(first)) == "x = 1\n"
+    entry = cache.entries[str(first)]
+    assert cache.read(str(first)) == "x = 1\n"
+    assert cache.entries[str(first)] is entry
+    assert list(cache.entries) == [str(empty), str(first)]
+
+    # the least recently used file goes once the cache is over budget.
+    cache.read(str(empty))
+    cache.read(str(second))
+    assert list(cache.entries) == [str(empty), str(second)]
+    assert cache.total_bytes == 6
+
+    # a file which changed on disk is read again.
+    second.write_text("y = 22\n")
+    assert cache.read(str(second)) == "y = 22\n"
+    assert cache.total_bytes == 7
+
+
+def test_get_snippet_threads(tmp_path) -> None:
+    """Threads rendering the same file all get the whole of it."""
+    path = tmp_path / "test_large.py"
+    # a single statement, so the snippet is the whole file.
+    text = 'x = """\n' + "line\n" * 200_000 + '"""\n'
+    path.write_text(text)
+    filename = str(path)
+    snippets = []
+    start = threading.Barrier(8)
+
+    def render() -> None:
+        start.wait()
+        snippets.append(get_snippet(filename, 100_000, 100_005))
+
+    threads = [threading.Thread(target=render) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(snippets) == 8
+    for snippet in snippets:
+        assert snippet is not None
+        assert snippet.total_lines == text.count("\n") + 1
+        assert snippet.code == text
+    source_cache.clear()
+
+
+def test_get_snippet_computed_once(tmp_path, monkeypatch) -> None:
+    """The parts of a cached file filled on first use are computed once."""
+    path = tmp_path / "test_shared.py"
+    path.write_text(SOURCE)
+    filename = str(path)
+    parsed = []
+    from_source = FunctionIndex.from_source.__func__  # type: ignore[attr-defined]
+
+    def slow_from_source(cls, source: str) -> FunctionIndex:
+        parsed.append(source)
+        time.sleep(0.05)
+        return from_source(cls, source)
+
+    monkeypatch.setattr(FunctionIndex, "from_source", classmethod(slow_from_source))
+    snippets = []
+    start = threading.Barrier(8)
+
+    def render() -> None:
+        start.wait()
+        snippets.append(get_snippet(filename, 15, 17))
+
+    threads = [threading.Thread(target=render) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(parsed) == 1
+    assert len(snippets) == 8
+    assert all(snippet is snippets[0] for snippet in snippets)
+    source_cache.clear()
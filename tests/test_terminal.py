@@ -0,0 +1,769 @@
+import functools
+import io
+import json
+import re
+from types import SimpleNamespace
+from typing import Any
+from typing import Literal
+from typing import Union
+
+import pytest
+import rich
+from rich.console import Console
+from rich.progress import Progress
+
+from pytest_rich.history import DurationHistory
+from pytest_rich.terminal import COLLECT_TREE_REFRESH_HZ
+from pytest_rich.terminal import STATUS_CODES
+from pytest_rich.terminal import XDIST_REFRESH_HZ
+from pytest_rich.terminal import FileProgress
+from pytest_rich.terminal import RichTerminalReporter
+from pytest_rich.workers import WorkerLanes
+
+
+def make_reporter(items: list[pytest.Item]) -> RichTerminalReporter:
+    """Create a reporter writing to memory, with `items` already collected."""
+    config = items[0].config
+    reporter = RichTerminalReporter(config, console=Console(file=io.StringIO()))
+    result: list[Union[pytest.Item, pytest.Collector]] = list(items)
+    reporter.pytest_collectreport(
+        pytest.CollectReport("", "passed", None, result=result)
+    )
+    return reporter
+
+
+def run_item(
+    reporter: RichTerminalReporter,
+    item: pytest.Item,
+    outcome: Literal["passed", "failed", "skipped"] = "passed",
+) -> None:
+    """Feed the reporter the hooks pytest calls for a single test."""
+    location = item.location
+    reporter.pytest_runtest_logstart(item.nodeid, location)
+    for when in ("setup", "call", "teardown"):
+        reporter.pytest_runtest_logreport(
+            pytest.TestReport(
+                item.nodeid,
+                location,
+                {},
+                outcome if when == "call" else "passed",
+                None,
+                when,
+            )
+        )
+    reporter.pytest_runtest_logfinish(item.nodeid)
+
+
+def spy(monkeypatch, obj: Any, name: str) -> list[tuple[Any, ...]]:
+    """Record the calls to a method of `obj`, returning the list of them."""
+    calls: list[tuple[Any, ...]] = []
+    method = getattr(obj, name)
+
+    def wrapper(*args):
+        calls.append(args)
+        return method(*args)
+
+    monkeypatch.setattr(obj, name, wrapper)
+    return calls
+
+
+def test_file_progress_glyphs() -> None:
+    progress = FileProgress()
+    indexes = [progress.add_item() for _ in range(4)]
+    assert indexes == [0, 1, 2, 3]
+
+    progress.set_status(0, 1)
+    progress.set_status(0, 2)
+    progress.set_status(1, 2)
+    progress.set_status(3, 3)
+    assert progress.completed == 3
+    assert progress.render_glyphs() == "[green]✔✔[/green][red]❌[/red]"
+
+    # finishing an item out of order folds it back into the runs.
+    progress.set_status(2, 2)
+    assert progress.runs == ["[green]✔✔✔[/green]"]
+    assert progress.rendered == 4
+    assert progress.render_glyphs() == "[green]✔✔✔[/green][red]❌[/red]"
+
+
+def test_update_task_large_file(pytester, monkeypatch) -> None:
+    """
+    Status bookkeeping does not grow with the number of items in a file,
+    including when an item only gets a setup report.
+    """
+    items = pytester.getitems("""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(10_000))
+        def test_foo(i):
+            pass
+        """)
+    reporter = make_reporter(items)
+    # keep Rich out of the test, only the bookkeeping is of interest.
+    monkeypatch.setattr(
+        "pytest_rich.terminal.Progress", functools.partial(Progress, disable=True)
+    )
+    file_progress = reporter.progress_per_file[items[0].path]
+
+    # skipped by a marker: a setup report, but no call report.
+    reporter.pytest_runtest_logstart(items[0].nodeid, items[0].location)
+    reporter.pytest_runtest_logreport(
+        pytest.TestReport(
+            items[0].nodeid,
+            items[0].location,
+            {},
+            "skipped",
+            (str(items[0].path), 1, "Skipped: marker"),
+            "setup",
+        )
+    )
+    reporter.pytest_runtest_logfinish(items[0].nodeid)
+    for index, item in enumerate(items[1:], start=1):
+        run_item(reporter, item, "failed" if index == 5_000 else "passed")
+        # every finished item is folded into the runs, so rendering never
+        # goes back over the statuses.
+        assert file_progress.rendered == index + 1
+
+    assert file_progress.completed == 10_000
+    assert file_progress.render_glyphs() == (
+        "[yellow]s[/yellow][green]"
+        + "✔" * 4_999
+        + "[/green][red]❌[/red][green]"
+        + "✔" * 4_999
+        + "[/green]"
+    )
+
+
+def test_refresh_hz_coalesces_updates(pytester, monkeypatch) -> None:
+    items = pytester.getitems("""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(100))
+        def test_foo(i):
+            pass
+        """)
+    reporter = make_reporter(items)
+    monkeypatch.setattr(reporter.config.option, "rich_refresh_hz", 0.001)
+    refreshes = spy(monkeypatch, reporter, "_flush_runtest_tasks")
+
+    for item in items:
+        run_item(reporter, item)
+    # only the very first update repaints, the rest is coalesced.
+    assert len(refreshes) == 1
+    assert reporter.runtest_progress is not None
+    assert reporter.overall_progress is not None
+    progress = reporter.runtest_progress
+    overall_progress = reporter.overall_progress
+
+    reporter.pytest_sessionfinish(None, 0)  # type: ignore[arg-type]
+    # the final flush applies the pending updates.
+    assert len(refreshes) == 2
+    assert progress.tasks[0].description.startswith("[cyan][100%] [/cyan]")
+    assert overall_progress.tasks[-1].description == "Percent: [green]100%[/green]"
+
+
+def test_file_tasks_window(pytester, monkeypatch) -> None:
+    pytester.makepyfile(
+        **{f"test_{i}": "def test_a(): pass\ndef test_b(): pass" for i in range(30)}
+    )
+    items, _ = pytester.inline_genitems()
+    reporter = make_reporter(items)
+    monkeypatch.setattr(reporter.config.option, "rich_finished_window", 3)
+
+    run_item(reporter, items[0])
+    # only the file which started running has a task.
+    assert reporter.runtest_progress is not None
+    assert len(reporter.runtest_progress.tasks) == 1
+
+    for item in items[1:]:
+        run_item(reporter, item)
+    assert len(reporter.runtest_progress.tasks) == 3
+    assert reporter.runtest_tasks_per_file == {}
+    assert reporter.hidden_finished_files == 27
+    assert reporter.overall_progress is not None
+    finished_task = reporter.overall_progress.tasks[0]
+    assert finished_task.visible
+    assert finished_task.description == "[green]27[/green] more files finished"
+
+
+def test_file_tasks_window_deselected(pytester, monkeypatch) -> None:
+    """A file with deselected tests finishes once its selected tests ran."""
+    pytester.makepyfile(
+        **{f"test_{i}": "def test_a(): pass\ndef test_b(): pass" for i in range(3)}
+    )
+    items, _ = pytester.inline_genitems()
+    reporter = make_reporter(items)
+    monkeypatch.setattr(reporter.config.option, "rich_finished_window", 1)
+    selected = [item for item in items if item.name == "test_a"]
+    reporter.pytest_deselected([item for item in items if item.name == "test_b"])
+    assert reporter.total_items_collected == 3
+    assert reporter.total_items_deselected == 3
+
+    for item in selected:
+        run_item(reporter, item)
+    assert reporter.runtest_tasks_per_file == {}
+    assert reporter.runtest_progress is not None
+    assert len(reporter.runtest_progress.tasks) == 1
+    assert reporter.hidden_finished_files == 2
+
+
+def test_xdist_worker_lanes(pytester, monkeypatch) -> None:
+    """Reports from pytest-xdist workers come with the node which ran them."""
+    pytester.makepyfile(
+        test_a="def test_1(): pass\ndef test_2(): assert 0",
+        test_b="def test_3(): pass",
+    )
+    config = pytester.parseconfigure()
+    reporter = RichTerminalReporter(config, console=Console(file=io.StringIO()))
+    monkeypatch.setattr(reporter, "xdist", True)
+    reporter.worker_lanes = WorkerLanes()
+    nodes = [SimpleNamespace(gateway=SimpleNamespace(id=f"gw{i}")) for i in range(2)]
+    ids = ["test_a.py::test_1", "test_a.py::test_2", "test_b.py::test_3"]
+    for node in nodes:
+        reporter.pytest_testnodeready(node)
+        reporter.pytest_xdist_node_collection_finished(node, ids)
+    assert reporter.total_items_collected == 3
+    assert reporter.refresh_hz == XDIST_REFRESH_HZ
+
+    def report(
+        node,
+        nodeid: str,
+        when: Literal["setup", "call", "teardown"],
+        outcome: Literal["passed", "failed", "skipped"] = "passed",
+    ):
+        test_report = pytest.TestReport(
+            nodeid, (nodeid, 0, ""), {}, outcome, None, when
+        )
+        test_report.node = node  # type: ignore[attr-defined]
+        reporter.pytest_runtest_logreport(test_report)
+
+    # interleaved events from both workers.
+    reporter.pytest_runtest_logstart(ids[0], (ids[0], 0, ""))
+    report(nodes[0], ids[0], "setup")
+    reporter.pytest_runtest_logstart(ids[2], (ids[2], 0, ""))
+    report(nodes[1], ids[2], "setup")
+    lanes = reporter.worker_lanes.lanes
+    assert lanes["gw0"].nodeid == ids[0]
+    assert lanes["gw1"].nodeid == ids[2]
+
+    for node, nodeid in ((nodes[1], ids[2]), (nodes[0], ids[0])):
+        report(node, nodeid, "call")
+        report(node, nodeid, "teardown")
+        reporter.pytest_runtest_logfinish(nodeid)
+    reporter.pytest_runtest_logstart(ids[1], (ids[1], 0, ""))
+    report(nodes[1], ids[1], "setup")
+    report(nodes[1], ids[1], "call", "failed")
+    report(nodes[1], ids[1], "teardown")
+    reporter.pytest_runtest_logfinish(ids[1])
+
+    assert (lanes["gw0"].completed, lanes["gw0"].failed) == (1, 0)
+    assert (lanes["gw1"].completed, lanes["gw1"].failed) == (2, 1)
+    assert lanes["gw1"].nodeid is None
+    assert reporter.hidden_finished_files == 0
+    statuses = [
+        reporter.progress_per_file[path].statuses[position]
+        for path, position in map(reporter.items.slot, ids)
+    ]
+    assert statuses == [
+        STATUS_CODES["success"],
+        STATUS_CODES["fail"],
+        STATUS_CODES["success"],
+    ]
+    reporter.pytest_testnodedown(nodes[0], "crashed")
+    assert lanes["gw0"].down
+
+
+def test_stream_failures(pytester, monkeypatch) -> None:
+    pytester.makepyfile("""
+        def test_ok():
+            pass
+
+        def test_first():
+            assert 1 == 2
+
+        def test_second():
+            assert "a" == "b"
+        """)
+    reports = pytester.inline_run().getreports("pytest_runtest_logreport")
+    items, _ = pytester.inline_genitems()
+    reporter = make_reporter(items)
+    monkeypatch.setattr(reporter.config.option, "rich_stream_failures", True)
+    output = reporter.console.file
+
+    reporter.pytest_runtest_logreport(reports[1])
+    assert output.getvalue() == ""  # type: ignore[attr-defined]
+    reporter.pytest_runtest_logreport(reports[4])
+    streamed = output.getvalue()  # type: ignore[attr-defined]
+    assert "FAILURES" in streamed
+    assert "::test_first" in streamed
+    assert "::test_second" not in streamed
+    reporter.pytest_runtest_logreport(reports[7])
+    assert "::test_second" in output.getvalue()  # type: ignore[attr-defined]
+
+    for item in items:
+        reporter.pytest_runtest_logfinish(item.nodeid)
+    output.truncate(0)
+    output.seek(0)
+    reporter.pytest_sessionfinish(None, 1)  # type: ignore[arg-type]
+    summary = output.getvalue()  # type: ignore[attr-defined]
+    # only the list of failures remains to be shown.
+    assert "FAILURES" not in summary
+    assert "test_stream_failures.py:5: AssertionError" not in summary
+    assert "FAILED  test_stream_failures.py::test_first assert 1 == 2\n" in summary
+    assert "FAILED  test_stream_failures.py::test_second" in summary
+
+
+def test_stream_failures_live(pytester, monkeypatch) -> None:
+    """
+    Streamed failures are printed whole above the live progress, which is
+    drawn again below them.
+    """
+    pytester.makepyfile(test_live="""
+        def test_first():
+            assert 1 == 2
+
+        def test_ok():
+            pass
+        """)
+    reports = pytester.inline_run().getreports("pytest_runtest_logreport")
+    items, _ = pytester.inline_genitems()
+    monkeypatch.setattr(items[0].config.option, "rich_stream_failures", True)
+    # the reporter's console and the one of the live display both write to
+    # the terminal.
+    terminal = io.StringIO()
+    live_console = Console(file=terminal, force_terminal=True, width=80)
+    monkeypatch.setattr(rich, "_console", live_console)
+    reporter = RichTerminalReporter(items[0].config, console=Console(file=terminal))
+    # as with --rich-capture.
+    reporter.console.record = True
+    reporter.pytest_collectreport(
+        pytest.CollectReport("", "passed", None, result=list(items))
+    )
+    reporter.pytest_runtest_logstart(items[0].nodeid, items[0].location)
+    assert reporter.runtest_live is not None
+    reporter.runtest_live.refresh()
+    before = len(terminal.getvalue())
+
+    for report in reports[:3]:
+        reporter.pytest_runtest_logreport(report)
+    printed = terminal.getvalue()[before:]
+    reporter.runtest_live.stop()
+
+    plain = re.sub(r"\x1b\[[0-9;]*m", "", printed)
+    # the progress is erased before each print, instead of being printed
+    # after, and drawn again below.
+    assert re.search(r"\x1b\[2K─+ FAILURES\s+─+\n", plain)
+    assert re.search(r"\x1b\[2K╭─+ test_live.py::test_first ─+╮\n", plain)
+    end = plain.index("test_live.py:2: AssertionError\n")
+    assert "Progress" in plain[end:]
+    # still recorded for --rich-capture.
+    assert "assert 1 == 2" in reporter.console.export_text()
+
+
+def test_spill_failures(pytester, monkeypatch) -> None:
+    pytester.makepyfile("""
+        def test_ok():
+            print("chatty output")
+
+        def test_first():
+            assert 1 == 2
+
+        def test_second():
+            assert "a" == "b"
+        """)
+    reports = pytester.inline_run().getreports("pytest_runtest_logreport")
+    items, _ = pytester.inline_genitems()
+    monkeypatch.setattr(items[0].config.option, "rich_spill_failures", 0.0)
+    reporter = make_reporter(items)
+    for report in reports:
+        reporter.pytest_runtest_logreport(report)
+    for item in items:
+        reporter.pytest_runtest_logfinish(item.nodeid)
+
+    # passed reports are only counted, failed ones are all on disk.
+    assert reporter.outcome_counts == {"passed": 1, "failed": 2}
+    assert reporter.failures.reports == []
+    assert len(reporter.failures) == 2
+
+    reporter.pytest_sessionfinish(None, 1)  # type: ignore[arg-type]
+    summary = reporter.console.file.getvalue()  # type: ignore[attr-defined]
+    assert "test_spill_failures.py:5: AssertionError" in summary
+    assert "test_spill_failures.py:8: AssertionError" in summary
+    assert "FAILED  test_spill_failures.py::test_first assert 1 == 2\n" in summary
+    assert reporter.failures.file is None
+
+
+def test_setup_outcome_counts(pytester) -> None:
+    """Skips and errors outside of the call are counted like pytest does."""
+    pytester.makepyfile("""
+        import pytest
+
+        @pytest.fixture
+        def broken():
+            raise RuntimeError("setup")
+
+        @pytest.fixture
+        def leaky():
+            yield
+            raise RuntimeError("teardown")
+
+        def test_ok():
+            pass
+
+        @pytest.mark.skip(reason="not now")
+        def test_skipped():
+            pass
+
+        def test_setup_error(broken):
+            pass
+
+        def test_teardown_error(leaky):
+            pass
+        """)
+    reports = pytester.inline_run().getreports("pytest_runtest_logreport")
+    items, _ = pytester.inline_genitems()
+    reporter = make_reporter(items)
+    for report in reports:
+        reporter.pytest_runtest_logreport(report)
+    for item in items:
+        reporter.pytest_runtest_logfinish(item.nodeid)
+
+    assert reporter.outcome_counts == {"passed": 2, "skipped": 1, "error": 2}
+    reporter.pytest_sessionfinish(None, 1)  # type: ignore[arg-type]
+    summary = reporter.console.file.getvalue()  # type: ignore[attr-defined]
+    assert re.search(r"1\s+Skipped\s+\(25\.0%\)", summary)
+    assert re.search(r"2\s+Error\s+\(50\.0%\)", summary)
+
+
+def test_overall_task_nothing_collected(pytester) -> None:
+    pytester.makepyfile("def test_ok(): pass")
+    items, _ = pytester.inline_genitems()
+    reporter = make_reporter(items)
+    # e.g. every item was deselected.
+    reporter.total_items_collected = 0
+    reporter._update_overall_task()
+
+
+def test_eta_from_history(pytester, monkeypatch) -> None:
+    pytester.makepyfile(
+        test_a="def test_1(): pass\ndef test_2(): pass",
+        test_b="def test_3(): pass\ndef test_4(): pass",
+    )
+    items, _ = pytester.inline_genitems()
+    history = DurationHistory.load(items[0].config)
+    history.durations = {"test_a.py::test_1": 1.0, "test_b.py::test_3": 3.0}
+    history.save()
+    clock = [100.0]
+    monkeypatch.setattr(
+        "pytest_rich.terminal.time", SimpleNamespace(monotonic=lambda: clock[0])
+    )
+    reporter = make_reporter(items)
+
+    run_item(reporter, items[0])
+    # tests without history are expected to take the average, 2 seconds.
+    assert reporter.expected_total == 8.0
+    assert reporter.expected_remaining == 7.0
+    # the first test took twice as long as expected.
+    clock[0] += 2.0
+    reporter._update_overall_task()
+    assert reporter.overall_progress is not None
+    task = reporter.overall_progress.tasks[-1]
+    assert task.fields["speed"] == "0.5 tests/s"
+    assert task.fields["eta"] == "ETA 0:00:14"
+
+    reporter._update_file_task(items[1].nodeid, refresh=False)
+    assert reporter.runtest_progress is not None
+    assert reporter.runtest_progress.tasks[0].fields["eta"] == "~0:00:04 left"
+
+    for item in items[1:]:
+        run_item(reporter, item)
+    reporter.pytest_sessionfinish(None, 0)  # type: ignore[arg-type]
+    # the durations of this run were folded into the history.
+    durations = DurationHistory.load(items[0].config).durations
+    assert set(durations) == {item.nodeid for item in items}
+    assert durations["test_b.py::test_3"] < 3.0
+
+
+def test_eta_deselected(pytester, monkeypatch) -> None:
+    """Only the selected items count towards the expected duration."""
+    pytester.makepyfile(test_a="def test_1(): pass\ndef test_2(): pass")
+    items, _ = pytester.inline_genitems()
+    history = DurationHistory.load(items[0].config)
+    history.durations = {"test_a.py::test_1": 1.0, "test_a.py::test_2": 5.0}
+    history.save()
+    reporter = make_reporter(items)
+    reporter.pytest_deselected([items[1]])
+
+    run_item(reporter, items[0])
+    assert reporter.expected_total == 1.0
+    assert reporter.expected_remaining == 0.0
+    assert reporter.progress_per_file[items[0].path].expected == 0.0
+
+
+def test_profile(pytester, monkeypatch) -> None:
+    # not named after the test, which would clash with tests/test_profile.py.
+    pytester.makepyfile(test_profiled="""
+        def test_ok():
+            pass
+
+        def test_fail():
+            assert 1 == 2
+        """)
+    reports = pytester.inline_run().getreports("pytest_runtest_logreport")
+    items, _ = pytester.inline_genitems()
+    profile = pytester.path / "profile.json"
+    monkeypatch.setattr(items[0].config.option, "rich_profile", str(profile))
+    reporter = make_reporter(items)
+    reporter.start_session(None)
+    for item in items:
+        reporter.pytest_runtest_logstart(item.nodeid, item.location)
+    for report in reports:
+        reporter.pytest_runtest_logreport(report)
+    for item in items:
+        reporter.pytest_runtest_logfinish(item.nodeid)
+    reporter.pytest_sessionfinish(None, 1)  # type: ignore[arg-type]
+    reporter.pytest_unconfigure()
+
+    stats = json.loads(profile.read_text())
+    assert stats["pytest_runtest_logreport"]["calls"] == 6
+    assert stats["pytest_runtest_logstart"]["calls"] == 2
+    assert stats["pytest_sessionfinish"]["calls"] == 1
+    assert stats["render traceback"]["calls"] == 1
+    assert stats["render summary"]["calls"] == 1
+    assert "save capture" in stats
+    output = reporter.console.file.getvalue()  # type: ignore[attr-defined]
+    assert "pytest-rich profile" in output
+    assert "pytest_runtest_logreport" in output
+
+
+def test_collect_tree(pytester, monkeypatch) -> None:
+    pytester.makepyfile(
+        **{
+            f"pkg/sub{i}/test_{i}": "def test_a(): pass\ndef test_b(): pass"
+            for i in range(3)
+        }
+    )
+    items, _ = pytester.inline_genitems()
+    config = items[0].config
+    monkeypatch.setattr(config.option, "rich_collect_tree", True)
+    reporter = RichTerminalReporter(config, console=Console(file=io.StringIO()))
+    # the live displays use the global console.
+    console = Console(file=io.StringIO(), force_terminal=True, width=100, record=True)
+    monkeypatch.setattr(rich, "_console", console)
+    assert reporter.collect_refresh_hz == COLLECT_TREE_REFRESH_HZ
+    refreshes = spy(monkeypatch, reporter, "_flush_collect_task")
+
+    reporter.pytest_collection()
+    for item in items:
+        reporter.pytest_collectreport(
+            pytest.CollectReport(item.nodeid, "passed", None, result=[item])
+        )
+    # the tree repaints at a bounded rate, not on every report.
+    assert len(refreshes) == 1
+    reporter.pytest_collection_finish(None)  # type: ignore[arg-type]
+    assert reporter.collect_live is None
+
+    output = console.export_text()
+    assert f"{pytester.path.name}/ 6 items in 3 modules" in output
+    assert "pkg/ 6 items in 3 modules" in output
+    assert "sub2/ 2 items in 1 modules" in output
+
+
+def test_collect_durations(pytester) -> None:
+    pytester.makepyfile(
+        test_fast="def test_1(): pass",
+        test_slow="import time\ntime.sleep(0.2)\n\ndef test_2(): pass",
+    )
+    result = pytester.runpytest_subprocess("--rich-ci", "--rich-collect-durations=1")
+    result.stdout.fnmatch_lines(
+        [
+            "Slowest 1 modules to collect*",
+            "*Duration*Module*",
+            "*ms*test_slow.py*",
+            "2 modules collected in *",
+            "Collected 2 items",
+        ]
+    )
+    result.stdout.no_fnmatch_line("*ms │ test_fast.py*")
+    assert result.ret == 0
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_group_failures(pytester, stream: bool) -> None:
+    pytester.makepyfile(test_g="""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(3))
+        def test_service(i):
+            raise ConnectionError("service down")
+
+        def test_other():
+            assert 1 == 2
+        """)
+    args = ["--rich-ci", "--rich-ci-interval=0", "--rich-group-failures"]
+    if stream:
+        args.append("--rich-stream-failures")
+    result = pytester.runpytest_subprocess(*args)
+    output = result.stdout.str()
+    # one traceback per group.
+    assert output.count("test_g.py:5 in test_service") == 1
+    assert output.count("test_g.py:8 in test_other") == 1
+    if stream:
+        result.stdout.fnmatch_lines(
+            [
+                "*test_g.py::test_service[[]0]*",
+                "FAILED test_g.py::test_service[[]1] same failure as "
+                "test_g.py::test_service[[]0]",
+                "FAILED test_g.py::test_service[[]2] same failure as "
+                "test_g.py::test_service[[]0]",
+                "*test_g.py::test_other*",
+            ]
+        )
+    else:
+        result.stdout.fnmatch_lines(
+            [
+                "*test_g.py::test_service[[]0]*",
+                "Same failure in 2 more tests:",
+                "  test_g.py::test_service[[]1]",
+                "  test_g.py::test_service[[]2]",
+                "*test_g.py::test_other*",
+            ]
+        )
+    # every failure is still listed in the summary.
+    result.stdout.fnmatch_lines(
+        [
+            "FAILED  test_g.py::test_service[[]0] ConnectionError: service down",
+            "FAILED  test_g.py::test_service[[]1] ConnectionError: service down",
+            "FAILED  test_g.py::test_service[[]2] ConnectionError: service down",
+            "FAILED  test_g.py::test_other assert 1 == 2",
+        ]
+    )
+    assert result.ret == 1
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        [],
+        ["--rich-group-failures"],
+        ["--rich-stream-failures"],
+        ["--rich-render-workers=2", "--rich-render-pool=thread"],
+    ],
+)
+def test_strict_xpass(pytester, options: list[str]) -> None:
+    """
+    A strict xfail which passes fails with a message instead of a traceback.
+    """
+    pytester.makepyfile(test_x="""
+        import pytest
+
+        @pytest.mark.xfail(strict=True, reason="not fixed yet")
+        def test_xpass():
+            pass
+
+        @pytest.mark.xfail(strict=True, reason="not fixed either")
+        def test_xpass_other():
+            pass
+        """)
+    result = pytester.runpytest_subprocess(
+        "--rich-ci", "--rich-ci-interval=0", *options
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "FAILED  test_x.py::test_xpass [[]XPASS(strict)] not fixed yet",
+            "FAILED  test_x.py::test_xpass_other [[]XPASS(strict)] not fixed either",
+        ]
+    )
+    result.stdout.no_fnmatch_line("*INTERNALERROR*")
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+
+
+def test_render_budget(pytester) -> None:
+    pytester.makepyfile(test_b="""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(3))
+        def test_fail(i):
+            assert i == -1, f"value {i}"
+        """)
+    result = pytester.runpytest_subprocess(
+        "--rich-ci", "--rich-ci-interval=0", "--rich-render-budget=0s"
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "FAILED test_b.py::test_fail[[]0]: AssertionError: value 0",
+            "FAILED test_b.py::test_fail[[]1]: AssertionError: value 1",
+            "FAILED test_b.py::test_fail[[]2]: AssertionError: value 2",
+            "Out of --rich-render-budget=0s: of the failures, 0 shown in full and 3 as*",
+        ]
+    )
+    assert "test_b.py:5: AssertionError" not in result.stdout.str()
+
+
+def test_render_budget_capture(pytester) -> None:
+    """The note of an exhausted budget points to the --rich-capture file."""
+    pytester.makepyfile(test_b="""
+        def test_fail():
+            assert False
+        """)
+    result = pytester.runpytest_subprocess(
+        "--rich-ci",
+        "--rich-ci-interval=0",
+        "--rich-render-budget=0s",
+        "--rich-capture=out.txt",
+    )
+    result.stdout.fnmatch_lines(["*For their full tracebacks, see out.txt, or *"])
+    assert "assert False" in (pytester.path / "out.txt").read_text()
+
+
+@pytest.mark.parametrize("budget, full", [("0s", 0), ("1b", 1)], ids=["time", "size"])
+def test_render_budget_workers(pytester, budget: str, full: int) -> None:
+    """
+    The render pool stops rendering the tracebacks not shown in full once the
+    budget for full panels is spent.
+    """
+    pytester.makeconftest("""
+        import pytest_rich.render
+
+        rendered = []
+        render_traceback = pytest_rich.render.render_traceback
+
+        def counting_render_traceback(nodeid, longrepr, options):
+            rendered.append(nodeid)
+            return render_traceback(nodeid, longrepr, options)
+
+        pytest_rich.render.render_traceback = counting_render_traceback
+
+        def pytest_unconfigure(config):
+            with open("rendered.txt", "w") as file:
+                file.write(str(len(rendered)))
+        """)
+    pytester.makepyfile(test_b="""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(200))
+        def test_fail(i):
+            assert i == -1, f"value {i}"
+        """)
+    result = pytester.runpytest_subprocess(
+        "--rich-ci",
+        "--rich-ci-interval=0",
+        f"--rich-render-budget={budget}",
+        "--rich-render-workers=2",
+        "--rich-render-pool=thread",
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "FAILED test_b.py::test_fail[[]199]: AssertionError: value 199",
+            f"Out of --rich-render-budget={budget}: of the failures, {full} shown in full*",
+        ]
+    )
+    rendered = int(pytester.path.joinpath("rendered.txt").read_text())
+    # at most the chunks submitted ahead of the last full one.
+    assert full <= rendered <= full + 4 * 16
+
+
+def test_render_budget_invalid(pytester) -> None:
+    result = pytester.runpytest_subprocess("--rich-ci", "--rich-render-budget=3x")
+    result.stderr.fnmatch_lines(["ERROR: --rich-render-budget: invalid budget '3x'*"])
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
@@ -0,0 +1,182 @@
+import io
+import os
+import re
+import sys
+import threading
+import time
+from typing import Union
+
+import pytest
+from rich.console import Console
+
+from pytest_rich.terminal import RichTerminalReporter
+from pytest_rich.threaded import RENDER_THREAD_REFRESH_HZ
+from pytest_rich.threaded import ThreadedReporter
+
+
+def make_threaded_reporter(config: pytest.Config) -> ThreadedReporter:
+    reporter = RichTerminalReporter(config, console=Console(file=io.StringIO()))
+    threaded = ThreadedReporter(reporter)
+    threaded.start()
+    return threaded
+
+
+def run_items(threaded: ThreadedReporter, items: list[pytest.Item]) -> None:
+    """Feed the hooks pytest calls for a session running `items`."""
+    threaded.pytest_collection()
+    result: list[Union[pytest.Item, pytest.Collector]] = list(items)
+    threaded.pytest_collectreport(
+        pytest.CollectReport("", "passed", None, result=result)
+    )
+    for item in items:
+        threaded.pytest_runtest_logstart(item.nodeid, item.location)
+        for when in ("setup", "call", "teardown"):
+            threaded.pytest_runtest_logreport(
+                pytest.TestReport(item.nodeid, item.location, {}, "passed", None, when)
+            )
+        threaded.pytest_runtest_logfinish(item.nodeid)
+
+
+def test_threaded_reporter(pytester, monkeypatch) -> None:
+    items = pytester.getitems("""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(20))
+        def test_foo(i):
+            pass
+        """)
+    threaded = make_threaded_reporter(items[0].config)
+    reporter = threaded.reporter
+    assert reporter.refresh_hz == RENDER_THREAD_REFRESH_HZ
+    threads = set()
+    logreport = reporter.pytest_runtest_logreport
+
+    def record_thread(report):
+        threads.add(threading.current_thread().name)
+        logreport(report)
+
+    monkeypatch.setattr(reporter, "pytest_runtest_logreport", record_thread)
+
+    run_items(threaded, items)
+    threaded.pytest_sessionfinish(None, 0)  # type: ignore[arg-type]
+    # everything was rendered by the time the hook returns.
+    assert threads == {"pytest-rich-renderer"}
+    assert reporter.total_items_completed == 20
+    output = reporter.console.file.getvalue()  # type: ignore[attr-defined]
+    assert "SUCCEEDED in" in output
+
+    threaded.pytest_unconfigure()
+    assert threaded.thread is None
+
+
+def test_threaded_reporter_slow_rendering(pytester, monkeypatch) -> None:
+    """The hooks do not wait for the rendering."""
+    items = pytester.getitems("""
+        import pytest
+
+        @pytest.mark.parametrize("i", range(50))
+        def test_foo(i):
+            pass
+        """)
+    threaded = make_threaded_reporter(items[0].config)
+    logfinish = threaded.reporter.pytest_runtest_logfinish
+
+    def slow_logfinish(nodeid):
+        time.sleep(0.02)
+        logfinish(nodeid)
+
+    monkeypatch.setattr(threaded.reporter, "pytest_runtest_logfinish", slow_logfinish)
+
+    start = time.perf_counter()
+    run_items(threaded, items)
+    posted = time.perf_counter() - start
+    threaded.pytest_sessionfinish(None, 0)  # type: ignore[arg-type]
+    rendered = time.perf_counter() - start
+    assert rendered >= 50 * 0.02
+    assert posted < rendered / 2
+    assert threaded.reporter.total_items_completed == 50
+    threaded.close()
+
+
+def test_threaded_reporter_error(pytester, monkeypatch) -> None:
+    items = pytester.getitems("def test_foo(): pass")
+    threaded = make_threaded_reporter(items[0].config)
+
+    def fail(nodeid, location):
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(threaded.reporter, "pytest_runtest_logstart", fail)
+    threaded.pytest_runtest_logstart(items[0].nodeid, items[0].location)
+    # raised on the hook thread, by the next hook.
+    with pytest.raises(RuntimeError, match="render failed"):
+        threaded.flush()
+    assert threaded.thread is None
+    # the events after it are dropped.
+    threaded.pytest_runtest_logfinish(items[0].nodeid)
+    threaded.pytest_unconfigure()
+
+
+def test_for_terminal(pytester, tmp_path, monkeypatch) -> None:
+    """The reporter keeps writing to the terminal while pytest captures it."""
+    config = pytester.parseconfigure()
+    with open(tmp_path / "out", "w") as out, open(tmp_path / "other", "w") as other:
+        monkeypatch.setattr(sys, "stdout", out)
+        threaded = ThreadedReporter.for_terminal(config)
+        assert threaded.reporter.live_options["console"] is threaded.reporter.console
+        assert threaded.reporter.console.file is threaded.terminal
+        threaded.start()
+        # what pytest does to capture the output of the tests.
+        os.dup2(other.fileno(), out.fileno())
+        threaded.pytest_sessionstart(pytest.Session.from_config(config))
+        threaded.pytest_unconfigure()
+    assert "pytest session starts" in (tmp_path / "out").read_text()
+    assert (tmp_path / "other").read_text() == ""
+
+
+def test_threaded_reporter_live(pytester, monkeypatch) -> None:
+    """
+    With one console for the reporter and the live displays, the streamed
+    failures are printed above the progress, and only them are recorded.
+    """
+    pytester.makepyfile(test_live="""
+        def test_first():
+            assert 1 == 2
+        """)
+    reports = pytester.inline_run().getreports("pytest_runtest_logreport")
+    items, _ = pytester.inline_genitems()
+    config = items[0].config
+    monkeypatch.setattr(config.option, "rich_stream_failures", True)
+    monkeypatch.setattr(config.option, "rich_capture", "out.txt")
+    monkeypatch.chdir(pytester.path)
+    console = Console(file=io.StringIO(), force_terminal=True, width=80)
+    threaded = ThreadedReporter(
+        RichTerminalReporter(config, console=console, live_console=console)
+    )
+    threaded.start()
+
+    threaded.pytest_collection()
+    result: list[Union[pytest.Item, pytest.Collector]] = list(items)
+    threaded.pytest_collectreport(
+        pytest.CollectReport("", "passed", None, result=result)
+    )
+    threaded.pytest_runtest_logstart(items[0].nodeid, items[0].location)
+    threaded.flush()
+    assert threaded.reporter.runtest_live is not None
+    threaded.reporter.runtest_live.refresh()
+    for report in reports:
+        threaded.pytest_runtest_logreport(report)
+    threaded.pytest_runtest_logfinish(items[0].nodeid)
+    threaded.pytest_sessionfinish(None, 1)  # type: ignore[arg-type]
+    threaded.pytest_unconfigure()
+
+    output = re.sub(r"\x1b\[[0-9;]*m", "", console.file.getvalue())  # type: ignore[attr-defined]
+    # the progress is erased before the panel is printed.
+    assert re.search(r"\x1b\[2K─+ FAILURES\s+─+\n", output)
+    assert re.search(r"\x1b\[2K╭─+ test_live.py::test_first ─+╮\n", output)
+    assert "Saved terminal output to out.txt" in output
+    captured = (pytester.path / "out.txt").read_text()
+    assert "test_live.py:2: AssertionError" in captured
+    assert "FAILED in" in captured
+    # without the frames of the progress.
+    assert "Percent" not in captured
+    assert "[100%]" not in captured
@@ -0,0 +1,193 @@
+import io
+import threading
+import time
+
+import pytest
+from pygments.lexers import PythonLexer
+from rich.console import Console
+from rich.syntax import Syntax
+
+from pytest_rich.source import Snippet
+from pytest_rich.source import get_snippet
+from pytest_rich.traceback import DEFAULT_THEME
+from pytest_rich.traceback import RenderContext
+from pytest_rich.traceback import RichExceptionChainRepr
+from pytest_rich.traceback import SnippetSyntax
+from pytest_rich.traceback import _SnippetLexer
+
+# Multi-line strings and brackets spanning many lines, which only lex
+# correctly when the window starts outside of them.
+SOURCE = '''\
+import textwrap
+
+TEMPLATE = """
+def not_code():
+    return ("not", "a", "bracket"
+"""
+
+
+@decorator(
+    name="x",  # comment
+    values=[
+        1,
+        2,
+    ],
+)
+def test_one():
+    text = textwrap.dedent(
+        \'\'\'
+        assert 0
+        \'\'\'
+    )
+    assert text == (
+        "a"
+        "b"
+    )
+
+
+class TestClass:
+    def test_two(self):
+        # a comment with "quotes
+        assert {
+            "key": [1, 2, 3],
+        } == {}
+    x = 1; y = 2'''
+
+EXTRA_LINES = 3
+
+
+def render(syntax: Syntax) -> str:
+    console = Console(
+        file=io.StringIO(), force_terminal=True, color_system="truecolor", width=100
+    )
+    console.print(syntax)
+    return console.file.getvalue()  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize("lineno", range(1, SOURCE.count("\n") + 2))
+def test_snippet_syntax_golden(tmp_path, lineno: int) -> None:
+    """Lexing just a window around a line looks the same as lexing the file."""
+    path = tmp_path / "test_golden.py"
+    path.write_text(SOURCE)
+    kwargs = dict(
+        theme="ansi_dark",
+        line_numbers=True,
+        highlight_lines={lineno},
+        code_width=88,
+        dedent=False,
+    )
+    first_line, last_line = lineno - EXTRA_LINES, lineno + EXTRA_LINES
+    expected = Syntax(
+        SOURCE, "python", line_range=(first_line, last_line), **kwargs  # type: ignore[arg-type]
+    )
+
+    snippet = get_snippet(str(path), first_line, last_line)
+    assert snippet is not None
+    offset = snippet.start_line - 1
+    assert snippet.start_line <= max(first_line, 1)
+    syntax = SnippetSyntax(
+        snippet, line_range=(first_line - offset, last_line - offset), **kwargs
+    )
+    assert render(syntax) == render(expected)
+    # rendering again uses the cached tokens.
+    assert snippet.tokens is not None
+    assert render(syntax) == render(expected)
+
+
+def test_short_entries(pytester) -> None:
+    """Entries between the first and the last one are shown in short style."""
+    pytester.makepyfile("""
+        def inner(x):
+            assert x == 2
+
+        def middle(x):
+            inner(x)
+
+        def test_deep():
+            middle(1)
+        """)
+    reports = pytester.inline_run().getreports("pytest_runtest_logreport")
+    (report,) = [r for r in reports if r.failed]
+    console = Console(file=io.StringIO(), width=100)
+    console.print(RichExceptionChainRepr(report.nodeid, report.longrepr))
+    output = console.file.getvalue()  # type: ignore[attr-defined]
+    assert "in test_deep" in output
+    assert "in middle" in output
+    assert "in inner" in output
+    assert "x = 1" in output
+
+
+def test_shared_render_context(pytester) -> None:
+    """Rendering with a shared context gives the same output as without one."""
+    pytester.makepyfile("""
+        def test_fail():
+            assert [1, "a"] == [2, "b"]
+        """)
+    reports = pytester.inline_run().getreports("pytest_runtest_logreport")
+    (report,) = [r for r in reports if r.failed]
+    context = RenderContext.from_theme(DEFAULT_THEME)
+    outputs = []
+    for tb_context in (None, context, context):
+        console = Console(file=io.StringIO(), width=100, force_terminal=True)
+        console.print(
+            RichExceptionChainRepr(report.nodeid, report.longrepr, context=tb_context)
+        )
+        outputs.append(console.file.getvalue())  # type: ignore[attr-defined]
+    assert outputs[0] == outputs[1] == outputs[2]
+
+
+def test_short_entries_reporter(pytester) -> None:
+    """
+    The reporter shows failures more than two calls deep, whose middle
+    entries have no arguments, instead of crashing.
+    """
+    pytester.makepyfile(test_deep="""
+        def inner(x):
+            assert x == 2
+
+        def middle(x):
+            inner(x)
+
+        def test_deep():
+            middle(1)
+        """)
+    result = pytester.runpytest_subprocess("--rich-ci", "--rich-ci-interval=0")
+    result.stdout.fnmatch_lines(
+        [
+            "*test_deep.py:8 in test_deep*",
+            "*test_deep.py:5 in middle*",
+            "*test_deep.py:2 in inner*",
+            "*x = 1*",
+            "FAILED  test_deep.py::test_deep assert 1 == 2",
+        ]
+    )
+    result.stdout.no_fnmatch_line("*INTERNALERROR*")
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+
+
+def test_snippet_lexed_once() -> None:
+    """Threads highlighting the same snippet share one lexing of it."""
+    snippet = Snippet("x = 1\n", start_line=1, total_lines=1)
+    lexed = []
+
+    class SlowLexer(PythonLexer):
+        def get_tokens(self, text, unfiltered=False):
+            lexed.append(text)
+            time.sleep(0.05)
+            return super().get_tokens(text, unfiltered)
+
+    lexer = _SnippetLexer(snippet, SlowLexer())
+    tokens = []
+    start = threading.Barrier(8)
+
+    def highlight() -> None:
+        start.wait()
+        tokens.append(list(lexer.get_tokens(snippet.code)))
+
+    threads = [threading.Thread(target=highlight) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(lexed) == 1
+    assert tokens == [tokens[0]] * 8